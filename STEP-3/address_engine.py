@@ -0,0 +1,252 @@
+# src/address_engine.py
+
+from network_model import ip_to_int, parse_prefix, network_key
+
+try:
+    import numpy as np
+except ImportError:  # NumPy is optional; callers fall back to per-address code
+    np = None
+
+# Longest dotted-quad string ("255.255.255.255")
+MAX_ADDRESS_LENGTH = 15
+# Prefix lengths fit in 6 bits, so (network << 6) | prefix is a unique subnet key
+PREFIX_BITS = 6
+# Below this many rows the fixed cost of the vectorized passes outweighs them
+VECTORIZE_MIN_ROWS = 256
+
+
+def numpy_available():
+    return np is not None
+
+
+def _parse_dotted_quads(strings):
+    """
+    Parses a sequence of dotted-quad strings into a uint32 array in a fixed
+    number of vectorized passes over the characters. Returns (values, valid);
+    strings that are not a strict dotted quad are marked invalid. Strings
+    longer than an address are truncated by NumPy, which always leaves them
+    without a terminator, so they are marked invalid as well.
+    """
+    count = len(strings)
+    try:
+        raw = np.array(strings, dtype=f'S{MAX_ADDRESS_LENGTH + 1}')
+    except UnicodeEncodeError:
+        # Non-ASCII text can't be an address; blank it so the row is invalid
+        raw = np.array([s if s.isascii() else '' for s in strings], dtype=f'S{MAX_ADDRESS_LENGTH + 1}')
+    chars = raw.view(np.uint8).reshape(count, MAX_ADDRESS_LENGTH + 1)
+
+    value = np.zeros(count, dtype=np.uint32)
+    octet = np.zeros(count, dtype=np.uint32)
+    digits = np.zeros(count, dtype=np.uint8)      # Digits in the current octet
+    leading_zero = np.zeros(count, dtype=bool)
+    dots = np.zeros(count, dtype=np.uint8)
+    ended = np.zeros(count, dtype=bool)
+    valid = np.ones(count, dtype=bool)
+
+    for column in range(MAX_ADDRESS_LENGTH + 1):
+        ch = chars[:, column]
+        is_digit = (ch >= 48) & (ch <= 57) & ~ended
+        is_dot = (ch == 46) & ~ended
+        is_end = (ch == 0) & ~ended
+
+        # Any other character, or a digit after the terminator, is invalid
+        valid &= is_digit | is_dot | is_end | ended
+
+        # A digit extends the current octet; '0' followed by a digit is a leading zero
+        valid &= ~(is_digit & leading_zero)
+        leading_zero = np.where(is_digit, (digits == 0) & (ch == 48), leading_zero)
+        octet = np.where(is_digit, octet * 10 + (ch.astype(np.uint32) - 48), octet)
+        digits = np.where(is_digit, digits + 1, digits)
+
+        # A dot or the end of the string closes an octet, which must be non-empty and <= 255
+        closes = is_dot | is_end
+        valid &= ~(closes & ((digits == 0) | (octet > 255)))
+        value = np.where(closes, (value << np.uint32(8)) | (octet & np.uint32(255)), value)
+        dots = np.where(is_dot, dots + 1, dots)
+        octet = np.where(closes, 0, octet)
+        digits = np.where(closes, 0, digits)
+        leading_zero = np.where(closes, False, leading_zero)
+        ended |= is_end
+
+    valid &= ended & (dots == 3)
+    return value, valid
+
+
+def _popcount32(values):
+    """Counts set bits in each element of a uint32 array."""
+    v = values.astype(np.uint32)
+    v = v - ((v >> np.uint32(1)) & np.uint32(0x55555555))
+    v = (v & np.uint32(0x33333333)) + ((v >> np.uint32(2)) & np.uint32(0x33333333))
+    v = (v + (v >> np.uint32(4))) & np.uint32(0x0F0F0F0F)
+    return ((v * np.uint32(0x01010101)) >> np.uint32(24)).astype(np.uint8)
+
+
+def _masks_from_prefixes(prefix_lens):
+    """Returns the uint32 netmask for each prefix length (0-32)."""
+    shifted = np.uint64(0xFFFFFFFF) << (np.uint64(32) - prefix_lens.astype(np.uint64))
+    return (shifted & np.uint64(0xFFFFFFFF)).astype(np.uint32)
+
+
+class AddressArrays:
+    """
+    Bulk, vectorized view of many interface addresses.
+
+    Addresses and masks are held as NumPy uint32 arrays; prefix lengths,
+    network addresses, broadcast addresses and subnet keys are computed for
+    all rows at once instead of building one ipaddress object per interface.
+    Rows whose address or mask is invalid have valid[row] == False, exactly
+    where ipaddress.IPv4Interface would raise ValueError.
+    """
+    def __init__(self, ips, masks, valid=None):
+        self.ip = np.asarray(ips, dtype=np.uint32)
+        self.mask = np.asarray(masks, dtype=np.uint32)
+        self.valid = np.ones(len(self.ip), dtype=bool) if valid is None else np.asarray(valid, dtype=bool)
+        self._compute_prefixes()
+
+    @classmethod
+    def from_strings(cls, ips, masks):
+        """Builds the arrays from parallel sequences of address and mask strings."""
+        if np is None:
+            raise ImportError("NumPy is required for AddressArrays")
+        ip_values, ip_valid = _parse_dotted_quads(ips)
+        mask_values, mask_valid = _parse_dotted_quads(masks)
+        arrays = cls(ip_values, mask_values, ip_valid & mask_valid)
+
+        # Rare forms the vectorized parser leaves out (e.g. a bare prefix
+        # length as the mask) are resolved one by one with the scalar helpers
+        for row in np.flatnonzero(~arrays.valid):
+            try:
+                ip = ip_to_int(ips[row])
+                prefix_len = parse_prefix(masks[row])
+            except ValueError:
+                continue
+            arrays.ip[row] = ip
+            arrays.mask[row] = _masks_from_prefixes(np.array([prefix_len]))[0]
+            arrays.prefix_len[row] = prefix_len
+            arrays.valid[row] = True
+        arrays._compute_networks()
+        return arrays
+
+    @classmethod
+    def from_interface_table(cls, table):
+        """Wraps an InterfaceTable's address columns without copying them."""
+        if np is None:
+            raise ImportError("NumPy is required for AddressArrays")
+        ips = np.frombuffer(table.ip, dtype=np.uint32) if len(table) else np.zeros(0, dtype=np.uint32)
+        masks = np.frombuffer(table.mask, dtype=np.uint32) if len(table) else np.zeros(0, dtype=np.uint32)
+        flags = np.frombuffer(table.flags, dtype=np.uint8) if len(table) else np.zeros(0, dtype=np.uint8)
+        return cls(ips, masks, (flags & 1).astype(bool))
+
+    def __len__(self):
+        return len(self.ip)
+
+    def _compute_prefixes(self):
+        # A netmask is ones followed by zeros; like ipaddress, a host mask
+        # (zeros followed by ones) is accepted too
+        mask = self.mask
+        inverted = ~mask
+        is_netmask = (inverted & (inverted + np.uint32(1))) == 0
+        is_hostmask = (mask & (mask + np.uint32(1))) == 0
+        ones = _popcount32(mask)
+        self.prefix_len = np.where(is_netmask, ones, 32 - ones).astype(np.uint8)
+        self.valid = self.valid & (is_netmask | is_hostmask)
+        self._compute_networks()
+
+    def _compute_networks(self):
+        netmask = _masks_from_prefixes(self.prefix_len)
+        self.network = self.ip & netmask
+        self.broadcast = self.network | ~netmask
+
+    def subnet_keys(self):
+        """
+        Returns one uint64 key per row, equal for rows in the same subnet
+        ((network << 6) | prefix length). Invalid rows get a unique key of
+        their own so they never group with anything.
+        """
+        keys = (self.network.astype(np.uint64) << np.uint64(PREFIX_BITS)) | self.prefix_len.astype(np.uint64)
+        invalid = ~self.valid
+        if invalid.any():
+            # Real keys stay below 2**38; push invalid rows above that range
+            keys[invalid] = np.uint64(1 << 40) + np.flatnonzero(invalid).astype(np.uint64)
+        return keys
+
+    def subnet_key_tuple(self, row):
+        """Returns the (network, prefix length) key of a row, as network_model.network_key does."""
+        return int(self.network[row]), int(self.prefix_len[row])
+
+    def group_by_subnet(self):
+        """
+        Groups valid rows by subnet. Returns (order, starts): order lists row
+        indexes sorted by subnet (rows ascending within a subnet), and the
+        rows of group g are order[starts[g]:starts[g + 1]].
+        """
+        rows = np.flatnonzero(self.valid)
+        keys = self.subnet_keys()[rows]
+        sort = np.argsort(keys, kind='stable')
+        order = rows[sort]
+        sorted_keys = keys[sort]
+        boundaries = np.flatnonzero(sorted_keys[1:] != sorted_keys[:-1]) + 1
+        starts = np.concatenate(([0], boundaries, [len(order)])) if len(order) else np.array([0])
+        return order, starts
+
+    def subnet_positions(self):
+        """
+        Returns (group, position) arrays: the subnet group id of each row
+        (-1 for invalid rows) and its rank among the rows of that subnet.
+        """
+        order, starts = self.group_by_subnet()
+        group = np.full(len(self), -1, dtype=np.int64)
+        position = np.zeros(len(self), dtype=np.int64)
+        sizes = np.diff(starts)
+        group[order] = np.repeat(np.arange(len(sizes)), sizes)
+        position[order] = np.arange(len(order)) - np.repeat(starts[:-1], sizes)
+        return group, position
+
+
+def subnet_keys(ips, masks):
+    """
+    Returns the (network address, prefix length) key for each address/mask
+    string pair, or None where the pair is invalid. Uses AddressArrays when
+    NumPy is available (and there are enough rows to be worth it) and
+    network_model.network_key otherwise.
+    """
+    if np is None or len(ips) < VECTORIZE_MIN_ROWS:
+        keys = []
+        for ip, mask in zip(ips, masks):
+            try:
+                keys.append(network_key(ip, mask))
+            except ValueError:
+                keys.append(None)
+        return keys
+
+    arrays = AddressArrays.from_strings(ips, masks)
+    networks = arrays.network.tolist()
+    prefix_lens = arrays.prefix_len.tolist()
+    return [(network, prefix_len) if valid else None
+            for network, prefix_len, valid in zip(networks, prefix_lens, arrays.valid.tolist())]
+
+
+
+def address_columns(ips, masks):
+    """
+    Converts address/mask string pairs to integers. Returns parallel lists
+    (rows, addresses, networks, prefix_lens) for the valid pairs only, where
+    rows holds each pair's index in the input. Vectorized like subnet_keys.
+    """
+    if np is None or len(ips) < VECTORIZE_MIN_ROWS:
+        rows, addresses, networks, prefix_lens = [], [], [], []
+        for row, (ip, mask) in enumerate(zip(ips, masks)):
+            try:
+                network, prefix_len = network_key(ip, mask)
+            except ValueError:
+                continue
+            rows.append(row)
+            addresses.append(ip_to_int(ip))
+            networks.append(network)
+            prefix_lens.append(prefix_len)
+        return rows, addresses, networks, prefix_lens
+
+    arrays = AddressArrays.from_strings(ips, masks)
+    valid = np.flatnonzero(arrays.valid)
+    return (valid.tolist(), arrays.ip[valid].tolist(), arrays.network[valid].tolist(),
+            arrays.prefix_len[valid].tolist())
@@ -0,0 +1,684 @@
+# src/benchmark.py
+
+import argparse
+import ipaddress
+import os
+import random
+import tempfile
+import time
+import tracemalloc
+from parser import NetworkConfigParser
+from network_model import InterfaceTable
+from topology_builder import TopologyBuilder
+from address_engine import AddressArrays, numpy_available
+from prefix_index import PrefixTrie
+from network_model import prefix_to_mask
+from graph_snapshot import GraphSnapshot, load_snapshot
+from validator import NetworkValidator
+from critical_links import CriticalLinkAnalyzer
+from traffic_engine import LinkLoadModel
+
+
+def generate_config(hostname, interface_count, seed_octet=10):
+    """
+    Builds a synthetic IOS-style running-config with the given number of
+    interfaces, plus an OSPF process advertising every interface subnet.
+    """
+    lines = [f"hostname {hostname}", "!", "version 15.2", "!"]
+    networks = []
+    for i in range(interface_count):
+        second, third = divmod(i, 256)
+        ip = f"{seed_octet}.{second % 256}.{third}.1"
+        lines += [
+            f"interface GigabitEthernet{i // 48}/{i % 48}",
+            f" ip address {ip} 255.255.255.252",
+            f" description Synthetic uplink {i}",
+            " bandwidth 1000000",
+            " duplex full",
+            " speed 1000",
+            " ip ospf cost 10",
+            " no shutdown",
+            "!",
+        ]
+        networks.append(f" network {seed_octet}.{second % 256}.{third}.0 0.0.0.3 area 0")
+    lines += ["router ospf 1", " router-id 1.1.1.1"] + networks + ["!", "end"]
+    return "\n".join(lines) + "\n"
+
+
+def _time_engine(engine, content, repeat):
+    parser = NetworkConfigParser('.', engine=engine)
+    best = None
+    result = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = parser.parse_content(content)
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best, result
+
+
+def benchmark_parser_engines(sizes=(1000, 10000, 50000), repeat=3):
+    """
+    Compares the single-pass line engine with the original regex engine on
+    synthetic configs of increasing size and checks both produce the same data.
+    """
+    print("\n--- Parser Engine Benchmark ---")
+    print(f"{'interfaces':>10} {'lines':>9} {'regex (s)':>10} {'lines (s)':>10} {'speedup':>8}")
+    for size in sizes:
+        content = generate_config('BENCH1', size)
+        regex_time, regex_result = _time_engine('regex', content, repeat)
+        lines_time, lines_result = _time_engine('lines', content, repeat)
+        if regex_result != lines_result:
+            print(f"❌ Engines disagree on a config with {size} interfaces.")
+        speedup = regex_time / lines_time if lines_time else float('inf')
+        print(f"{size:>10} {content.count(chr(10)):>9} {regex_time:>10.3f} {lines_time:>10.3f} {speedup:>7.1f}x")
+    print("-------------------------------")
+
+
+def write_config_corpus(directory, device_count, interfaces_per_device=8):
+    """Writes device_count synthetic configs into directory as <hostname>.txt."""
+    for i in range(device_count):
+        hostname = f"R{i + 1}"
+        with open(os.path.join(directory, f"{hostname}.txt"), 'w') as f:
+            f.write(generate_config(hostname, interfaces_per_device, seed_octet=10 + i % 200))
+
+
+def benchmark_parallel_parsing(device_count=5000, worker_counts=(1, 2, 4, os.cpu_count())):
+    """
+    Times parse_directory over a corpus of small configs with different
+    process pool sizes and checks every run yields identical parsed_data.
+    """
+    print(f"\n--- Parallel Parsing Benchmark ({device_count} configs) ---")
+    with tempfile.TemporaryDirectory() as corpus_dir:
+        write_config_corpus(corpus_dir, device_count)
+        reference = None
+        for workers in sorted(set(worker_counts)):
+            parser = NetworkConfigParser(corpus_dir)
+            start = time.perf_counter()
+            parsed_data = parser.parse_directory(workers=workers)
+            elapsed = time.perf_counter() - start
+            if reference is None:
+                reference = parsed_data
+            elif parsed_data != reference or list(parsed_data) != list(reference):
+                print(f"❌ Parsed data with {workers} workers differs from the serial run.")
+            print(f"workers={workers:<3} {elapsed:8.3f}s  ({len(parsed_data)} devices)")
+    print("-------------------------------")
+
+
+def benchmark_parse_cache(device_count=5000):
+    """Compares a cold parse_directory run with a warm run served from the parse cache."""
+    print(f"\n--- Parse Cache Benchmark ({device_count} configs) ---")
+    with tempfile.TemporaryDirectory() as corpus_dir, tempfile.TemporaryDirectory() as cache_dir:
+        write_config_corpus(corpus_dir, device_count)
+        cache_path = os.path.join(cache_dir, 'parse_cache.json.gz')
+        for label in ('cold', 'warm'):
+            parser = NetworkConfigParser(corpus_dir, cache_path=cache_path)
+            start = time.perf_counter()
+            parser.parse_directory()
+            print(f"{label:<5} {time.perf_counter() - start:8.3f}s")
+        print(f"cache size: {os.path.getsize(cache_path) / 1024:.1f} KiB")
+    print("-------------------------------")
+
+
+def _measure_allocations(build):
+    """Returns (result, bytes still allocated by build())."""
+    tracemalloc.start()
+    result = build()
+    size, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return result, size
+
+
+def benchmark_interface_model(interface_count=200000, interfaces_per_device=48):
+    """
+    Compares the memory held by parsed_data (dicts of strings) with the same
+    interfaces stored in an InterfaceTable, scaled to 1M interfaces.
+    """
+    print(f"\n--- Interface Model Memory Benchmark ({interface_count} interfaces) ---")
+    parser = NetworkConfigParser('.')
+    device_count = interface_count // interfaces_per_device
+
+    def build_dicts():
+        network_data = {}
+        for i in range(device_count):
+            device = parser.parse_content(generate_config(f"R{i}", interfaces_per_device, seed_octet=10 + i % 200))
+            device['ospf'] = None  # Both representations share routing blocks; compare interfaces only
+            network_data[device['hostname']] = device
+        return network_data
+
+    network_data, dict_bytes = _measure_allocations(build_dicts)
+    table, table_bytes = _measure_allocations(lambda: InterfaceTable.from_network_data(network_data))
+    if table.to_network_data() != network_data:
+        print("❌ InterfaceTable export differs from the parsed data.")
+
+    scale = 1000000 / len(table)
+    print(f"dict of strings: {dict_bytes * scale / 2**20:8.1f} MiB per 1M interfaces")
+    print(f"InterfaceTable:  {table_bytes * scale / 2**20:8.1f} MiB per 1M interfaces")
+    print("-------------------------------")
+
+
+def generate_network_data(router_count, links_per_router=3, hosts_per_lan=4, seed=7):
+    """
+    Builds parsed_data for a synthetic network: routers joined by random
+    point-to-point /30 links, each router with a /24 LAN shared by a few PCs.
+    """
+    rng = random.Random(seed)
+    network_data = {}
+
+    def add_interface(device, if_name, ip, mask, bandwidth):
+        network_data.setdefault(device, {'hostname': device, 'interfaces': {}, 'ospf': None, 'bgp': None})
+        network_data[device]['interfaces'][if_name] = {'ip_address': ip, 'subnet_mask': mask, 'bandwidth': bandwidth}
+
+    link_id = 0
+    for r in range(router_count):
+        router = f"R{r}"
+        lan = f"{10 + r // 65536}.{(r // 256) % 256}.{r % 256}"
+        add_interface(router, "GigabitEthernet0/0", f"{lan}.1", "255.255.255.0", 1000000)
+        for h in range(hosts_per_lan):
+            add_interface(f"PC{r}_{h}", "FastEthernet0/0", f"{lan}.{10 + h}", "255.255.255.0", 100000)
+        for k in range(links_per_router):
+            peer = f"R{rng.randrange(router_count)}"
+            base = link_id * 4
+            subnet = f"100.{(base >> 16) & 255}.{(base >> 8) & 255}"
+            add_interface(router, f"GigabitEthernet1/{k}", f"{subnet}.{(base & 255) + 1}", "255.255.255.252", 10000000)
+            add_interface(peer, f"GigabitEthernet2/{link_id}", f"{subnet}.{(base & 255) + 2}", "255.255.255.252", 10000000)
+            link_id += 1
+    return network_data
+
+
+def _pairwise_link_discovery(network_data):
+    """The original O(n^2) link discovery, used as a reference for correctness."""
+    builder = TopologyBuilder(network_data)
+    graph = builder.graph
+    for device_name in network_data:
+        device_type = builder._get_device_type(device_name)
+        graph.add_node(device_name, type=device_type, title=f"{device_type}: {device_name}")
+    all_interfaces = [
+        {'device': d, 'interface_name': n, 'ip': i['ip_address'], 'mask': i['subnet_mask'], 'bandwidth': i.get('bandwidth')}
+        for d, data in network_data.items() for n, i in data['interfaces'].items() if 'ip_address' in i
+    ]
+    for i in range(len(all_interfaces)):
+        for j in range(i + 1, len(all_interfaces)):
+            if1, if2 = all_interfaces[i], all_interfaces[j]
+            net1 = ipaddress.IPv4Interface(f"{if1['ip']}/{if1['mask']}").network
+            net2 = ipaddress.IPv4Interface(f"{if2['ip']}/{if2['mask']}").network
+            if net1 == net2 and if1['device'] != if2['device']:
+                graph.add_edge(if1['device'], if2['device'],
+                               title=f"Link between {if1['device']} ({if1['interface_name']}) and {if2['device']} ({if2['interface_name']})",
+                               bandwidth=if1.get('bandwidth', 'N/A'))
+    return graph
+
+
+def benchmark_link_discovery(router_counts=(2000, 10000, 40000), reference_routers=150):
+    """
+    Times TopologyBuilder.build_graph on synthetic networks and checks it
+    matches the original pairwise scan (nodes, edges, attributes and order).
+    """
+    print("\n--- Link Discovery Benchmark ---")
+    network_data = generate_network_data(reference_routers)
+    expected = _pairwise_link_discovery(network_data)
+    graph = TopologyBuilder(network_data).build_graph()
+    same = (list(graph.nodes(data=True)) == list(expected.nodes(data=True))
+            and list(graph.edges(data=True)) == list(expected.edges(data=True)))
+    print(f"{'✅' if same else '❌'} Matches the pairwise scan on {len(network_data)} devices")
+
+    print(f"{'interfaces':>10} {'links':>8} {'build_graph (s)':>16}")
+    for router_count in router_counts:
+        network_data = generate_network_data(router_count)
+        interface_count = sum(len(d['interfaces']) for d in network_data.values())
+        start = time.perf_counter()
+        graph = TopologyBuilder(network_data).build_graph()
+        elapsed = time.perf_counter() - start
+        print(f"{interface_count:>10} {graph.number_of_edges():>8} {elapsed:>16.3f}")
+    print("-------------------------------")
+
+
+def benchmark_address_engine(count=1000000, seed=3):
+    """
+    Compares computing network keys with one ipaddress object per interface
+    against the vectorized AddressArrays engine.
+    """
+    print(f"\n--- Address Engine Benchmark ({count} addresses) ---")
+    if not numpy_available():
+        print("NumPy is not installed; skipping.")
+        return
+    rng = random.Random(seed)
+    ips = [f"10.{rng.randrange(256)}.{rng.randrange(256)}.{rng.randrange(1, 255)}" for _ in range(count)]
+    masks = [rng.choice(("255.255.255.0", "255.255.255.252", "255.255.0.0")) for _ in range(count)]
+
+    sample = 50000
+    start = time.perf_counter()
+    expected = [ipaddress.IPv4Interface(f"{ip}/{mask}").network for ip, mask in zip(ips[:sample], masks[:sample])]
+    scalar_time = (time.perf_counter() - start) * count / sample
+
+    start = time.perf_counter()
+    arrays = AddressArrays.from_strings(ips, masks)
+    order, starts = arrays.group_by_subnet()
+    vector_time = time.perf_counter() - start
+
+    same = all(arrays.subnet_key_tuple(row) == (int(net.network_address), net.prefixlen)
+               for row, net in enumerate(expected))
+    print(f"{'✅' if same else '❌'} Network keys match ipaddress on a {sample}-address sample")
+    print(f"ipaddress objects:  {scalar_time:8.3f}s (extrapolated)")
+    print(f"AddressArrays:      {vector_time:8.3f}s (parse, keys and {len(starts) - 1} subnet groups)")
+    print("-------------------------------")
+
+
+def benchmark_incremental_topology(router_count=20000, updates=200, seed=11):
+    """Compares a full build_graph with patching the graph one device at a time."""
+    print(f"\n--- Incremental Topology Benchmark ({router_count} routers) ---")
+    network_data = generate_network_data(router_count)
+    builder = TopologyBuilder(network_data)
+    start = time.perf_counter()
+    builder.build_graph()
+    full_time = time.perf_counter() - start
+
+    rng = random.Random(seed)
+    names = [name for name in network_data if name.startswith('R')]
+    start = time.perf_counter()
+    changed_edges = 0
+    for _ in range(updates):
+        device = network_data[rng.choice(names)]
+        added, removed = builder.update_device(device)
+        changed_edges += len(added) + len(removed)
+    update_time = (time.perf_counter() - start) / updates
+
+    print(f"full build_graph:     {full_time * 1000:10.1f} ms")
+    print(f"update_device (avg):  {update_time * 1000:10.3f} ms  ({changed_edges} edges changed)")
+    print("-------------------------------")
+
+
+def benchmark_prefix_trie(prefix_count=1000000, query_count=100000, seed=5):
+    """
+    Bulk-loads a PrefixTrie with random prefixes and times longest-prefix
+    match and covering queries, checking a sample against a linear scan.
+    """
+    print(f"\n--- Prefix Trie Benchmark ({prefix_count} prefixes) ---")
+    rng = random.Random(seed)
+    lengths = (8, 16, 20, 22, 24, 24, 24, 28, 30, 30, 32)
+    entries = [(rng.getrandbits(32), rng.choice(lengths), i) for i in range(prefix_count)]
+
+    start = time.perf_counter()
+    trie = PrefixTrie.bulk_load(entries)
+    load_time = time.perf_counter() - start
+
+    queries = [rng.getrandbits(32) for _ in range(query_count)]
+    start = time.perf_counter()
+    matches = [trie.longest_match(address) for address in queries]
+    lpm_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    for address in queries:
+        trie.covering(address, 32)
+    covering_time = time.perf_counter() - start
+
+    prefixes = {(network & prefix_to_mask(length), length) for network, length, _ in entries}
+    sample_ok = True
+    for address, match in list(zip(queries, matches))[:20]:
+        candidates = [p for p in prefixes if address & prefix_to_mask(p[1]) == p[0]]
+        expected = max(candidates, key=lambda p: p[1]) if candidates else None
+        sample_ok &= (match[:2] if match else None) == expected
+    print(f"{'✅' if sample_ok else '❌'} Longest-prefix matches agree with a linear scan on a sample")
+    print(f"bulk load:           {load_time:8.3f}s  ({len(trie.node_key)} nodes)")
+    print(f"longest match:       {lpm_time / query_count * 1e6:8.2f} µs/query")
+    print(f"covering prefixes:   {covering_time / query_count * 1e6:8.2f} µs/query")
+    print("-------------------------------")
+
+
+def benchmark_static_layout(router_count=1000):
+    """Times the offline layout for a large-graph view, cold and from the layout cache."""
+    print(f"\n--- Static Layout Benchmark ({router_count} routers) ---")
+    builder = TopologyBuilder(generate_network_data(router_count))
+    graph = builder.build_graph()
+    with tempfile.TemporaryDirectory() as cache_dir:
+        start = time.perf_counter()
+        cold = builder.compute_layout(cache_dir=cache_dir)
+        cold_time = time.perf_counter() - start
+        start = time.perf_counter()
+        warm = builder.compute_layout(cache_dir=cache_dir)
+        warm_time = time.perf_counter() - start
+    print(f"{'✅' if cold == warm else '❌'} Cached layout matches the computed one")
+    print(f"{graph.number_of_nodes()} nodes, {graph.number_of_edges()} links")
+    print(f"cold layout:   {cold_time:8.3f}s")
+    print(f"cached layout: {warm_time:8.3f}s")
+    print("-------------------------------")
+
+
+def benchmark_graph_snapshot(router_count=20000):
+    """Compares rebuilding the topology with reopening it from a binary snapshot."""
+    print(f"\n--- Graph Snapshot Benchmark ({router_count} routers) ---")
+    builder = TopologyBuilder(generate_network_data(router_count))
+    start = time.perf_counter()
+    graph = builder.build_graph()
+    build_time = time.perf_counter() - start
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        path = os.path.join(tmp_dir, 'topology.snap')
+        start = time.perf_counter()
+        GraphSnapshot.write(graph, path)
+        save_time = time.perf_counter() - start
+
+        start = time.perf_counter()
+        snapshot = load_snapshot(path)
+        open_time = time.perf_counter() - start
+        names = random.Random(3).sample(list(graph.nodes), 10000)
+        start = time.perf_counter()
+        views_match = all(snapshot.neighbor_names(name) == list(graph.adj[name]) for name in names)
+        query_time = time.perf_counter() - start
+        start = time.perf_counter()
+        restored = snapshot.to_networkx()
+        restore_time = time.perf_counter() - start
+        size = os.path.getsize(path)
+        snapshot.close()
+
+    same = (list(graph.nodes(data=True)) == list(restored.nodes(data=True))
+            and list(graph.edges(data=True)) == list(restored.edges(data=True)))
+    print(f"{'✅' if same else '❌'} Restored graph matches the original")
+    print(f"{'✅' if views_match else '❌'} Neighbor queries on the mapped views match the original")
+    print(f"{graph.number_of_nodes()} nodes, {graph.number_of_edges()} links, {size / 2**20:.1f} MiB")
+    print(f"build_graph:        {build_time:8.3f}s")
+    print(f"write snapshot:     {save_time:8.3f}s")
+    print(f"open snapshot:      {open_time * 1000:8.3f} ms")
+    print(f"neighbor queries:   {query_time * 1000:8.3f} ms (10,000 names on the views, incl. name index)")
+    print(f"to_networkx:        {restore_time:8.3f}s")
+    print("-------------------------------")
+
+
+def benchmark_address_checks(router_count=50000, overlaps=1000, seed=13):
+    """Times the duplicate-IP check, the prefix index and the overlapping-subnet check on a large synthetic network."""
+    print(f"\n--- Address Checks Benchmark ({router_count} routers) ---")
+    network_data = generate_network_data(router_count)
+    rng = random.Random(seed)
+    names = list(network_data)
+    for _ in range(overlaps):
+        # Widen the mask on one end of a random link or LAN to create an overlap
+        interfaces = network_data[rng.choice(names)]['interfaces']
+        interfaces[rng.choice(list(interfaces))]['subnet_mask'] = '255.255.254.0'
+    validator = NetworkValidator(network_data)
+    row_count = sum(len(addresses) for addresses in validator.device_addresses.values())
+
+    start = time.perf_counter()
+    duplicates = validator._check_duplicate_ips()
+    duplicate_time = time.perf_counter() - start
+    start = time.perf_counter()
+    index = validator._prefix_index()
+    index_time = time.perf_counter() - start
+    start = time.perf_counter()
+    overlapping = validator._check_overlapping_subnets()
+    overlap_time = time.perf_counter() - start
+
+    print(f"{row_count} interfaces")
+    print(f"duplicate IPs:       {duplicate_time:8.3f}s  ({len(duplicates)} found)")
+    print(f"prefix index:        {index_time:8.3f}s  ({len(index.trie)} subnets)")
+    print(f"overlapping subnets: {overlap_time:8.3f}s  ({len(overlapping)} found)")
+    print("-------------------------------")
+
+
+def benchmark_critical_links(router_count=20000, queries=200, seed=17):
+    """Times the bridge/block decomposition and alternate-path queries on a large topology."""
+    print(f"\n--- Critical Link Benchmark ({router_count} routers) ---")
+    graph = TopologyBuilder(generate_network_data(router_count)).build_graph()
+    analyzer = CriticalLinkAnalyzer(graph)
+    start = time.perf_counter()
+    analyzer.analyze()
+    analyze_time = time.perf_counter() - start
+
+    rng = random.Random(seed)
+    links = rng.sample(list(graph.edges), queries)
+    start = time.perf_counter()
+    routes = sum(len(analyzer.alternate_paths(u, v)) for u, v in links)
+    query_time = (time.perf_counter() - start) / queries
+
+    print(f"{graph.number_of_nodes()} nodes, {graph.number_of_edges()} links")
+    print(f"decomposition:     {analyze_time:8.3f}s  ({len(analyzer.bridges)} bridges, "
+          f"{len(analyzer.articulation_points)} articulation points, {len(analyzer.blocks)} blocks)")
+    print(f"alternate paths:   {query_time * 1000:8.3f} ms/link  ({routes} routes for {queries} links)")
+    print("-------------------------------")
+
+
+def benchmark_loop_report(router_count=20000):
+    """Compares the full cycle-basis loop listing with the per-component summary."""
+    print(f"\n--- Loop Report Benchmark ({router_count} routers) ---")
+    graph = TopologyBuilder(generate_network_data(router_count)).build_graph()
+    validator = NetworkValidator({}, graph)
+    start = time.perf_counter()
+    full = validator._check_network_loops(summarize=False)
+    full_time = time.perf_counter() - start
+    start = time.perf_counter()
+    summary = validator._check_network_loops(summarize=True)
+    summary_time = time.perf_counter() - start
+    print(f"cycle basis:  {full_time:8.3f}s  ({len(full)} issues, {sum(map(len, full)) / 2**20:.1f} MiB of text)")
+    print(f"summary:      {summary_time:8.3f}s  ({len(summary)} issues)")
+    print("-------------------------------")
+
+
+def benchmark_link_loads(router_count=1000, hosts_per_lan=20):
+    """Times routing the uniform PC traffic matrix over a large topology, with and without ECMP."""
+    print(f"\n--- Link Load Benchmark ({router_count} routers, {router_count * hosts_per_lan} PCs) ---")
+    graph = TopologyBuilder(generate_network_data(router_count, hosts_per_lan=hosts_per_lan)).build_graph()
+    print(f"{graph.number_of_nodes()} nodes, {graph.number_of_edges()} links")
+    for ecmp in (True, False):
+        start = time.perf_counter()
+        model = LinkLoadModel(graph, ecmp=ecmp)
+        loads = model.uniform_loads(50000)
+        elapsed = time.perf_counter() - start
+        busiest = max(loads.values(), default=0.0)
+        label = 'ECMP:' if ecmp else 'single path:'
+        print(f"{label:<14}{elapsed:8.3f}s  ({len(loads)} loaded link directions, busiest {busiest / 1e6:.1f} Mbps)")
+    print("-------------------------------")
+
+
+def benchmark_check_scheduler(router_count=2000, workers=(1, 4)):
+    """Times run_all_checks with each executor and reports the slowest checks."""
+    print(f"\n--- Check Scheduler Benchmark ({router_count} routers) ---")
+    network_data = generate_network_data(router_count)
+    graph = TopologyBuilder(network_data).build_graph()
+    for executor in ('serial', 'thread', 'process'):
+        for worker_count in (workers if executor != 'serial' else (1,)):
+            start = time.perf_counter()
+            NetworkValidator(network_data, graph).run_all_checks(executor=executor, max_workers=worker_count)
+            print(f"{executor + ' x' + str(worker_count) + ':':<14}{time.perf_counter() - start:8.3f}s")
+    validator = NetworkValidator(network_data, graph)
+    validator.run_all_checks(executor='serial', profile=True)
+    stats = validator.check_stats
+    for name, stat in sorted(stats.items(), key=lambda item: -item[1]['wall_time'])[:3]:
+        print(f"  {name}: {stat['wall_time']:.3f}s, peak {stat['peak_memory'] / 2**20:.1f} MiB (traced)")
+    print("-------------------------------")
+
+
+def benchmark_config_checks(router_count=10000, hosts_per_lan=4):
+    """
+    Times the VLAN, gateway, MTU and missing-component checks (with the
+    indexes they share) against parsing the same number of configs.
+    """
+    network_data = generate_network_data(router_count, hosts_per_lan=hosts_per_lan)
+    for r in range(router_count):
+        lan = f"{10 + r // 65536}.{(r // 256) % 256}.{r % 256}"
+        for h in range(hosts_per_lan):
+            network_data[f"PC{r}_{h}"]['default_gateway'] = f"{lan}.1"
+    print(f"\n--- Config Checks Benchmark ({len(network_data)} devices) ---")
+
+    parser = NetworkConfigParser('.')
+    configs = [generate_config(f"D{i}", 4, seed_octet=10 + i % 200) for i in range(len(network_data))]
+    start = time.perf_counter()
+    for content in configs:
+        parser.parse_content(content)
+    parse_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    results = NetworkValidator(network_data).run_all_checks(
+        names=['missing_components', 'vlan_issues', 'gateway_issues', 'mtu_mismatches'],
+        executor='serial')
+    check_time = time.perf_counter() - start
+    print(f"parse pass:   {parse_time:8.3f}s")
+    print(f"four checks:  {check_time:8.3f}s  ({check_time / parse_time:.2f}x the parse pass, "
+          f"{sum(len(issues) for issues in results.values())} issues)")
+    print("-------------------------------")
+
+
+def benchmark_revalidation(router_count=10000, updates=50, seed=19):
+    """
+    Compares rerunning the local checks in full with revalidating after one
+    device's config changes. The graph-wide checks are left out of both.
+    """
+    network_data = generate_network_data(router_count)
+    print(f"\n--- Revalidation Benchmark ({len(network_data)} devices) ---")
+    builder = TopologyBuilder(network_data)
+    validator = NetworkValidator(network_data, builder.build_graph())
+    local_checks = ['duplicate_ips', 'overlapping_subnets', 'missing_components',
+                    'vlan_issues', 'gateway_issues', 'mtu_mismatches']
+    start = time.perf_counter()
+    validator.run_all_checks(names=local_checks, executor='serial')
+    full_time = time.perf_counter() - start
+    start = time.perf_counter()
+    validator.revalidate(graph_checks=False)
+    baseline_time = time.perf_counter() - start
+
+    rng = random.Random(seed)
+    names = list(network_data)
+    update_time = 0.0
+    for _ in range(updates):
+        device = dict(network_data[rng.choice(names)])
+        interfaces = {if_name: dict(if_data) for if_name, if_data in device['interfaces'].items()}
+        if_data = interfaces[rng.choice(list(interfaces))]
+        if_data['mtu'] = rng.choice([1500, 9000])
+        device['interfaces'] = interfaces
+        start = time.perf_counter()
+        validator.add_device(device)
+        added, removed = builder.update_device(device)
+        validator.revalidate(changed_edges=added | removed, graph_checks=False)
+        update_time += time.perf_counter() - start
+
+    print(f"local checks (full):        {full_time * 1000:10.1f} ms")
+    print(f"first revalidate (build):   {baseline_time * 1000:10.1f} ms")
+    print(f"one-device change (avg):    {update_time / updates * 1000:10.3f} ms  "
+          f"({len(validator.results['mtu_mismatches'])} MTU mismatches after {updates} changes)")
+    print("-------------------------------")
+    benchmark_graph_revalidation(seed=seed)
+
+
+def _recommended_links(recommendations):
+    """The (sorted) links named by load-balancing recommendations, with whether each has alternate routes."""
+    links = set()
+    for recommendation in recommendations:
+        words = recommendation.split()
+        has_routes = recommendation.startswith('For ')
+        link = words[4].rstrip(',') if has_routes else words[1]
+        links.add((tuple(sorted(link.split('-'))), has_routes))
+    return links
+
+
+def benchmark_graph_revalidation(router_count=1000, updates=30, wan_kbps=256, seed=19):
+    """
+    Compares rerunning the graph-wide checks (loops, link loads and
+    load-balancing recommendations) with revalidating them after a link
+    between two routers changes bandwidth, goes away or is added. WAN links
+    are slowed to wan_kbps so that some of them are heavily utilized.
+    """
+    network_data = generate_network_data(router_count)
+    for device in network_data.values():
+        for if_name, if_data in device['interfaces'].items():
+            if if_name.startswith(('GigabitEthernet1/', 'GigabitEthernet2/')):
+                if_data['bandwidth'] = wan_kbps
+    print(f"\n--- Graph Revalidation Benchmark ({len(network_data)} devices) ---")
+    builder = TopologyBuilder(network_data)
+    validator = NetworkValidator(network_data, builder.build_graph())
+    graph_checks = ['network_loops', 'load_analysis', 'load_balancing_recommendations']
+    start = time.perf_counter()
+    validator.run_all_checks(names=graph_checks, executor='serial')
+    full_time = time.perf_counter() - start
+    start = time.perf_counter()
+    validator.revalidate()
+    baseline_time = time.perf_counter() - start
+
+    rng = random.Random(seed)
+    routers = [name for name in network_data if name.startswith('R')]
+    update_time = 0.0
+    changed_links = 0
+    for update in range(updates):
+        kind = update % 3
+        changed = []
+        if kind == 2:
+            # A new WAN link between two routers, in a subnet nothing else uses
+            subnet = f"172.{16 + update // 64}.{(update % 64) * 4}"
+            for host, router in enumerate(rng.sample(routers, 2), start=1):
+                device = dict(network_data[router])
+                device['interfaces'] = dict(device['interfaces'])
+                device['interfaces'][f"Serial0/{update}"] = {'ip_address': f"{subnet}.{host}",
+                                                             'subnet_mask': '255.255.255.252', 'bandwidth': wan_kbps}
+                changed.append(device)
+        else:
+            device = dict(network_data[rng.choice(routers)])
+            interfaces = {if_name: dict(if_data) for if_name, if_data in device['interfaces'].items()}
+            if_name = rng.choice([if_name for if_name in interfaces if if_name != "GigabitEthernet0/0"])
+            if kind == 0:
+                interfaces[if_name]['bandwidth'] = rng.choice([64, wan_kbps, 1000])
+            else:
+                interfaces[if_name]['ip_address'] = f"198.18.{update}.1"  # Into a subnet of its own: the link goes away
+            device['interfaces'] = interfaces
+            changed.append(device)
+
+        start = time.perf_counter()
+        edges = set()
+        for device in changed:
+            network_data[device['hostname']] = device
+            validator.add_device(device)
+            added, removed = builder.update_device(device)
+            edges |= added | removed
+        validator.revalidate(changed_edges=edges)
+        update_time += time.perf_counter() - start
+        changed_links += len(edges)
+
+    reference = NetworkValidator(network_data, builder.graph)
+    reference.run_all_checks(names=graph_checks, executor='serial')
+    results = validator.results
+    same = (sorted((entry['link'], entry['utilization']) for entry in results['load_analysis']) ==
+            sorted((entry['link'], entry['utilization']) for entry in reference.results['load_analysis'])
+            and _recommended_links(results['load_balancing_recommendations']) ==
+            _recommended_links(reference.results['load_balancing_recommendations'])
+            and len(results['network_loops']) == len(reference.results['network_loops']))
+
+    print(f"graph checks (full):        {full_time * 1000:10.1f} ms")
+    print(f"first revalidate (build):   {baseline_time * 1000:10.1f} ms")
+    print(f"one-link change (avg):      {update_time / updates * 1000:10.3f} ms  "
+          f"({changed_links} links changed, {len(results['load_analysis'])} heavily utilized links after {updates} changes)")
+    print(f"{'✅' if same else '❌'} Heavy links, recommendations and loop count match a full run")
+    print("-------------------------------")
+
+
+BENCHMARKS = {
+    'parser': benchmark_parser_engines,
+    'parallel': benchmark_parallel_parsing,
+    'cache': benchmark_parse_cache,
+    'model': benchmark_interface_model,
+    'topology': benchmark_link_discovery,
+    'addresses': benchmark_address_engine,
+    'incremental': benchmark_incremental_topology,
+    'prefixes': benchmark_prefix_trie,
+    'layout': benchmark_static_layout,
+    'snapshot': benchmark_graph_snapshot,
+    'addresschecks': benchmark_address_checks,
+    'critical': benchmark_critical_links,
+    'loops': benchmark_loop_report,
+    'linkloads': benchmark_link_loads,
+    'scheduler': benchmark_check_scheduler,
+    'configchecks': benchmark_config_checks,
+    'revalidation': benchmark_revalidation,
+}
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(description="Performance benchmarks for the network analysis tool.")
+    arg_parser.add_argument('names', nargs='*', help=f"Benchmarks to run: {', '.join(BENCHMARKS)} (default: all)")
+    args = arg_parser.parse_args()
+
+    unknown = [name for name in args.names if name not in BENCHMARKS]
+    if unknown:
+        arg_parser.error(f"Unknown benchmark(s): {', '.join(unknown)}")
+
+    for name in args.names or BENCHMARKS:
+        BENCHMARKS[name]()
+
+
+if __name__ == "__main__":
+    main()
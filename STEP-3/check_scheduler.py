@@ -0,0 +1,202 @@
+# src/check_scheduler.py
+
+import os
+import pickle
+import time
+import tracemalloc
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, ThreadPoolExecutor, wait
+
+EXECUTORS = ('serial', 'thread', 'process')
+
+
+class _Task:
+    """A registered check or shared index: func(context) plus the task names it waits for."""
+    def __init__(self, name, func, kind, requires=(), uses=()):
+        self.name = name
+        self.func = func
+        self.kind = kind          # 'check' or 'index'
+        self.requires = tuple(requires)
+        self.uses = tuple(uses)
+
+    @property
+    def dependencies(self):
+        return self.requires + self.uses
+
+
+def _run_task(func, context, profile):
+    """
+    Runs func(context) and returns (result, wall time, peak memory). Peak
+    memory is the tracemalloc peak above the memory traced at the start, or
+    None without profiling. In a process pool the context arrives pickled.
+    """
+    if isinstance(context, bytes):
+        context = pickle.loads(context)
+    peak = None
+    if profile:
+        if not tracemalloc.is_tracing():
+            tracemalloc.start()
+        baseline = tracemalloc.get_traced_memory()[0]
+        tracemalloc.reset_peak()
+    start = time.perf_counter()
+    result = func(context)
+    wall_time = time.perf_counter() - start
+    if profile:
+        peak = max(0, tracemalloc.get_traced_memory()[1] - baseline)
+    return result, wall_time, peak
+
+
+class CheckScheduler:
+    """
+    Runs validation checks as a dependency graph.
+
+    A check is func(context) returning its result, which is also stored in
+    context.results. It names the checks whose results it reads (requires)
+    and the shared indexes it reads (uses). An index is func(context) that
+    builds a cache on the context once, before any check that uses it
+    starts, so concurrent checks never build it twice. Each task starts as
+    soon as its dependencies finish, on a thread or process pool, and its
+    wall time (and, with profiling, peak traced memory) is recorded.
+
+    Executors:
+    - 'serial' runs tasks one at a time in registration order.
+    - 'thread' shares the context without copying. NumPy, SciPy and I/O
+      release the GIL; pure-Python checks still interleave. tracemalloc is
+      process-wide, so with profiling the tasks run serially instead.
+    - 'process' gives exact per-check figures and full parallelism. The
+      context is pickled once for every set of finished results, and each
+      check's result is sent back. Indexes are built in the parent, so
+      workers receive them already built.
+    """
+    def __init__(self):
+        self.tasks = {}  # Name -> _Task, in registration order
+
+    def register_check(self, name, func, requires=(), uses=()):
+        self._register(_Task(name, func, 'check', requires, uses))
+
+    def register_index(self, name, func, uses=()):
+        self._register(_Task(name, func, 'index', uses=uses))
+
+    def _register(self, task):
+        if task.name in self.tasks:
+            raise ValueError(f"A check or index named '{task.name}' is already registered.")
+        self.tasks[task.name] = task
+
+    @property
+    def check_names(self):
+        return [name for name, task in self.tasks.items() if task.kind == 'check']
+
+    def plan(self, names=None):
+        """
+        Returns the tasks needed to run the named checks (default: all), in a
+        dependency-respecting order. Raises ValueError for unknown names and
+        for dependency cycles.
+        """
+        wanted = self.check_names if names is None else list(names)
+        order, state = [], {}
+
+        def visit(name, path):
+            task = self.tasks.get(name)
+            if task is None:
+                raise ValueError(f"Unknown check or index '{name}'. Choose one of: {', '.join(self.tasks)}")
+            if state.get(name) == 'done':
+                return
+            if state.get(name) == 'visiting':
+                raise ValueError(f"Check dependency cycle: {' -> '.join(path + [name])}")
+            state[name] = 'visiting'
+            for dependency in task.dependencies:
+                visit(dependency, path + [name])
+            state[name] = 'done'
+            order.append(task)
+
+        for name in wanted:
+            visit(name, [])
+        return order
+
+    def run(self, context, names=None, executor='thread', max_workers=None, profile=False):
+        """
+        Runs the named checks (default: all) and their dependencies on
+        context. Returns (results, stats): results maps each check to its
+        result in registration order, and stats maps every task run to
+        {'wall_time': seconds, 'peak_memory': bytes or None}, in plan order.
+        profile=True also traces memory, which slows allocation-heavy checks
+        several times over; otherwise peak_memory is None. The first exception
+        raised by a task is re-raised once running tasks finish.
+        """
+        if executor not in EXECUTORS:
+            raise ValueError(f"Unknown executor '{executor}'. Choose one of: {', '.join(EXECUTORS)}")
+        order = self.plan(names)
+        if profile and executor == 'thread':
+            executor = 'serial'  # Overlapping threads would reset each other's tracemalloc peak
+        outputs, stats = {}, {}
+
+        def record(task, outcome):
+            result, wall_time, peak = outcome
+            outputs[task.name] = result
+            stats[task.name] = {'wall_time': wall_time, 'peak_memory': peak}
+            if task.kind == 'check':
+                context.results[task.name] = result  # Visible to checks that require it
+
+        started_tracing = profile and not tracemalloc.is_tracing()
+        if started_tracing:
+            tracemalloc.start()
+        try:
+            if executor == 'serial':
+                for task in order:
+                    record(task, _run_task(task.func, context, profile))
+            else:
+                self._run_pooled(order, context, executor, max_workers, profile, record)
+        finally:
+            if started_tracing:
+                tracemalloc.stop()
+
+        results = {task.name: outputs[task.name] for task in self.tasks.values()
+                   if task.kind == 'check' and task.name in outputs}
+        return results, {task.name: stats[task.name] for task in order}
+
+    def _run_pooled(self, order, context, executor, max_workers, profile, record):
+        workers = max_workers or os.cpu_count() or 1
+        pool = ProcessPoolExecutor(workers) if executor == 'process' else ThreadPoolExecutor(workers)
+        # Index builds mutate the context, so in process mode they stay in
+        # this process, where every later pickle of the context includes them
+        local_pool = ThreadPoolExecutor(1) if executor == 'process' else pool
+        waiting = {task.name: set(task.dependencies) for task in order}
+        tasks = {task.name: task for task in order}
+        running = {}
+        payload = None
+        error = None
+        try:
+            while waiting or running:
+                if error is None:
+                    for task in order:
+                        if task.name not in waiting or waiting[task.name]:
+                            continue
+                        if executor == 'process' and task.kind == 'check':
+                            if any(tasks[name].kind == 'index' for name in running.values()):
+                                continue  # Never pickle the context while an index is being built
+                            if payload is None:
+                                payload = pickle.dumps(context)
+                            future = pool.submit(_run_task, task.func, payload, profile)
+                        else:
+                            future = local_pool.submit(_run_task, task.func, context, profile)
+                        del waiting[task.name]
+                        running[future] = task.name
+                if not running:
+                    break
+                finished, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in finished:
+                    name = running.pop(future)
+                    try:
+                        outcome = future.result()
+                    except Exception as e:
+                        error = error or e
+                        continue
+                    record(tasks[name], outcome)
+                    payload = None
+                    for dependencies in waiting.values():
+                        dependencies.discard(name)
+        finally:
+            pool.shutdown(wait=True)
+            if local_pool is not pool:
+                local_pool.shutdown(wait=True)
+        if error is not None:
+            raise error
@@ -0,0 +1,183 @@
+# src/config_archive.py
+
+import io
+import mmap
+import os
+import struct
+import tarfile
+import zipfile
+
+# Offsets into a zip local file header (see the PKWARE APPNOTE, section 4.3.7)
+ZIP_LOCAL_HEADER_SIZE = 30
+ZIP_LOCAL_HEADER_FORMAT = '<26xHH'
+
+# Errors that can surface while a member is being read or decoded
+ARCHIVE_READ_ERRORS = (OSError, KeyError, ValueError, EOFError, zipfile.BadZipFile, tarfile.TarError)
+
+
+class ConfigArchive:
+    """
+    Read-only access to configuration files stored inside a zip or tar(.gz,
+    .bz2, .xz) archive, without extracting them to disk.
+
+    Members that are stored uncompressed (zip 'stored' entries and plain .tar
+    archives) are read straight from a memory map of the archive. Compressed
+    zip members are decompressed as a stream. Compressed tar archives can only
+    be read front to back, so they are scanned in a single sequential pass.
+    """
+    def __init__(self, archive_path):
+        self.archive_path = archive_path
+        self._file = None
+        self._mmap = None
+        self._zip = None
+        self._tar = None
+        self._members = {}  # member name -> ZipInfo / TarInfo
+
+    @staticmethod
+    def is_archive(path):
+        """Returns True if path is a zip or tar file this class can read."""
+        if not os.path.isfile(path):
+            return False
+        return zipfile.is_zipfile(path) or tarfile.is_tarfile(path)
+
+    def __enter__(self):
+        self.open()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+    def open(self):
+        self._file = open(self.archive_path, 'rb')
+        if zipfile.is_zipfile(self._file):
+            self._zip = zipfile.ZipFile(self._file)
+            for info in self._zip.infolist():
+                if not info.is_dir():
+                    self._members[info.filename] = info
+        else:
+            self._file.seek(0)
+            self._tar = tarfile.open(fileobj=self._file, mode='r:*')
+            # getmembers() on a compressed tar decompresses the whole archive,
+            # so its members are only read during the sequential pass
+            if self.is_seekable_tar:
+                for member in self._tar.getmembers():
+                    if member.isfile():
+                        self._members[member.name] = member
+
+        if os.path.getsize(self.archive_path) > 0:
+            self._mmap = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+
+    def close(self):
+        for handle in (self._zip, self._tar, self._mmap, self._file):
+            if handle is not None:
+                handle.close()
+        self._zip = self._tar = self._mmap = self._file = None
+        self._members = {}
+
+    @property
+    def is_seekable_tar(self):
+        """True for an uncompressed tar, whose members can be read in any order."""
+        return self._tar is not None and self._tar.fileobj is self._file
+
+    @property
+    def supports_random_access(self):
+        return self._zip is not None or self.is_seekable_tar
+
+    def list_members(self, suffix='.txt'):
+        """Returns the sorted names of regular members ending with suffix."""
+        if self.supports_random_access:
+            return sorted(name for name in self._members if name.endswith(suffix))
+
+        names = []
+        for member in self._tar:
+            if member.isfile() and member.name.endswith(suffix):
+                names.append(member.name)
+        self._rewind_tar()
+        return sorted(names)
+
+    def member_size(self, name):
+        member = self._members.get(name)
+        if member is None:
+            return 0
+        return member.file_size if self._zip is not None else member.size
+
+    def iter_members(self, names, encoding='utf-8'):
+        """
+        Yields (name, text_stream, error) for each requested member, in the
+        order given. text_stream is a readable, line-iterable text file
+        object, valid until the next member is requested; error is set
+        instead if the member could not be opened.
+        """
+        if not self.supports_random_access:
+            yield from self._iter_sequential_tar(names, encoding)
+            return
+
+        for name in names:
+            try:
+                stream = self._open_member(name, encoding)
+            except ARCHIVE_READ_ERRORS as e:
+                yield name, None, str(e)
+                continue
+            try:
+                yield name, stream, None
+            finally:
+                stream.close()
+
+    def _open_member(self, name, encoding):
+        view = self._mapped_member(name)
+        if view is not None:
+            # Uncompressed member: decode straight from the memory map
+            with view:
+                return io.StringIO(str(view, encoding), newline=None)
+        return io.TextIOWrapper(self._zip.open(self._members[name]), encoding=encoding)
+
+    def _mapped_member(self, name):
+        """Returns a memoryview over an uncompressed member's bytes, or None."""
+        if self._mmap is None:
+            return None
+        member = self._members[name]
+
+        if self._zip is not None:
+            if member.compress_type != zipfile.ZIP_STORED or member.flag_bits & 0x1:
+                return None  # Compressed or encrypted
+            header = self._mmap[member.header_offset:member.header_offset + ZIP_LOCAL_HEADER_SIZE]
+            name_length, extra_length = struct.unpack(ZIP_LOCAL_HEADER_FORMAT, header)
+            start = member.header_offset + ZIP_LOCAL_HEADER_SIZE + name_length + extra_length
+            return memoryview(self._mmap)[start:start + member.file_size]
+
+        if member.issparse():
+            return None
+        return memoryview(self._mmap)[member.offset_data:member.offset_data + member.size]
+
+    def _iter_sequential_tar(self, names, encoding):
+        """
+        Reads the requested members of a compressed tar in one pass and yields
+        them in the requested order. Only the decoded text of members that are
+        still waiting for their turn is kept in memory.
+        """
+        order = {name: position for position, name in enumerate(names)}
+        waiting = {}
+        next_position = 0
+
+        for member in self._tar:
+            if member.name not in order or not member.isfile():
+                continue
+            try:
+                data = self._tar.extractfile(member).read()
+                waiting[order[member.name]] = (member.name, io.StringIO(data.decode(encoding), newline=None), None)
+            except ARCHIVE_READ_ERRORS as e:
+                waiting[order[member.name]] = (member.name, None, str(e))
+
+            while next_position in waiting:
+                yield waiting.pop(next_position)
+                next_position += 1
+
+        self._rewind_tar()
+        for position in range(next_position, len(names)):
+            yield waiting.pop(position, (names[position], None, "Member not found in archive"))
+
+    def _rewind_tar(self):
+        """Reopens a compressed tar so it can be scanned again from the start."""
+        self._tar.close()
+        self._file.seek(0)
+        self._tar = tarfile.open(fileobj=self._file, mode='r:*')
@@ -0,0 +1,253 @@
+# src/critical_links.py
+
+import heapq
+from collections import defaultdict, deque
+
+import networkx as nx
+
+
+def _edge_key(u, v):
+    return (u, v) if u <= v else (v, u)
+
+
+class CriticalLinkAnalyzer:
+    """
+    Finds the bridges, articulation points and biconnected components
+    (blocks) of a topology graph in one O(V + E) depth-first pass, and
+    answers alternate-path questions from that decomposition.
+
+    A link that is a bridge has no alternate path. Any other link lies in
+    exactly one block, and every simple path between its endpoints stays
+    inside that block, so alternate routes are searched in the block's
+    edges only. The graph itself is never modified. The decomposition is
+    computed on first use and cached; create a new analyzer (or call
+    invalidate) after the graph changes.
+    """
+    def __init__(self, graph):
+        self.graph = graph
+        self.bridges = set()          # Sorted (u, v) edge keys
+        self.articulation_points = set()
+        self.blocks = []              # Each block is a list of (u, v) edges
+        self.edge_block = {}          # Edge key -> index into blocks
+        self.block_tree = None        # Block-cut tree, built with the decomposition
+        self._analyzed = False
+        self._block_adjacency = {}
+
+    def invalidate(self):
+        self._analyzed = False
+        self._block_adjacency = {}
+
+    def analyze(self):
+        """Runs the decomposition if it is not cached yet and returns self."""
+        if self._analyzed:
+            return self
+        self.bridges, self.articulation_points, self.blocks = set(), set(), []
+        index = {}
+        low = {}
+        edge_stack = []
+
+        for root in self.graph:
+            if root in index:
+                continue
+            index[root] = low[root] = len(index)
+            root_children = 0
+            stack = [(root, None, iter(self.graph.adj[root]))]
+            while stack:
+                node, parent, neighbors = stack[-1]
+                for neighbor in neighbors:
+                    if neighbor == node:
+                        continue  # Self-loops never separate anything
+                    if neighbor not in index:
+                        index[neighbor] = low[neighbor] = len(index)
+                        edge_stack.append((node, neighbor))
+                        stack.append((neighbor, node, iter(self.graph.adj[neighbor])))
+                        break
+                    if neighbor != parent and index[neighbor] < index[node]:
+                        # Back edge to an ancestor
+                        low[node] = min(low[node], index[neighbor])
+                        edge_stack.append((node, neighbor))
+                else:
+                    stack.pop()
+                    if parent is None:
+                        continue
+                    low[parent] = min(low[parent], low[node])
+                    if low[node] >= index[parent]:
+                        # parent separates node's subtree: its edges form a block
+                        block = []
+                        while True:
+                            edge = edge_stack.pop()
+                            block.append(edge)
+                            if edge == (parent, node):
+                                break
+                        self.blocks.append(block)
+                        if low[node] > index[parent]:
+                            self.bridges.add(_edge_key(parent, node))
+                        if parent == root:
+                            root_children += 1
+                        else:
+                            self.articulation_points.add(parent)
+            if root_children > 1:
+                self.articulation_points.add(root)
+
+        self.edge_block = {}
+        self.block_tree = nx.Graph()
+        for block_id, block in enumerate(self.blocks):
+            self.block_tree.add_node(('block', block_id), size=len(block))
+            for u, v in block:
+                self.edge_block[_edge_key(u, v)] = block_id
+                for node in (u, v):
+                    if node in self.articulation_points:
+                        self.block_tree.add_edge(('block', block_id), ('cut', node))
+        self._analyzed = True
+        return self
+
+    def is_bridge(self, u, v):
+        return _edge_key(u, v) in self.analyze().bridges
+
+    def block_nodes(self, block_id):
+        return {node for edge in self.analyze().blocks[block_id] for node in edge}
+
+    def block_adjacency(self, block_id):
+        """
+        Returns {node: [neighbors]} for the links of one block, cached per
+        block. The cache only ever holds complete adjacencies, so checks
+        running on other threads never see one half built.
+        """
+        adjacency = self._block_adjacency.get(block_id)
+        if adjacency is None:
+            adjacency = defaultdict(list)
+            for a, b in self.analyze().blocks[block_id]:
+                adjacency[a].append(b)
+                adjacency[b].append(a)
+            self._block_adjacency[block_id] = adjacency
+        return adjacency
+
+    def block_loop_count(self, block_id):
+        """Number of independent loops (links - nodes + 1) in a block."""
+        return len(self.analyze().blocks[block_id]) - len(self.block_nodes(block_id)) + 1
+
+    def iter_block_cycles(self, block_id):
+        """
+        Lazily yields the fundamental cycles of a block as node lists: one
+        per link outside a BFS spanning tree of the block. The tree is built
+        on the first next(); each cycle costs only its own length after that.
+        """
+        adjacency = self.block_adjacency(block_id)
+        root = self.analyze().blocks[block_id][0][0]
+        parent = {root: None}
+        depth = {root: 0}
+        order = deque([root])
+        tree_edges = set()
+        while order:
+            node = order.popleft()
+            for neighbor in adjacency[node]:
+                if neighbor not in parent:
+                    parent[neighbor] = node
+                    depth[neighbor] = depth[node] + 1
+                    tree_edges.add(_edge_key(node, neighbor))
+                    order.append(neighbor)
+
+        for a, b in self.blocks[block_id]:
+            if _edge_key(a, b) in tree_edges:
+                continue
+            up, down = [a], [b]
+            while up[-1] != down[-1]:
+                if depth[up[-1]] >= depth[down[-1]]:
+                    up.append(parent[up[-1]])
+                else:
+                    down.append(parent[down[-1]])
+            yield up + down[-2::-1]
+
+    def alternate_paths(self, u, v, k=3):
+        """
+        Returns up to k paths from u to v that avoid the link u-v, as node
+        lists. The first is a shortest route around the link. The others
+        come from k edge-disjoint paths of minimal total length, found by
+        Suurballe's successive shortest paths on the block's residual graph
+        with Dijkstra on potential-reduced costs, so each search stops as
+        soon as v is settled. They are disjoint from each other, shortest
+        first, but a disjoint set of minimal total length need not contain
+        a shortest path, so they may share links with the first. Returns []
+        for a bridge.
+        """
+        if not self.graph.has_edge(u, v):
+            raise nx.NetworkXError(f"Link {u}-{v} is not in the graph.")
+        key = _edge_key(u, v)
+        self.analyze()
+        if key in self.bridges:
+            return []
+        adjacency = self.block_adjacency(self.edge_block[key])
+
+        flow = set()  # (a, b) arcs carrying one unit of flow from a to b
+        potential = defaultdict(int)
+        shortest = None
+        for _ in range(k):
+            previous = self._shortest_residual_path(adjacency, flow, potential, key, u, v)
+            if previous is None:
+                break
+            if shortest is None:
+                # With no flow yet, the first search is a plain shortest path
+                shortest = [v]
+                while shortest[-1] != u:
+                    shortest.append(previous[shortest[-1]])
+                shortest.reverse()
+            node = v
+            while node != u:
+                parent = previous[node]
+                if (node, parent) in flow:
+                    flow.discard((node, parent))  # Cancel flow pushed by an earlier path
+                else:
+                    flow.add((parent, node))
+                node = parent
+
+        successors = defaultdict(list)
+        for a, b in flow:
+            successors[a].append(b)
+        paths = []
+        while successors[u]:
+            path = [u]
+            while path[-1] != v:
+                path.append(successors[path[-1]].pop())
+            if path != shortest:
+                paths.append(path)
+        paths.sort(key=len)
+        return ([shortest] + paths)[:k] if shortest else []
+
+    @staticmethod
+    def _shortest_residual_path(adjacency, flow, potential, excluded, source, target):
+        """
+        Dijkstra over the residual graph, where a free link costs 1 and
+        reversing flow on a used link costs -1, using costs reduced by
+        potential so none are negative. The search stops once target is
+        settled. Potentials are then raised by each settled node's distance,
+        capped at the target's. Nodes never reached would all be raised by
+        the cap, and only differences in potential matter, so those nodes are
+        left untouched and the settled nodes are lowered by the shortfall
+        instead. Returns the predecessor map, or None if target is unreachable.
+        """
+        distance = {source: 0}
+        previous = {}
+        settled = set()
+        heap = [(0, source)]
+        while heap:
+            cost, a = heapq.heappop(heap)
+            if a in settled:
+                continue
+            settled.add(a)
+            if a == target:
+                break
+            for b in adjacency[a]:
+                if b in settled or (a, b) in flow or _edge_key(a, b) == excluded:
+                    continue
+                reduced = cost + (-1 if (b, a) in flow else 1) + potential[a] - potential[b]
+                if reduced < distance.get(b, reduced + 1):
+                    distance[b] = reduced
+                    previous[b] = a
+                    heapq.heappush(heap, (reduced, b))
+        if target not in settled:
+            return None
+
+        limit = distance[target]
+        for node in settled:
+            potential[node] += distance[node] - limit
+        return previous
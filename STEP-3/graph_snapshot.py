@@ -0,0 +1,338 @@
+# src/graph_snapshot.py
+
+import mmap
+import struct
+import sys
+from array import array
+from collections import deque
+
+import networkx as nx
+
+SNAPSHOT_MAGIC = b'NETSNAP1'
+# magic, byte order of the arrays ('<' or '>'), section count, node count, edge count
+HEADER_FORMAT = '<8sc3xIqq'
+# section name, array typecode, byte offset, item count
+SECTION_FORMAT = '<16sc7xqq'
+SECTION_ALIGNMENT = 8
+
+# Codes stored in edge_bandwidth for links without a numeric bandwidth
+BANDWIDTH_NONE = -1
+BANDWIDTH_ABSENT = -2
+# Codes stored in a string column for an attribute that is not set, or set to None
+STRING_ABSENT = -1
+STRING_NONE = -2
+
+
+def _native_byteorder():
+    return b'<' if sys.byteorder == 'little' else b'>'
+
+
+def _adjacency_arrays(graph, index):
+    """
+    Returns (edges, node_offsets, neighbors, neighbor_edges) for graph.
+    Edges are (u, v) pairs in an order that, replayed through add_edge,
+    reproduces every node's adjacency order, and neighbor_edges refer to
+    positions in that list. Consecutive neighbors in an adjacency list mean
+    one edge was added before the other; those constraints come from a real
+    insertion history, so they are acyclic and a topological sort satisfies
+    all of them.
+    """
+    edge_ids = {}
+    edges = []
+    successors = []
+    indegree = []
+    node_offsets, neighbors, neighbor_edges = array('q', [0]), array('i'), array('i')
+    for u, adjacent in graph.adjacency():
+        iu = index[u]
+        previous = None
+        for v in adjacent:
+            iv = index[v]
+            key = (iu, iv) if iu <= iv else (iv, iu)
+            edge = edge_ids.get(key)
+            if edge is None:
+                edge = edge_ids[key] = len(edges)
+                edges.append((u, v))
+                successors.append([])
+                indegree.append(0)
+            if previous is not None:
+                successors[previous].append(edge)
+                indegree[edge] += 1
+            previous = edge
+            neighbors.append(iv)
+            neighbor_edges.append(edge)
+        node_offsets.append(len(neighbors))
+
+    queue = deque(edge for edge in range(len(edges)) if indegree[edge] == 0)
+    order = []
+    while queue:
+        edge = queue.popleft()
+        order.append(edge)
+        for successor in successors[edge]:
+            indegree[successor] -= 1
+            if indegree[successor] == 0:
+                queue.append(successor)
+    # Only reachable for adjacency orders no insertion history could produce
+    order.extend(edge for edge in range(len(edges)) if indegree[edge] > 0)
+
+    position = [0] * len(edges)
+    for rank, edge in enumerate(order):
+        position[edge] = rank
+    neighbor_edges = array('i', [position[edge] for edge in neighbor_edges])
+    return [edges[edge] for edge in order], node_offsets, neighbors, neighbor_edges
+
+
+class _StringTable:
+    """Interns strings into one UTF-8 blob with an offsets column."""
+    def __init__(self):
+        self.codes = {}
+        self.offsets = array('q', [0])
+        self.data = bytearray()
+
+    def code(self, value):
+        code = self.codes.get(value)
+        if code is None:
+            code = self.codes[value] = len(self.offsets) - 1
+            self.data += value.encode('utf-8')
+            self.offsets.append(len(self.data))
+        return code
+
+    def attribute_code(self, attrs, key, owner):
+        """Codes attrs[key], which must be a string or None. Raises ValueError otherwise."""
+        if key not in attrs:
+            return STRING_ABSENT
+        value = attrs[key]
+        if value is None:
+            return STRING_NONE
+        if not isinstance(value, str):
+            raise ValueError(f"Cannot store {key} {value!r} of {owner}; expected a string or None.")
+        return self.code(value)
+
+
+class GraphSnapshot:
+    """
+    Read-only, memory-mapped view of a topology graph saved with
+    GraphSnapshot.write.
+
+    The file holds the adjacency in CSR form: node_offsets[i] ..
+    node_offsets[i + 1] index the neighbors and neighbor_edges of node i.
+    Each edge has source, target and bandwidth columns. Names, device types
+    and titles are int32 codes into one interned string table. Every column
+    is a memoryview straight onto the map, so opening a snapshot copies
+    nothing. Worker processes that open the same file share its pages
+    through the OS page cache. np.asarray(column) wraps a column without a
+    copy when NumPy is available.
+
+    The fast path is to query the views directly: index_of,
+    neighbor_indexes, neighbor_names, node_attributes and edge_attributes
+    read only the entries they need, so a worker can open the snapshot
+    (load_snapshot) and answer adjacency questions within milliseconds.
+    to_networkx() is the slow path. It rebuilds a full nx.Graph in Python,
+    with the same node, edge and adjacency order as the saved graph, so
+    checks that depend on iteration order (e.g. cycle_basis) give the same
+    results. Use it only for code that needs NetworkX.
+
+    Node 'type'/'title' and edge 'bandwidth'/'title' are stored, and other
+    attributes are dropped.
+    """
+    def __init__(self, snapshot_path):
+        self.snapshot_path = snapshot_path
+        self.node_count = 0
+        self.edge_count = 0
+        self._file = None
+        self._mmap = None
+        self._views = {}
+        self._index = None
+
+    def __enter__(self):
+        if self._mmap is None:  # load_snapshot returns it already open
+            self.open()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+    @staticmethod
+    def write(graph, snapshot_path):
+        """
+        Writes graph to snapshot_path. Node names must be strings, 'type'
+        and 'title' a string or None, and edge bandwidths an int or None.
+        Raises ValueError otherwise.
+        """
+        if graph.is_directed() or graph.is_multigraph():
+            raise ValueError("Only undirected simple graphs can be saved as a snapshot.")
+        nodes = list(graph.nodes)
+        index = {node: i for i, node in enumerate(nodes)}
+        strings = _StringTable()
+
+        node_name, node_type, node_title = array('i'), array('i'), array('i')
+        for node, attrs in graph.nodes(data=True):
+            if not isinstance(node, str):
+                raise ValueError(f"Cannot store node {node!r}; snapshot node names must be strings.")
+            node_name.append(strings.code(node))
+            node_type.append(strings.attribute_code(attrs, 'type', f"node {node}"))
+            node_title.append(strings.attribute_code(attrs, 'title', f"node {node}"))
+
+        edges, node_offsets, neighbors, neighbor_edges = _adjacency_arrays(graph, index)
+        edge_source, edge_target = array('i'), array('i')
+        edge_bandwidth, edge_title = array('q'), array('i')
+        for u, v in edges:
+            attrs = graph.adj[u][v]
+            bandwidth = attrs.get('bandwidth', BANDWIDTH_ABSENT)
+            if bandwidth is None:
+                bandwidth = BANDWIDTH_NONE
+            elif not isinstance(bandwidth, int) or (bandwidth < 0 and 'bandwidth' in attrs):
+                raise ValueError(f"Cannot store bandwidth {bandwidth!r} of link {u}-{v}; expected an int or None.")
+            edge_source.append(index[u])
+            edge_target.append(index[v])
+            edge_bandwidth.append(bandwidth)
+            edge_title.append(strings.attribute_code(attrs, 'title', f"link {u}-{v}"))
+
+        sections = [
+            ('node_offsets', node_offsets),
+            ('neighbors', neighbors),
+            ('neighbor_edges', neighbor_edges),
+            ('node_name', node_name),
+            ('node_type', node_type),
+            ('node_title', node_title),
+            ('edge_source', edge_source),
+            ('edge_target', edge_target),
+            ('edge_bandwidth', edge_bandwidth),
+            ('edge_title', edge_title),
+            ('string_offsets', strings.offsets),
+            ('string_data', array('B', strings.data)),
+        ]
+
+        position = struct.calcsize(HEADER_FORMAT) + len(sections) * struct.calcsize(SECTION_FORMAT)
+        directory = []
+        for name, column in sections:
+            position += -position % SECTION_ALIGNMENT
+            directory.append(struct.pack(SECTION_FORMAT, name.encode('ascii'), column.typecode.encode('ascii'),
+                                         position, len(column)))
+            position += len(column) * column.itemsize
+
+        with open(snapshot_path, 'wb') as f:
+            f.write(struct.pack(HEADER_FORMAT, SNAPSHOT_MAGIC, _native_byteorder(), len(sections),
+                                len(nodes), len(edges)))
+            f.writelines(directory)
+            for name, column in sections:
+                f.write(b'\0' * (-f.tell() % SECTION_ALIGNMENT))
+                column.tofile(f)
+
+    def open(self):
+        self._file = open(self.snapshot_path, 'rb')
+        self._mmap = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        header_size = struct.calcsize(HEADER_FORMAT)
+        magic, byteorder, section_count, self.node_count, self.edge_count = struct.unpack_from(
+            HEADER_FORMAT, self._mmap, 0)
+        if magic != SNAPSHOT_MAGIC:
+            self.close()
+            raise ValueError(f"{self.snapshot_path} is not a topology snapshot.")
+        if byteorder != _native_byteorder():
+            self.close()
+            raise ValueError(f"{self.snapshot_path} was written on a machine with a different byte order.")
+
+        buffer = memoryview(self._mmap)
+        entry_size = struct.calcsize(SECTION_FORMAT)
+        for i in range(section_count):
+            name, typecode, offset, count = struct.unpack_from(SECTION_FORMAT, self._mmap,
+                                                               header_size + i * entry_size)
+            typecode = typecode.decode('ascii')
+            size = count * array(typecode).itemsize
+            self._views[name.rstrip(b'\0').decode('ascii')] = buffer[offset:offset + size].cast(typecode)
+        buffer.release()
+
+    def close(self):
+        for view in self._views.values():
+            view.release()
+        self._views = {}
+        self._index = None
+        if self._mmap is not None:
+            try:
+                self._mmap.close()
+            except BufferError:
+                # Slices handed out to callers are still alive; the map is
+                # unmapped once they are garbage collected
+                pass
+        if self._file is not None:
+            self._file.close()
+        self._mmap = self._file = None
+
+    def __getattr__(self, name):
+        # Columns are exposed as attributes, e.g. snapshot.neighbors
+        views = self.__dict__.get('_views', {})
+        if name in views:
+            return views[name]
+        raise AttributeError(name)
+
+    def string(self, code):
+        """Decodes an entry of the string table, or returns None for STRING_ABSENT and STRING_NONE."""
+        if code < 0:
+            return None
+        offsets = self._views['string_offsets']
+        return bytes(self._views['string_data'][offsets[code]:offsets[code + 1]]).decode('utf-8')
+
+    def node_name(self, node):
+        return self.string(self._views['node_name'][node])
+
+    def index_of(self, name):
+        """Returns the node index of a device name. The name index is built on first use."""
+        if self._index is None:
+            self._index = {self.node_name(node): node for node in range(self.node_count)}
+        return self._index[name]
+
+    def neighbor_indexes(self, node):
+        offsets = self._views['node_offsets']
+        return self._views['neighbors'][offsets[node]:offsets[node + 1]]
+
+    def neighbor_names(self, name):
+        """Names of a device's neighbors, in the saved adjacency order."""
+        return [self.node_name(neighbor) for neighbor in self.neighbor_indexes(self.index_of(name))]
+
+    def node_attributes(self, node):
+        attrs = {}
+        for key in ('type', 'title'):
+            code = self._views[f'node_{key}'][node]
+            if code != STRING_ABSENT:
+                attrs[key] = self.string(code)
+        return attrs
+
+    def edge_attributes(self, edge):
+        attrs = {}
+        bandwidth = self._views['edge_bandwidth'][edge]
+        if bandwidth != BANDWIDTH_ABSENT:
+            attrs['bandwidth'] = None if bandwidth == BANDWIDTH_NONE else bandwidth
+        title = self._views['edge_title'][edge]
+        if title != STRING_ABSENT:
+            attrs['title'] = self.string(title)
+        return attrs
+
+    def to_networkx(self):
+        """Rebuilds the saved nx.Graph, preserving node, edge and adjacency order."""
+        names = [self.node_name(node) for node in range(self.node_count)]
+        graph = nx.Graph()
+        graph.add_nodes_from((names[node], self.node_attributes(node)) for node in range(self.node_count))
+        source, target = self._views['edge_source'], self._views['edge_target']
+        graph.add_edges_from((names[source[edge]], names[target[edge]], self.edge_attributes(edge))
+                             for edge in range(self.edge_count))
+        return graph
+
+
+def save_snapshot(graph, snapshot_path):
+    """Writes graph to snapshot_path; see GraphSnapshot."""
+    GraphSnapshot.write(graph, snapshot_path)
+
+
+def load_snapshot(snapshot_path):
+    """
+    Opens a snapshot for querying through its memory-mapped views; close it
+    (or use it as a context manager) when done.
+    """
+    snapshot = GraphSnapshot(snapshot_path)
+    snapshot.open()
+    return snapshot
+
+
+def rebuild_graph(snapshot_path):
+    """Rebuilds the saved nx.Graph in full; see GraphSnapshot.to_networkx."""
+    with GraphSnapshot(snapshot_path) as snapshot:
+        return snapshot.to_networkx()
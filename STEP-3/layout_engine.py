@@ -0,0 +1,88 @@
+# src/layout_engine.py
+
+import math
+import random
+
+try:
+    import numpy as np
+except ImportError:  # NumPy is optional; layouts fall back to a circle
+    np = None
+
+# Upper bound on pairwise distances held in memory per repulsion block
+BLOCK_PAIRS = 2000000
+# Golden angle in radians, spreads group members evenly on a spiral
+GOLDEN_ANGLE = math.pi * (3 - math.sqrt(5))
+
+
+def force_layout(node_count, edges, iterations=50, seed=42):
+    """
+    Fruchterman-Reingold layout for nodes 0 .. node_count - 1 joined by
+    (u, v) index pairs. Returns a list of (x, y) positions in [-1, 1].
+
+    Repulsion between every pair of nodes is computed in row blocks of at
+    most BLOCK_PAIRS distances, so each iteration is a handful of array
+    operations instead of a Python loop per node. Without NumPy the nodes
+    are placed on a circle.
+    """
+    if node_count == 0:
+        return []
+    if np is None:
+        return circle_layout(node_count, seed)
+    if node_count == 1:
+        return [(0.0, 0.0)]
+
+    rng = np.random.default_rng(seed)
+    pos = rng.random((node_count, 2))
+    k = math.sqrt(1.0 / node_count)  # Ideal edge length in the unit square
+    temperature = 0.1
+    cooling = temperature / (iterations + 1)
+    edge_array = np.array(edges, dtype=np.int64).reshape(-1, 2)
+    src, dst = edge_array[:, 0], edge_array[:, 1]
+    block = max(1, BLOCK_PAIRS // node_count)
+
+    for _ in range(iterations):
+        disp = np.zeros((node_count, 2))
+        for start in range(0, node_count, block):
+            delta = pos[start:start + block, None, :] - pos[None, :, :]
+            dist2 = np.einsum('ijk,ijk->ij', delta, delta)
+            np.maximum(dist2, 1e-9, out=dist2)
+            disp[start:start + block] += np.einsum('ijk,ij->ik', delta, (k * k) / dist2)
+
+        delta = pos[src] - pos[dst]
+        dist = np.sqrt(np.einsum('ij,ij->i', delta, delta))
+        pull = delta * (dist / k)[:, None]
+        np.subtract.at(disp, src, pull)
+        np.add.at(disp, dst, pull)
+
+        length = np.sqrt(np.einsum('ij,ij->i', disp, disp))
+        np.maximum(length, 1e-9, out=length)
+        pos += disp * (np.minimum(length, temperature) / length)[:, None]
+        temperature -= cooling
+
+    pos -= pos.mean(axis=0)
+    extent = np.abs(pos).max()
+    if extent > 0:
+        pos /= extent
+    return [(float(x), float(y)) for x, y in pos]
+
+
+def circle_layout(node_count, seed=42):
+    """Places nodes evenly on the unit circle, in a seeded random order."""
+    order = list(range(node_count))
+    random.Random(seed).shuffle(order)
+    step = 2 * math.pi / max(node_count, 1)
+    positions = [None] * node_count
+    for slot, node in enumerate(order):
+        positions[node] = (math.cos(slot * step), math.sin(slot * step))
+    return positions
+
+
+def spiral_offsets(count, spacing):
+    """
+    Returns count (dx, dy) offsets on a sunflower spiral, roughly spacing
+    apart, for placing the members of a group around its center.
+    """
+    radius = spacing / 2
+    return [(radius * math.sqrt(i + 0.5) * math.cos(i * GOLDEN_ANGLE),
+             radius * math.sqrt(i + 0.5) * math.sin(i * GOLDEN_ANGLE))
+            for i in range(count)]
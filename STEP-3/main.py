@@ -5,7 +5,7 @@ from parser import NetworkConfigParser
 from topology_builder import TopologyBuilder
 from validator import NetworkValidator
 
-def print_results(results):
+def print_results(results, stats=None):
     """Helper function to print validation results in a readable format."""
     print("\n--- Validation Results ---")
     for check, issues in results.items():
@@ -22,6 +22,13 @@ def print_results(results):
                     print(f"   - {issue}")
     print("--------------------------\n")
 
+    if stats:
+        print("--- Check Timings ---")
+        for check, stat in stats.items():
+            memory = f", peak {stat['peak_memory'] / 2**20:.1f} MiB" if stat['peak_memory'] is not None else ""
+            print(f"   {check}: {stat['wall_time']:.3f}s{memory}")
+        print("---------------------\n")
+
 def main():
     """
     Main function to run the network analysis tool.
@@ -51,7 +58,7 @@ def main():
     validator = NetworkValidator(network_data, graph)
     validation_results = validator.run_all_checks()
     
-    print_results(validation_results)
+    print_results(validation_results, validator.check_stats)
 
     print("--- Next Steps ---")
     print("The network has been analyzed. The next step is the simulation engine.")
@@ -0,0 +1,323 @@
+# src/network_model.py
+
+import sys
+from array import array
+
+# Bits in InterfaceTable.flags recording which optional fields a row has
+HAS_IP = 1
+HAS_BANDWIDTH = 2
+HAS_VLAN = 4
+
+# Switchport, MTU and OSPF cost settings, kept per row in
+# InterfaceTable.switchport_fields because few interfaces have them
+SWITCHPORT_FIELDS = ('switchport_mode', 'trunk_allowed_vlans', 'native_vlan', 'mtu', 'ospf_cost')
+
+ALL_ONES = 0xFFFFFFFF
+
+
+def ip_to_int(address):
+    """
+    Converts a dotted-quad string to a 32-bit int. Raises ValueError for the
+    same malformed addresses ipaddress.IPv4Address rejects.
+    """
+    parts = address.split('.')
+    if len(parts) != 4:
+        raise ValueError(f"Expected 4 octets in '{address}'")
+    value = 0
+    for part in parts:
+        if not part.isdigit() or len(part) > 3 or (len(part) > 1 and part[0] == '0'):
+            raise ValueError(f"Invalid octet '{part}' in '{address}'")
+        octet = int(part)
+        if octet > 255:
+            raise ValueError(f"Octet {octet} (> 255) not permitted in '{address}'")
+        value = (value << 8) | octet
+    return value
+
+
+def int_to_ip(value):
+    """Converts a 32-bit int back to a dotted-quad string."""
+    return f"{value >> 24}.{(value >> 16) & 255}.{(value >> 8) & 255}.{value & 255}"
+
+
+def mask_to_prefix(mask):
+    """
+    Returns the prefix length of a 32-bit netmask. Like ipaddress, a host
+    mask (wildcard such as 0.0.0.255) is accepted as well. Raises ValueError
+    for non-contiguous masks.
+    """
+    inverted = ~mask & ALL_ONES
+    if inverted & (inverted + 1) == 0:  # Ones followed by zeros: a netmask
+        return 32 - inverted.bit_length()
+    if mask & (mask + 1) == 0:  # Zeros followed by ones: a host mask
+        return 32 - mask.bit_length()
+    raise ValueError(f"{int_to_ip(mask)} is not a valid netmask")
+
+
+def wildcard_to_prefix(wildcard):
+    """
+    Returns the prefix length of a 32-bit wildcard mask as used by OSPF
+    network statements (0.0.0.255 is /24, 0.0.0.0 is /32).
+    """
+    if wildcard & (wildcard + 1):
+        raise ValueError(f"{int_to_ip(wildcard)} is not a contiguous wildcard mask")
+    return 32 - wildcard.bit_length()
+
+
+def prefix_to_mask(prefix_len):
+    return (ALL_ONES << (32 - prefix_len)) & ALL_ONES
+
+
+def network_of(ip, mask):
+    """Returns (network address, prefix length) for an address and mask, as ints."""
+    prefix_len = mask_to_prefix(mask)
+    return ip & prefix_to_mask(prefix_len), prefix_len
+
+
+_prefix_cache = {}
+
+
+def parse_prefix(mask):
+    """
+    Returns the prefix length for a mask string, which may be a netmask, a
+    host mask or a bare prefix length, as ipaddress.IPv4Interface accepts.
+    """
+    prefix_len = _prefix_cache.get(mask)
+    if prefix_len is None:
+        if mask.isascii() and mask.isdigit():
+            prefix_len = int(mask)
+            if prefix_len > 32:
+                raise ValueError(f"Invalid prefix length '{mask}'")
+        else:
+            prefix_len = mask_to_prefix(ip_to_int(mask))
+        _prefix_cache[mask] = prefix_len
+    return prefix_len
+
+
+def network_key(ip, mask):
+    """
+    Returns a hashable (network address, prefix length) key for dotted-quad
+    address and mask strings. Two interfaces share a subnet exactly when their
+    keys are equal, matching ipaddress.IPv4Interface(...).network equality.
+    """
+    prefix_len = parse_prefix(mask)
+    return ip_to_int(ip) & prefix_to_mask(prefix_len), prefix_len
+
+
+def merge_vlan_ranges(ranges):
+    """
+    Normalizes (first, last) VLAN ranges into a sorted list of disjoint,
+    non-adjacent [first, last] lists (lists, so they survive a JSON round
+    trip unchanged).
+    """
+    merged = []
+    for first, last in sorted(ranges):
+        if merged and first <= merged[-1][1] + 1:
+            merged[-1][1] = max(merged[-1][1], last)
+        else:
+            merged.append([first, last])
+    return merged
+
+
+def subtract_vlan_ranges(ranges, removed):
+    """The VLANs of normalized ranges that are not in the normalized removed ranges."""
+    remaining = []
+    for first, last in ranges:
+        for removed_first, removed_last in removed:
+            if removed_last < first or removed_first > last:
+                continue
+            if removed_first > first:
+                remaining.append([first, removed_first - 1])
+            first = removed_last + 1
+            if first > last:
+                break
+        if first <= last:
+            remaining.append([first, last])
+    return remaining
+
+
+def vlan_in_ranges(vlan, ranges):
+    return any(first <= vlan <= last for first, last in ranges)
+
+
+def format_vlan_ranges(ranges):
+    """Formats VLAN ranges for an issue message, e.g. '2-9, 11-4094'."""
+    return ', '.join(str(first) if first == last else f"{first}-{last}" for first, last in ranges)
+
+
+class DeviceRecord:
+    """
+    Per-device metadata for an InterfaceTable. The device's interfaces are
+    the table rows first_row .. first_row + row_count - 1.
+    """
+    __slots__ = ('hostname', 'device_id', 'first_row', 'row_count', 'ospf', 'bgp', 'vlans', 'default_gateway')
+
+    def __init__(self, hostname, device_id, first_row, row_count, ospf=None, bgp=None, vlans=(),
+                 default_gateway=None):
+        self.hostname = hostname
+        self.device_id = device_id
+        self.first_row = first_row
+        self.row_count = row_count
+        self.ospf = ospf
+        self.bgp = bgp
+        self.vlans = vlans
+        self.default_gateway = default_gateway
+
+    @property
+    def rows(self):
+        return range(self.first_row, self.first_row + self.row_count)
+
+
+class InterfaceTable:
+    """
+    Memory-compact, column-oriented store for parsed interfaces.
+
+    Every interface is one row across parallel typed arrays: address and mask
+    as unsigned 32-bit ints, bandwidth (kbps), access VLAN, a flags byte for
+    which optional fields are set, and indexes into the device list and an
+    interned interface-name table. A row costs 23 bytes, against roughly
+    440 bytes for the equivalent dict of strings. Measured per 1M interfaces
+    (48 per device) that is about 27 MiB instead of about 420 MiB; see
+    `python src/benchmark.py model`.
+
+    Rows are appended one device at a time, so the table can be filled from
+    NetworkConfigParser.iter_devices(). to_network_data() rebuilds the
+    original parsed_data dict shape, e.g. for ReportGenerator.
+    """
+    def __init__(self):
+        self.ip = array('I')
+        self.mask = array('I')
+        self.bandwidth = array('I')
+        self.vlan = array('H')
+        self.flags = array('B')
+        self.device_id = array('I')
+        self.name_id = array('I')
+
+        self.names = []         # Interned interface names, indexed by name_id
+        self._name_ids = {}
+        self.devices = {}       # hostname -> DeviceRecord
+        self.device_names = []  # Indexed by device_id
+        # Rows whose address could not be converted keep the original strings
+        # here (and no HAS_IP flag), so exporting stays lossless
+        self.invalid_addresses = {}
+        self.switchport_fields = {}  # Row -> {field: value} for SWITCHPORT_FIELDS
+
+    @classmethod
+    def from_network_data(cls, network_data):
+        table = cls()
+        for device_name, data in network_data.items():
+            table._add_device(device_name, data)
+        return table
+
+    def __len__(self):
+        return len(self.ip)
+
+    def add_device(self, device):
+        """
+        Appends a parsed device record (as yielded by iter_devices). Adding a
+        hostname again replaces its interfaces; the old rows are skipped by
+        iter_rows() from then on.
+        """
+        return self._add_device(device['hostname'], device)
+
+    def _add_device(self, device_name, data):
+        record = self.devices.get(device_name)
+        if record is None:
+            device_id = len(self.device_names)
+            self.device_names.append(device_name)
+        else:
+            device_id = record.device_id
+
+        first_row = len(self.ip)
+        for if_name, if_data in data.get('interfaces', {}).items():
+            self._append_row(device_id, if_name, if_data)
+
+        record = DeviceRecord(device_name, device_id, first_row, len(self.ip) - first_row,
+                              data.get('ospf'), data.get('bgp'), data.get('vlans', []), data.get('default_gateway'))
+        self.devices[device_name] = record
+        return record
+
+    def _append_row(self, device_id, if_name, if_data):
+        flags = 0
+        ip = mask = bandwidth = vlan = 0
+        if 'ip_address' in if_data:
+            try:
+                ip = ip_to_int(if_data['ip_address'])
+                mask = ip_to_int(if_data['subnet_mask'])
+                flags |= HAS_IP
+            except ValueError:
+                ip = mask = 0
+                self.invalid_addresses[len(self.ip)] = (if_data['ip_address'], if_data['subnet_mask'])
+        if 'bandwidth' in if_data:
+            bandwidth = if_data['bandwidth']
+            flags |= HAS_BANDWIDTH
+        if 'vlan' in if_data:
+            vlan = if_data['vlan']
+            flags |= HAS_VLAN
+        switchport = {field: if_data[field] for field in SWITCHPORT_FIELDS if field in if_data}
+        if switchport:
+            self.switchport_fields[len(self.ip)] = switchport
+
+        self.ip.append(ip)
+        self.mask.append(mask)
+        self.bandwidth.append(bandwidth)
+        self.vlan.append(vlan)
+        self.flags.append(flags)
+        self.device_id.append(device_id)
+        self.name_id.append(self._intern_name(if_name))
+
+    def _intern_name(self, if_name):
+        name_id = self._name_ids.get(if_name)
+        if name_id is None:
+            name_id = len(self.names)
+            self.names.append(sys.intern(if_name))
+            self._name_ids[if_name] = name_id
+        return name_id
+
+    def iter_rows(self):
+        """Yields the row indexes of all current (not replaced) interfaces, device by device."""
+        for record in self.devices.values():
+            yield from record.rows
+
+    def device_of(self, row):
+        return self.device_names[self.device_id[row]]
+
+    def interface_name(self, row):
+        return self.names[self.name_id[row]]
+
+    def has_ip(self, row):
+        return bool(self.flags[row] & HAS_IP)
+
+    def network(self, row):
+        """Returns (network address, prefix length) as ints for a row with an IP."""
+        return network_of(self.ip[row], self.mask[row])
+
+    def interface_to_dict(self, row):
+        """Returns the parser's dict representation of one interface row."""
+        flags = self.flags[row]
+        details = {}
+        if flags & HAS_IP:
+            details['ip_address'] = int_to_ip(self.ip[row])
+            details['subnet_mask'] = int_to_ip(self.mask[row])
+        elif row in self.invalid_addresses:
+            details['ip_address'], details['subnet_mask'] = self.invalid_addresses[row]
+        if flags & HAS_BANDWIDTH:
+            details['bandwidth'] = self.bandwidth[row]
+        if flags & HAS_VLAN:
+            details['vlan'] = self.vlan[row]
+        details.update(self.switchport_fields.get(row, ()))
+        return details
+
+    def device_to_dict(self, device_name):
+        record = self.devices[device_name]
+        return {
+            'hostname': device_name,
+            'interfaces': {self.interface_name(row): self.interface_to_dict(row) for row in record.rows},
+            'ospf': record.ospf,
+            'bgp': record.bgp,
+            'vlans': record.vlans,
+            'default_gateway': record.default_gateway
+        }
+
+    def to_network_data(self):
+        """Exports the table in the parsed_data dict shape produced by NetworkConfigParser."""
+        return {device_name: self.device_to_dict(device_name) for device_name in self.devices}
@@ -0,0 +1,153 @@
+# src/parse_cache.py
+
+import gzip
+import hashlib
+import io
+import json
+import os
+
+CACHE_FORMAT_VERSION = 4
+
+
+def new_digest():
+    """The content hash the cache keys files by."""
+    return hashlib.blake2b(digest_size=16)
+
+
+class HashingReader(io.RawIOBase):
+    """Raw binary reader that feeds every byte read from a file into digest."""
+    def __init__(self, raw, digest):
+        self.raw = raw
+        self.digest = digest
+
+    def readable(self):
+        return True
+
+    def readinto(self, buffer):
+        count = self.raw.readinto(buffer)
+        if count:
+            self.digest.update(memoryview(buffer)[:count])
+        return count
+
+
+class ParseCache:
+    """
+    On-disk cache of parser output, so unchanged configs are not re-parsed.
+
+    Each entry is keyed by file path and stores the file's size, mtime and a
+    BLAKE2 content hash together with the parsed device record. A file whose
+    size and mtime are unchanged is a hit without being read; if only the
+    mtime moved (e.g. the file was copied or touched) the content hash decides.
+    The cache is stored as gzip-compressed compact JSON.
+    """
+    def __init__(self, cache_path, config_directory, engine):
+        self.cache_path = cache_path
+        self.config_directory = os.path.abspath(config_directory)
+        self.engine = engine
+        self.entries = {}  # file name -> [size, mtime_ns, digest, device]
+        self.stats = {'hits': 0, 'misses': 0, 'evicted': 0}
+        self.dirty = False
+        self._load()
+
+    def _load(self):
+        try:
+            with gzip.open(self.cache_path, 'rt', encoding='utf-8') as f:
+                cached = json.load(f)
+        except FileNotFoundError:
+            return
+        except (OSError, EOFError, ValueError) as e:
+            print(f"Warning: Ignoring unreadable parse cache '{self.cache_path}'. Error: {e}")
+            return
+
+        # Results from another directory, engine or cache format cannot be reused
+        if (cached.get('version') == CACHE_FORMAT_VERSION
+                and cached.get('directory') == self.config_directory
+                and cached.get('engine') == self.engine):
+            self.entries = cached.get('entries', {})
+        else:
+            self.dirty = True
+
+    def save(self):
+        """Writes the cache to disk if it changed, replacing the previous file atomically."""
+        if not self.dirty:
+            return
+        cache_dir = os.path.dirname(os.path.abspath(self.cache_path))
+        os.makedirs(cache_dir, exist_ok=True)
+        tmp_path = f"{self.cache_path}.tmp"
+        payload = {
+            'version': CACHE_FORMAT_VERSION,
+            'directory': self.config_directory,
+            'engine': self.engine,
+            'entries': self.entries
+        }
+        # json.dumps uses the C encoder; json.dump to a stream does not
+        encoded = json.dumps(payload, separators=(',', ':')).encode('utf-8')
+        with gzip.open(tmp_path, 'wb', compresslevel=6) as f:
+            f.write(encoded)
+        os.replace(tmp_path, self.cache_path)
+        self.dirty = False
+
+    def lookup(self, file_name):
+        """
+        Returns (True, device) if the cached record for file_name is still
+        valid, otherwise (False, None). Updates the hit/miss counters.
+        """
+        entry = self.entries.get(file_name)
+        if entry is not None:
+            file_path = os.path.join(self.config_directory, file_name)
+            try:
+                stat = os.stat(file_path)
+            except OSError:
+                stat = None
+
+            if stat is not None:
+                size, mtime_ns, digest, device = entry
+                if stat.st_size == size and stat.st_mtime_ns == mtime_ns:
+                    self.stats['hits'] += 1
+                    return True, device
+                if stat.st_size == size and self._hash_file(file_path) == digest:
+                    entry[1] = stat.st_mtime_ns  # Same content, only the timestamp moved
+                    self.dirty = True
+                    self.stats['hits'] += 1
+                    return True, device
+
+        self.stats['misses'] += 1
+        return False, None
+
+    def store(self, file_name, device, fingerprint):
+        """
+        Records a freshly parsed device record for file_name under its
+        (size, mtime_ns, digest) fingerprint. The parser stats the file
+        before reading it and hashes the bytes it parses (see
+        NetworkConfigParser._parse_file_safely), so a file that changes
+        during the parse fails the size/mtime check on the next run and
+        the digest decides, against the content actually parsed.
+        """
+        if fingerprint is None:
+            return
+        self.entries[file_name] = [*fingerprint, device]
+        self.dirty = True
+
+    def evict_missing(self, current_files):
+        """Drops entries for files that are no longer in the directory."""
+        current_files = set(current_files)
+        stale = [name for name in self.entries if name not in current_files]
+        for name in stale:
+            del self.entries[name]
+        self.stats['evicted'] = len(stale)
+        if stale:
+            self.dirty = True
+
+    def summary(self):
+        """Returns a one-line hit/miss summary for the last run."""
+        total = self.stats['hits'] + self.stats['misses']
+        hit_rate = (self.stats['hits'] / total * 100) if total else 0.0
+        return (f"Parse cache: {self.stats['hits']} hits, {self.stats['misses']} misses, "
+                f"{self.stats['evicted']} evicted ({hit_rate:.1f}% hit rate)")
+
+    def _hash_file(self, file_path):
+        digest = new_digest()
+        with open(file_path, 'rb') as f:
+            for block in iter(lambda: f.read(1 << 20), b''):
+                digest.update(block)
+        return digest.hexdigest()
@@ -1,52 +1,536 @@
 # src/parser.py
 
+import io
 import os
 import re
 import json
+from concurrent.futures import ProcessPoolExecutor
+from collections import deque
+from parse_cache import ParseCache, HashingReader, new_digest
+from config_archive import ConfigArchive, ARCHIVE_READ_ERRORS
+from network_model import merge_vlan_ranges, subtract_vlan_ranges
+
+# Pre-compiled patterns used by the single-pass line engine. Each one is only
+# ever applied to a single (already stripped) line, never to a whole file.
+HOSTNAME_LINE_RE = re.compile(r"hostname\s+(\S+)")
+INTERFACE_LINE_RE = re.compile(r"interface\s+(\S+)$")
+ROUTER_LINE_RE = re.compile(r"router\s+(\S+)\s+(\d+)$")
+IP_ADDRESS_LINE_RE = re.compile(r"ip\s+address\s+([\d\.]+)\s+([\d\.]+)")
+BANDWIDTH_LINE_RE = re.compile(r"bandwidth\s+(\d+)")
+ACCESS_VLAN_LINE_RE = re.compile(r"switchport\s+access\s+vlan\s+(\d+)")
+SWITCHPORT_MODE_LINE_RE = re.compile(r"switchport\s+mode\s+(access|trunk)")
+TRUNK_ALLOWED_LINE_RE = re.compile(r"switchport\s+trunk\s+allowed\s+vlan\s+(?:(add|remove|except)\s+)?(\S+)$")
+TRUNK_NATIVE_LINE_RE = re.compile(r"switchport\s+trunk\s+native\s+vlan\s+(\d+)")
+MTU_LINE_RE = re.compile(r"mtu\s+(\d+)")
+VLAN_LINE_RE = re.compile(r"vlan\s+([\d,\-]+)$")
+DEFAULT_GATEWAY_LINE_RE = re.compile(r"ip\s+default-gateway\s+([\d\.]+)")
+NETWORK_LINE_RE = re.compile(r"network\s+([\d\.]+)\s+([\d\.]+)\s+area\s+(\d+)")
+OSPF_COST_LINE_RE = re.compile(r"ip\s+ospf\s+cost\s+(\d+)")
+ROUTER_ID_LINE_RE = re.compile(r"router-id\s+([\d\.]+)")
+REFERENCE_BANDWIDTH_LINE_RE = re.compile(r"auto-cost\s+reference-bandwidth\s+(\d+)")
+
+ROUTING_PROTOCOLS = ('ospf', 'bgp')
+
+# VLAN IDs usable on a trunk, for 'switchport trunk allowed vlan all/except'
+ALL_VLANS = [[1, 4094]]
+
+# Parallel parsing hands files to workers in batches of roughly this many bytes,
+# so thousands of small configs don't each pay a round trip to the pool.
+DEFAULT_BATCH_BYTES = 1024 * 1024
+
+
+def parse_vlan_list(text):
+    """Expands an IOS VLAN list such as '1,10,20-22' into a sorted list of ints."""
+    vlans = set()
+    for part in text.split(','):
+        if not part:
+            continue
+        first, _, last = part.partition('-')
+        vlans.update(range(int(first), int(last or first) + 1))
+    return sorted(vlans)
+
+
+def parse_vlan_ranges(text):
+    """Parses an IOS VLAN list such as '1,10,20-22' into merged [first, last] ranges."""
+    ranges = []
+    for part in text.split(','):
+        if not part:
+            continue
+        first, _, last = part.partition('-')
+        ranges.append((int(first), int(last or first)))
+    return merge_vlan_ranges(ranges)
+
+
+def apply_trunk_allowed(current, action, vlan_list):
+    """
+    Applies one 'switchport trunk allowed vlan [add|remove|except] <list>'
+    command to the current allowed list. Allowed lists are merged [first,
+    last] VLAN ranges (see merge_vlan_ranges), or 'all' while every VLAN
+    is allowed, so 'except 10' stays two ranges rather than 4093 VLANs.
+    """
+    if vlan_list == 'all':
+        return 'all' if action != 'remove' else []
+    if vlan_list == 'none':
+        return [] if action != 'add' else current
+    ranges = parse_vlan_ranges(vlan_list)
+    if action == 'except':
+        return subtract_vlan_ranges(ALL_VLANS, ranges)
+    if action is None:
+        return ranges
+    allowed = ALL_VLANS if current == 'all' else current
+    if action == 'add':
+        return merge_vlan_ranges(allowed + ranges)
+    return subtract_vlan_ranges(allowed, ranges)
+
+
+def _parse_file_batch(engine, fingerprint, file_paths):
+    """
+    Worker entry point for parallel parsing: parses a batch of files in a
+    separate process and returns one (device, error, fingerprint) triple
+    per file.
+    """
+    parser = NetworkConfigParser(None, engine=engine)
+    return [parser._parse_file_safely(file_path, fingerprint) for file_path in file_paths]
+
+
+def _parse_archive_batch(engine, archive_path, member_names):
+    """
+    Worker entry point for parallel archive parsing: opens the archive in a
+    separate process and parses a batch of its members.
+    """
+    parser = NetworkConfigParser(None, engine=engine)
+    with ConfigArchive(archive_path) as archive:
+        return list(parser._parse_archive_members(archive, member_names))
+
 
 class NetworkConfigParser:
     """
     Parses network device configuration files to extract key details like
     hostname, interfaces, IP addresses, bandwidth, and routing protocols.
+
+    config_directory may also be a zip or tar(.gz/.bz2/.xz) archive, in which
+    case its .txt members are parsed in place without extracting them.
+
+    Two parsing engines are available:
+      - 'lines' (default): reads each file once as a line/indentation state
+        machine, so cost is linear in the size of the config.
+      - 'regex': the original multi-pass regular expression extraction, kept
+        for comparison and benchmarking.
     """
-    def __init__(self, config_directory):
+    ENGINES = ('lines', 'regex')
+
+    def __init__(self, config_directory, engine='lines', cache_path=None):
+        if engine not in self.ENGINES:
+            raise ValueError(f"Unknown parser engine '{engine}'. Choose one of: {', '.join(self.ENGINES)}")
         self.config_directory = config_directory
+        self.is_archive = config_directory is not None and ConfigArchive.is_archive(config_directory)
+        self.engine = engine
+        self.cache_path = cache_path  # Optional on-disk parse cache (see parse_cache.py)
+        self.cache_stats = None
         self.parsed_data = {}
+        self.errors = {}  # Maps file name to the reason it could not be parsed
 
-    def parse_directory(self):
+    def parse_directory(self, workers=1, batch_bytes=DEFAULT_BATCH_BYTES):
         """
         Parses all .txt files in the specified configuration directory.
+
+        Files are processed in sorted filename order, so when two configs share
+        a hostname the one that sorts last wins. With workers > 1 (or None for
+        one worker per CPU) the files are parsed across a process pool in
+        batches of about batch_bytes and merged back in the same order.
+        Files that cannot be read are reported in self.errors and skipped.
+
+        If a cache_path was given, only new or changed files are parsed; the
+        rest are loaded from the cache and its hit/miss counts are stored in
+        self.cache_stats. The cache is not used for archives.
         """
-        try:
-            config_files = [f for f in os.listdir(self.config_directory) if f.endswith('.txt')]
+        config_files = self._list_config_files()
+        if not config_files:
+            return None
+
+        for device in self._iter_devices(config_files, workers, batch_bytes):
+            self._store_device(device)
+
+        return self.parsed_data
+
+    def iter_devices(self, workers=1, batch_bytes=DEFAULT_BATCH_BYTES):
+        """
+        Yields parsed device records one at a time, in the same order and with
+        the same options as parse_directory, without building parsed_data.
+
+        Consumers that index devices as they arrive (see
+        TopologyBuilder.add_device and NetworkValidator.add_device) never need
+        the whole corpus in memory. A hostname may be yielded more than once
+        if several configs share it; the later record replaces the earlier one.
+        """
+        config_files = self._list_config_files()
+        if config_files:
+            yield from self._iter_devices(config_files, workers, batch_bytes)
+
+    def _list_config_files(self):
+        """Returns the sorted .txt file names in the config directory or archive, or None."""
+        if self.is_archive:
+            try:
+                with ConfigArchive(self.config_directory) as archive:
+                    config_files = archive.list_members()
+            except ARCHIVE_READ_ERRORS as e:
+                print(f"Error: Could not read archive '{self.config_directory}'. Error: {e}")
+                return None
             if not config_files:
-                print(f"Warning: No .txt configuration files found in '{self.config_directory}'")
+                print(f"Warning: No .txt configuration files found in archive '{self.config_directory}'")
                 return None
+            return config_files
 
-            for file_name in config_files:
-                file_path = os.path.join(self.config_directory, file_name)
-                with open(file_path, 'r') as f:
-                    content = f.read()
-                    self._parse_file_content(content)
-            
-            return self.parsed_data
+        try:
+            config_files = sorted(f for f in os.listdir(self.config_directory) if f.endswith('.txt'))
         except FileNotFoundError:
             print(f"Error: Directory not found at '{self.config_directory}'")
             return None
 
+        if not config_files:
+            print(f"Warning: No .txt configuration files found in '{self.config_directory}'")
+            return None
+        return config_files
+
+    def _iter_devices(self, config_files, workers, batch_bytes):
+        cache = None
+        if self.cache_path and not self.is_archive:
+            cache = ParseCache(self.cache_path, self.config_directory, self.engine)
+        cached_devices = {}
+        files_to_parse = config_files
+        if cache:
+            cache.evict_missing(config_files)
+            files_to_parse = []
+            for file_name in config_files:
+                hit, device = cache.lookup(file_name)
+                if hit:
+                    cached_devices[file_name] = device
+                else:
+                    files_to_parse.append(file_name)
+
+        parsed = self._parse_files(files_to_parse, workers, batch_bytes, fingerprint=cache is not None)
+
+        # Merge cached and freshly parsed devices back in sorted filename order.
+        # The cache is saved even if the consumer stops early, keeping what was parsed.
+        try:
+            for file_name in config_files:
+                if file_name in cached_devices:
+                    device = cached_devices.pop(file_name)
+                else:
+                    device, error, fingerprint = next(parsed)
+                    if error:
+                        self.errors[file_name] = error
+                        print(f"Warning: Could not parse '{file_name}'. Error: {error}")
+                        continue
+                    if cache:
+                        cache.store(file_name, device, fingerprint)
+
+                if device:
+                    yield device
+        finally:
+            if cache:
+                try:
+                    cache.save()
+                except OSError as e:
+                    print(f"Warning: Could not write parse cache '{self.cache_path}'. Error: {e}")
+                self.cache_stats = cache.stats
+                print(cache.summary())
+
+    def _parse_files(self, file_names, workers, batch_bytes, fingerprint=False):
+        """
+        Parses the given files (or archive members) serially or across a
+        process pool, yielding (device, error, fingerprint) triples in the
+        same order as file_names. With fingerprint, each file's cache
+        fingerprint is taken from the same read that parses it (see
+        _parse_file_safely); otherwise, and for archives, it is None.
+        """
+        if self.is_archive:
+            return self._parse_archive(file_names, workers, batch_bytes)
+
+        file_paths = [os.path.join(self.config_directory, f) for f in file_names]
+        if workers != 1 and len(file_paths) > 1:
+            batches = self._batch_by_size(file_paths, self._file_size, batch_bytes)
+            return self._parse_batches_parallel(batches, workers, _parse_file_batch, fingerprint)
+        return (self._parse_file_safely(file_path, fingerprint) for file_path in file_paths)
+
+    def _parse_archive(self, member_names, workers, batch_bytes):
+        with ConfigArchive(self.config_directory) as archive:
+            # Compressed tars can only be read front to back, so they stay serial
+            if workers != 1 and len(member_names) > 1 and archive.supports_random_access:
+                batches = self._batch_by_size(member_names, archive.member_size, batch_bytes)
+                yield from self._parse_batches_parallel(batches, workers, _parse_archive_batch, self.config_directory)
+            else:
+                yield from self._parse_archive_members(archive, member_names)
+
+    def _parse_archive_members(self, archive, member_names):
+        for name, stream, error in archive.iter_members(member_names):
+            if error:
+                yield None, error, None
+                continue
+            try:
+                yield self._parse_stream(stream), None, None
+            except ARCHIVE_READ_ERRORS as e:
+                yield None, str(e), None
+
+    def _parse_batches_parallel(self, batches, workers, batch_function, *args):
+        """
+        Runs batch_function(engine, *args, batch) for each batch across a
+        process pool, yielding its results in batch order.
+        """
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            # Keep only a few batches in flight so finished results don't pile
+            # up in memory faster than the consumer takes them.
+            max_in_flight = 2 * (workers or os.cpu_count() or 1)
+            pending = deque()
+            for batch in batches:
+                pending.append(executor.submit(batch_function, self.engine, *args, batch))
+                if len(pending) >= max_in_flight:
+                    yield from pending.popleft().result()
+            while pending:
+                yield from pending.popleft().result()
+
+    def _batch_by_size(self, items, size_of, batch_bytes):
+        """Groups consecutive items into batches of roughly batch_bytes each."""
+        batches = []
+        current, current_size = [], 0
+        for item in items:
+            current.append(item)
+            current_size += size_of(item)
+            if current_size >= batch_bytes:
+                batches.append(current)
+                current, current_size = [], 0
+        if current:
+            batches.append(current)
+        return batches
+
+    def _file_size(self, file_path):
+        try:
+            return os.path.getsize(file_path)
+        except OSError:
+            return 0  # The worker will report the actual error
+
+    def _parse_file_safely(self, file_path, fingerprint=False):
+        """
+        Parses one file, returning (device, None, fingerprint) or (None,
+        error message, None). With fingerprint, the file is stat'ed before
+        it is opened and its bytes are hashed as the parser reads them, so
+        it is read once and the digest matches exactly what was parsed:
+        (size, mtime_ns, digest) for ParseCache.store. Otherwise the
+        fingerprint is None.
+        """
+        try:
+            if not fingerprint:
+                return self.parse_file(file_path), None, None
+            stat = os.stat(file_path)
+            digest = new_digest()
+            with open(file_path, 'rb') as raw:
+                reader = HashingReader(raw, digest)
+                with io.TextIOWrapper(io.BufferedReader(reader)) as f:
+                    device = self._parse_stream(f)
+                    while reader.read(1 << 20):
+                        pass  # Hash anything the parser left unread
+            return device, None, (stat.st_size, stat.st_mtime_ns, digest.hexdigest())
+        except (OSError, UnicodeDecodeError) as e:
+            return None, str(e), None
+
+    def parse_file(self, file_path):
+        """
+        Parses a single config file and returns the device record, or None if
+        the config has no hostname.
+        """
+        with open(file_path, 'r') as f:
+            return self._parse_stream(f)
+
+    def _parse_stream(self, f):
+        if self.engine == 'lines':
+            # Stream the file line by line; the whole content is never held in memory
+            return self.parse_lines(f)
+        return self.parse_content(f.read())
+
+    def parse_content(self, content):
+        """
+        Parses a single config file's content and returns the device record,
+        or None if the config has no hostname.
+        """
+        if self.engine == 'lines':
+            return self.parse_lines(content.splitlines())
+        return self._parse_content_regex(content)
+
     def _parse_file_content(self, content):
+        """
+        Parses a single config file's content and stores it in parsed_data.
+        """
+        self._store_device(self.parse_content(content))
+
+    def _store_device(self, device):
+        if device:
+            self.parsed_data[device['hostname']] = device
+
+    # --- Single-pass line engine ---
+
+    def parse_lines(self, lines):
+        """
+        Parses an iterable of config lines in one pass.
+
+        Top-level (non-indented) lines open or close sections; indented lines
+        belong to the section opened most recently. Only the current interface
+        block is buffered, so arbitrarily large configs can be streamed.
+        """
+        hostname = None
+        interfaces = {}
+        protocols = {}
+        vlans = set()
+        default_gateway = None
+
+        section = None          # 'interface', 'router' or None
+        if_name = None
+        if_details = None
+        proto_details = None
+
+        for raw_line in lines:
+            if not raw_line or raw_line[0] in '\r\n':
+                continue
+
+            if raw_line[0] in ' \t':
+                # Indented line: a sub-command of the current section
+                if section is None:
+                    continue
+                line = raw_line.strip()
+                if section == 'interface':
+                    self._apply_interface_line(line, if_details)
+                elif line.startswith('network'):
+                    match = NETWORK_LINE_RE.match(line)
+                    if match:
+                        proto_details.setdefault('networks', []).append({
+                            'network': match.group(1),
+                            'wildcard': match.group(2),
+                            'area': int(match.group(3))
+                        })
+                elif line.startswith('router-id'):
+                    match = ROUTER_ID_LINE_RE.match(line)
+                    if match:
+                        proto_details['router_id'] = match.group(1)
+                elif line.startswith('auto-cost'):
+                    match = REFERENCE_BANDWIDTH_LINE_RE.match(line)
+                    if match:
+                        proto_details['reference_bandwidth'] = int(match.group(1))  # Mbps
+                continue
+
+            # Top-level line: closes whatever section was open
+            if section == 'interface' and if_details:
+                interfaces[if_name] = if_details
+            section = None
+
+            line = raw_line.rstrip()
+            if line.startswith('!'):
+                continue
+
+            if line.startswith('interface'):
+                match = INTERFACE_LINE_RE.match(line)
+                if match:
+                    section = 'interface'
+                    if_name = match.group(1)
+                    if_details = {}
+            elif line.startswith('router'):
+                match = ROUTER_LINE_RE.match(line)
+                # Only the first process of each protocol is recorded
+                if match and match.group(1) in ROUTING_PROTOCOLS and match.group(1) not in protocols:
+                    section = 'router'
+                    proto_details = {'process_id': int(match.group(2))}
+                    protocols[match.group(1)] = proto_details
+            elif hostname is None and line.startswith('hostname'):
+                match = HOSTNAME_LINE_RE.match(line)
+                if match:
+                    hostname = match.group(1)
+            elif line.startswith('vlan'):
+                match = VLAN_LINE_RE.match(line)
+                if match:
+                    vlans.update(parse_vlan_list(match.group(1)))
+            elif default_gateway is None and line.startswith('ip'):
+                match = DEFAULT_GATEWAY_LINE_RE.match(line)
+                if match:
+                    default_gateway = match.group(1)
+
+        if section == 'interface' and if_details:
+            interfaces[if_name] = if_details
+
+        if not hostname:
+            return None # Skip files without a valid hostname
+
+        return {
+            'hostname': hostname,
+            'interfaces': interfaces,
+            'ospf': protocols.get('ospf'),
+            'bgp': protocols.get('bgp'),
+            'vlans': sorted(vlans),
+            'default_gateway': default_gateway
+        }
+
+    def _apply_interface_line(self, line, interface_details):
+        """Updates an interface record from one of its sub-command lines."""
+        if line.startswith('ip ospf cost'):
+            if 'ospf_cost' not in interface_details:
+                match = OSPF_COST_LINE_RE.match(line)
+                if match:
+                    interface_details['ospf_cost'] = int(match.group(1))
+        elif line.startswith('ip'):
+            if 'ip_address' not in interface_details:
+                match = IP_ADDRESS_LINE_RE.match(line)
+                if match:
+                    interface_details['ip_address'] = match.group(1)
+                    interface_details['subnet_mask'] = match.group(2)
+        elif line.startswith('bandwidth'):
+            if 'bandwidth' not in interface_details:
+                match = BANDWIDTH_LINE_RE.match(line)
+                if match:
+                    interface_details['bandwidth'] = int(match.group(1))
+        elif line.startswith('switchport'):
+            self._apply_switchport_line(line, interface_details)
+        elif line.startswith('mtu'):
+            if 'mtu' not in interface_details:
+                match = MTU_LINE_RE.match(line)
+                if match:
+                    interface_details['mtu'] = int(match.group(1))
+
+    def _apply_switchport_line(self, line, interface_details):
+        """Records the access VLAN, switchport mode and trunk VLANs of an interface."""
+        if line.startswith('switchport access'):
+            if 'vlan' not in interface_details:
+                match = ACCESS_VLAN_LINE_RE.match(line)
+                if match:
+                    interface_details['vlan'] = int(match.group(1))
+        elif line.startswith('switchport mode'):
+            match = SWITCHPORT_MODE_LINE_RE.match(line)
+            if match:
+                interface_details['switchport_mode'] = match.group(1)
+        elif line.startswith('switchport trunk allowed'):
+            # Later commands refine earlier ones (add/remove), so all of them apply
+            match = TRUNK_ALLOWED_LINE_RE.match(line)
+            if match:
+                interface_details['trunk_allowed_vlans'] = apply_trunk_allowed(
+                    interface_details.get('trunk_allowed_vlans', 'all'), match.group(1), match.group(2))
+        elif line.startswith('switchport trunk native'):
+            match = TRUNK_NATIVE_LINE_RE.match(line)
+            if match:
+                interface_details['native_vlan'] = int(match.group(1))
+
+    # --- Original regex engine ---
+
+    def _parse_content_regex(self, content):
         """
         Uses regular expressions to extract information from a single config file's content.
         """
         hostname = self._extract_hostname(content)
         if not hostname:
-            return # Skip files without a valid hostname
+            return None # Skip files without a valid hostname
 
-        self.parsed_data[hostname] = {
+        return {
             'hostname': hostname,
             'interfaces': self._extract_interfaces(content),
             'ospf': self._extract_routing_protocol(content, 'ospf'),
-            'bgp': self._extract_routing_protocol(content, 'bgp')
+            'bgp': self._extract_routing_protocol(content, 'bgp'),
+            'vlans': self._extract_vlans(content),
+            'default_gateway': self._extract_default_gateway(content)
         }
 
     def _extract_hostname(self, content):
@@ -76,12 +560,45 @@ class NetworkConfigParser:
             vlan_match = re.search(r"switchport\s+access\s+vlan\s+(\d+)", config)
             if vlan_match:
                 interface_details['vlan'] = int(vlan_match.group(1))
+
+            mode_match = re.search(r"switchport\s+mode\s+(access|trunk)", config)
+            if mode_match:
+                interface_details['switchport_mode'] = mode_match.group(1)
+
+            allowed_matches = re.findall(r"switchport\s+trunk\s+allowed\s+vlan\s+(?:(add|remove|except)\s+)?(\S+)", config)
+            if allowed_matches:
+                allowed = 'all'
+                for action, vlan_list in allowed_matches:
+                    allowed = apply_trunk_allowed(allowed, action or None, vlan_list)
+                interface_details['trunk_allowed_vlans'] = allowed
+
+            native_match = re.search(r"switchport\s+trunk\s+native\s+vlan\s+(\d+)", config)
+            if native_match:
+                interface_details['native_vlan'] = int(native_match.group(1))
+
+            mtu_match = re.search(r"^\s*mtu\s+(\d+)", config, re.MULTILINE)
+            if mtu_match:
+                interface_details['mtu'] = int(mtu_match.group(1))
+
+            cost_match = re.search(r"ip\s+ospf\s+cost\s+(\d+)", config)
+            if cost_match:
+                interface_details['ospf_cost'] = int(cost_match.group(1))
             
             if interface_details:
                 interfaces[name] = interface_details
                 
         return interfaces
 
+    def _extract_vlans(self, content):
+        vlans = set()
+        for vlan_list in re.findall(r"^vlan\s+([\d,\-]+)\s*$", content, re.MULTILINE):
+            vlans.update(parse_vlan_list(vlan_list))
+        return sorted(vlans)
+
+    def _extract_default_gateway(self, content):
+        match = re.search(r"^ip\s+default-gateway\s+([\d\.]+)", content, re.MULTILINE)
+        return match.group(1) if match else None
+
     def _extract_routing_protocol(self, content, protocol_name):
         protocol_details = {}
         # Regex to find the routing protocol block
@@ -97,6 +614,13 @@ class NetworkConfigParser:
                 protocol_details['networks'] = [
                     {'network': net[0], 'wildcard': net[1], 'area': int(net[2])} for net in networks
                 ]
+
+            router_id = re.search(r"^\s*router-id\s+([\d\.]+)", config_block, re.MULTILINE)
+            if router_id:
+                protocol_details['router_id'] = router_id.group(1)
+            reference = re.search(r"auto-cost\s+reference-bandwidth\s+(\d+)", config_block)
+            if reference:
+                protocol_details['reference_bandwidth'] = int(reference.group(1))  # Mbps
         
         return protocol_details if protocol_details else None
 
@@ -0,0 +1,342 @@
+# src/prefix_index.py
+
+from array import array
+from network_model import ip_to_int, int_to_ip, prefix_to_mask, wildcard_to_prefix
+from address_engine import address_columns
+
+NO_NODE = -1
+_MASKS = [prefix_to_mask(prefix_len) for prefix_len in range(33)]  # Netmask per prefix length
+
+
+def _common_length(a, b, limit):
+    """Number of leading bits a and b share, capped at limit."""
+    diff = a ^ b
+    if diff == 0:
+        return limit
+    return min(32 - diff.bit_length(), limit)
+
+
+def _bit_at(key, position):
+    """The bit of a 32-bit key at position (0 = most significant)."""
+    return (key >> (31 - position)) & 1
+
+
+class PrefixTrie:
+    """
+    Path-compressed binary (PATRICIA) trie of IPv4 prefixes.
+
+    Nodes live in parallel arrays (key, length, two children and a payload
+    slot), so a trie of n prefixes has at most 2n + 1 nodes and no per-node
+    Python objects. Every lookup walks at most one node per bit, so
+    longest-prefix match and covering-prefix queries are O(32); queries that
+    return a subtree (covered prefixes) also pay for their output.
+
+    Each stored prefix carries a list of payload items; inserting the same
+    prefix twice appends to that list.
+    """
+    def __init__(self):
+        self.node_key = array('I')
+        self.node_length = array('B')
+        self.child0 = array('i')
+        self.child1 = array('i')
+        self.node_value = array('i')  # Index into self.values, or NO_NODE for glue nodes
+        self.values = []              # Payload lists, one per stored prefix
+        self.root = self._new_node(0, 0)
+
+    def __len__(self):
+        return len(self.values)
+
+    def _new_node(self, key, length, value=NO_NODE):
+        self.node_key.append(key)
+        self.node_length.append(length)
+        self.child0.append(NO_NODE)
+        self.child1.append(NO_NODE)
+        self.node_value.append(value)
+        return len(self.node_key) - 1
+
+    def _child(self, node, bit):
+        return self.child1[node] if bit else self.child0[node]
+
+    def _set_child(self, node, bit, child):
+        if bit:
+            self.child1[node] = child
+        else:
+            self.child0[node] = child
+
+    def _store(self, node, item):
+        slot = self.node_value[node]
+        if slot == NO_NODE:
+            self.node_value[node] = len(self.values)
+            self.values.append([item])
+        else:
+            self.values[slot].append(item)
+
+    # --- Building ---
+
+    def insert(self, network, prefix_len, item):
+        """Adds item under network/prefix_len (ints); host bits are ignored."""
+        key = network & prefix_to_mask(prefix_len)
+        node = self.root
+        while True:
+            length = self.node_length[node]
+            if length == prefix_len:
+                self._store(node, item)
+                return
+
+            bit = _bit_at(key, length)
+            child = self._child(node, bit)
+            if child == NO_NODE:
+                new = self._new_node(key, prefix_len)
+                self._store(new, item)
+                self._set_child(node, bit, new)
+                return
+
+            child_length = self.node_length[child]
+            common = _common_length(key, self.node_key[child], min(prefix_len, child_length))
+            if common == child_length:
+                node = child  # The child's prefix covers ours; keep descending
+                continue
+
+            if common == prefix_len:
+                # Our prefix sits between node and child
+                new = self._new_node(key, prefix_len)
+                self._store(new, item)
+                self._set_child(new, _bit_at(self.node_key[child], prefix_len), child)
+            else:
+                # Diverge after `common` bits: add a glue node with both below it
+                new = self._new_node(key & prefix_to_mask(common), common)
+                leaf = self._new_node(key, prefix_len)
+                self._store(leaf, item)
+                self._set_child(new, _bit_at(key, common), leaf)
+                self._set_child(new, _bit_at(self.node_key[child], common), child)
+            self._set_child(node, bit, new)
+            return
+
+    @classmethod
+    def bulk_load(cls, entries):
+        """
+        Builds a trie from (network, prefix_len, item) entries in O(n log n):
+        entries are grouped per prefix and sorted so that every prefix comes
+        right after its ancestors, then linked along the rightmost path with
+        a stack, without walking down from the root for each prefix.
+        """
+        grouped = {}
+        for network, prefix_len, item in entries:
+            key = (network & _MASKS[prefix_len], prefix_len)
+            items = grouped.get(key)
+            if items is None:
+                grouped[key] = [item]
+            else:
+                items.append(item)
+        return cls.from_groups(grouped)
+
+    @classmethod
+    def from_groups(cls, grouped):
+        """
+        Builds a trie from {(network, prefix_len): [items]}, with networks
+        already masked to their prefix length, as bulk_load does after
+        grouping its entries. The lists become the trie's payload lists.
+        """
+        trie = cls()
+        node_key, node_length, values = trie.node_key, trie.node_length, trie.values
+        new_node, set_child = trie._new_node, trie._set_child
+        stack = [trie.root]
+        previous_key = 0
+        for prefix in sorted(grouped):
+            key, prefix_len = prefix
+            if prefix_len == 0:
+                trie.node_value[trie.root] = len(values)  # 0.0.0.0/0 lives on the root
+                values.append(grouped[prefix])
+                continue
+            node = new_node(key, prefix_len, len(values))
+            values.append(grouped[prefix])
+
+            # Every node on the stack is a prefix of the previous key, so its
+            # common length with the new key is capped by this one value
+            common = _common_length(key, previous_key, prefix_len)
+            popped = NO_NODE
+            while node_length[stack[-1]] > common:
+                popped = stack.pop()
+
+            top = stack[-1]
+            if node_length[top] < common and popped != NO_NODE:
+                # The popped branch and the new prefix diverge below top: glue them
+                glue = new_node(key & _MASKS[common], common)
+                set_child(glue, _bit_at(node_key[popped], common), popped)
+                set_child(top, _bit_at(key, node_length[top]), glue)
+                stack.append(glue)
+                top = glue
+            set_child(top, _bit_at(key, node_length[top]), node)
+            stack.append(node)
+            previous_key = key
+        return trie
+
+    # --- Queries ---
+
+    def _matches(self, node, key):
+        length = self.node_length[node]
+        return length == 0 or (key ^ self.node_key[node]) >> (32 - length) == 0
+
+    def _path(self, key, max_length):
+        """Yields the nodes whose prefix contains key, down to max_length bits."""
+        node = self.root
+        while node != NO_NODE and self.node_length[node] <= max_length and self._matches(node, key):
+            yield node
+            length = self.node_length[node]
+            if length == 32:
+                return
+            node = self._child(node, _bit_at(key, length))
+
+    def longest_match(self, address):
+        """
+        Returns (network, prefix_len, items) of the most specific stored
+        prefix containing address (an int), or None.
+        """
+        best = None
+        for node in self._path(address, 32):
+            if self.node_value[node] != NO_NODE:
+                best = node
+        return self._entry(best) if best is not None else None
+
+    def covering(self, network, prefix_len):
+        """Returns all stored prefixes that contain network/prefix_len (itself included), shortest first."""
+        key = network & prefix_to_mask(prefix_len)
+        return [self._entry(node) for node in self._path(key, prefix_len)
+                if self.node_value[node] != NO_NODE]
+
+    def covered(self, network, prefix_len):
+        """Returns all stored prefixes inside network/prefix_len (itself included)."""
+        key = network & prefix_to_mask(prefix_len)
+        node = self.root
+        # Find the shallowest node at or below prefix_len bits on key's path
+        while node != NO_NODE and self.node_length[node] < prefix_len:
+            if not self._matches(node, key):
+                return []
+            node = self._child(node, _bit_at(key, self.node_length[node]))
+        if node == NO_NODE:
+            return []
+        if prefix_len and (key ^ self.node_key[node]) >> (32 - prefix_len):
+            return []  # The subtree below diverges from key within its first prefix_len bits
+        return [self._entry(n) for n in self._subtree(node) if self.node_value[n] != NO_NODE]
+
+    def overlapping(self, network, prefix_len):
+        """Returns all stored prefixes that contain or are contained in network/prefix_len."""
+        inner = self.covered(network, prefix_len)
+        outer = [entry for entry in self.covering(network, prefix_len) if entry[1] < prefix_len]
+        return outer + inner
+
+    def overlapping_pairs(self, nearest=False):
+        """
+        Yields (outer, inner) entry pairs for every stored prefix that
+        contains another stored prefix, in one depth-first pass. The pass
+        visits prefixes in (network, prefix_len) order. With nearest, each
+        inner prefix is paired only with the innermost prefix containing it.
+        """
+        stack = [(self.root, ())]
+        while stack:
+            node, ancestors = stack.pop()
+            if self.node_value[node] != NO_NODE:
+                entry = self._entry(node)
+                for outer in ancestors[-1:] if nearest else ancestors:
+                    yield outer, entry
+                ancestors = ancestors + (entry,)
+            for child in (self.child1[node], self.child0[node]):
+                if child != NO_NODE:
+                    stack.append((child, ancestors))
+
+    def _subtree(self, node):
+        stack = [node]
+        while stack:
+            node = stack.pop()
+            yield node
+            for child in (self.child1[node], self.child0[node]):
+                if child != NO_NODE:
+                    stack.append(child)
+
+    def _entry(self, node):
+        return self.node_key[node], self.node_length[node], self.values[self.node_value[node]]
+
+
+class PrefixIndex:
+    """
+    Prefix lookups over configured interface subnets, backed by a
+    PrefixTrie. Interfaces are kept as parallel columns (device, interface,
+    integer address), and each stored subnet carries the row numbers of
+    the interfaces addressed in it. Lookups return those interfaces as
+    {'device', 'interface', 'ip'} dicts.
+    """
+    def __init__(self, devices, interfaces, addresses, networks, prefix_lens, subnet_rows=None):
+        """
+        Takes parallel interface columns. subnet_rows, if the caller already
+        has it, is {(network, prefix_len): [rows]} over the same columns and
+        saves grouping the rows again; its lists are shared, not copied.
+        """
+        self.devices = devices
+        self.interfaces = interfaces
+        self.addresses = addresses
+        if subnet_rows is None:
+            self.trie = PrefixTrie.bulk_load(zip(networks, prefix_lens, range(len(addresses))))
+        else:
+            self.trie = PrefixTrie.from_groups(subnet_rows)
+
+    @classmethod
+    def from_network_data(cls, network_data):
+        devices, interfaces, ips, masks = [], [], [], []
+        for device_name, data in network_data.items():
+            for if_name, if_data in data.get('interfaces', {}).items():
+                if 'ip_address' in if_data and 'subnet_mask' in if_data:
+                    devices.append(device_name)
+                    interfaces.append(if_name)
+                    ips.append(if_data['ip_address'])
+                    masks.append(if_data['subnet_mask'])
+        rows, addresses, networks, prefix_lens = address_columns(ips, masks)  # Invalid IP data is skipped
+        return cls([devices[row] for row in rows], [interfaces[row] for row in rows],
+                   addresses, networks, prefix_lens)
+
+    def _interface(self, row):
+        return {'device': self.devices[row], 'interface': self.interfaces[row],
+                'ip': int_to_ip(self.addresses[row])}
+
+    def subnet_of(self, address):
+        """Returns (subnet string, interfaces) for the most specific subnet containing address, or None."""
+        match = self.trie.longest_match(ip_to_int(address))
+        if match is None:
+            return None
+        network, prefix_len, rows = match
+        return f"{int_to_ip(network)}/{prefix_len}", [self._interface(row) for row in rows]
+
+    def owners_of(self, address):
+        """
+        Returns the interfaces configured with exactly this address (e.g. a
+        default gateway), in the order they were indexed. Raises ValueError
+        for an invalid address.
+        """
+        value = ip_to_int(address)
+        rows = [row for _, _, members in self.trie.covering(value, 32)
+                for row in members if self.addresses[row] == value]
+        return [self._interface(row) for row in sorted(rows)]
+
+    def interfaces_in(self, network, wildcard):
+        """
+        Returns the interfaces an OSPF 'network <network> <wildcard> area N'
+        statement covers: those whose address lies inside the statement's range.
+        """
+        prefix_len = wildcard_to_prefix(ip_to_int(wildcard))
+        base = ip_to_int(network) & prefix_to_mask(prefix_len)
+        rows = []
+        for entry in self.trie.covered(base, prefix_len):
+            rows.extend(entry[2])
+        # A statement narrower than the subnet (e.g. a /32 for one address)
+        # still covers the interface whose address falls inside it
+        for sub_network, sub_len, members in self.trie.covering(base, prefix_len):
+            if sub_len < prefix_len:
+                rows.extend(row for row in members if self.addresses[row] & prefix_to_mask(prefix_len) == base)
+        return [self._interface(row) for row in rows]
+
+    def overlapping_subnets(self):
+        """
+        Returns (outer, inner) pairs of (network, prefix_len) subnets, one for
+        every configured subnet nested inside another, paired with its nearest
+        enclosing subnet. Pairs come in (network, prefix_len) order of inner.
+        """
+        return [(outer[:2], inner[:2]) for outer, inner in self.trie.overlapping_pairs(nearest=True)]
@@ -0,0 +1,682 @@
+# src/revalidation.py
+
+from bisect import bisect_left, insort
+from collections import defaultdict
+
+import networkx as nx
+
+from network_model import ip_to_int, prefix_to_mask, ALL_ONES
+from address_engine import address_columns
+from critical_links import CriticalLinkAnalyzer
+from traffic_engine import LinkLoadModel
+
+# Checks kept as per-scope partial results
+LOCAL_CHECKS = ('duplicate_ips', 'overlapping_subnets', 'missing_components',
+                'vlan_issues', 'gateway_issues', 'mtu_mismatches')
+# Checks that read the whole graph; updated per block and per routed destination, see GraphRevalidator
+GRAPH_CHECKS = ('network_loops', 'load_analysis', 'load_balancing_recommendations')
+RECOMMENDED_ROUTES = 3  # Alternate routes per heavy link, as in _recommend_load_balancing
+LOAD_RESIDUE_BPS = 1e-6  # Loads left this close to zero by subtracting a rerouted share are dropped
+
+
+class Revalidator:
+    """
+    Incremental validation for a NetworkValidator.
+
+    Every local check's result is kept split by scope: an address for
+    duplicate IPs, a subnet for overlaps, link MTUs and dangling links, a
+    device for host addresses, VLANs, gateways and isolated devices. The
+    address and subnet indexes behind them are kept per device, so a changed
+    device is re-indexed on its own, and only the scopes it touches are
+    recomputed:
+
+    - duplicate_ips: its old and new addresses
+    - overlapping_subnets: the device's addresses, and its old and new
+      subnets plus every subnet nested inside them, whose nearest enclosing
+      subnet may have changed
+    - mtu_mismatches, dangling links: its old and new subnets
+    - vlan_issues, isolated devices: the device (and changed-edge endpoints)
+    - gateway_issues: the device, plus devices whose gateway is one of its
+      old or new addresses
+
+    The graph-wide checks (network_loops, load_analysis and
+    load_balancing_recommendations) are kept per biconnected block and per
+    link by a GraphRevalidator, which reruns them only for the blocks that
+    contain changed links and the traffic routed across them.
+
+    Results are merged back into validator.results by sorting the partial
+    results of each changed check. Issues come out in device and subnet
+    order, which can differ from the order of a full run (duplicate IPs are
+    not grouped by subnet, for one); the issues themselves are the same.
+    """
+    def __init__(self, validator, graph_checks=True):
+        self.validator = validator
+        self.rows = {}       # Device -> [(interface, address, network, prefix_len)] for its valid addresses
+        self.gateways = {}   # Device -> default gateway, as last seen
+        self.address_devices = defaultdict(set)
+        self.subnet_devices = defaultdict(set)
+        self.subnets = []    # Distinct subnets, sorted as (network, prefix_len)
+        self.gateway_users = defaultdict(set)  # Gateway address -> devices using it
+        self.partials = {name: {} for name in LOCAL_CHECKS}  # Check -> {scope: (sort key, [issues])}
+        self._sequence = {}  # Device -> insertion counter, orders devices like the validator's indexes
+        self._next_sequence = 0
+        self._dirty = set()  # Checks whose partial results changed since the last merge
+        self.graph = None    # GraphRevalidator, built when the graph-wide checks first run
+        self._pending_devices = set()  # Changes not yet applied to the graph-wide checks
+        self._pending_edges = set()
+        self._build(graph_checks)
+
+    def _build(self, graph_checks):
+        """Indexes every device and computes every scope from scratch."""
+        validator = self.validator
+        for device in validator.device_addresses:
+            self._assign_sequence(device)
+            self.rows[device] = []
+        devices, interfaces, addresses, networks, prefix_lens = validator._address_columns()
+        for row in zip(devices, interfaces, addresses, networks, prefix_lens):
+            self.rows[row[0]].append(row[1:])
+        for device, rows in self.rows.items():
+            for _, address, network, prefix_len in rows:
+                self.address_devices[address].add(device)
+                self.subnet_devices[(network, prefix_len)].add(device)
+        for device, gateway in validator.default_gateways.items():
+            self.gateways[device] = gateway
+            self.gateway_users[self._gateway_key(gateway)].add(device)
+        self.subnets = sorted(self.subnet_devices)
+
+        graph_nodes = set(validator.graph) if validator.graph is not None else set()
+        self._refresh(set(self.rows) | graph_nodes, set(self.address_devices), set(self.subnet_devices),
+                      nested=False)
+        if graph_checks:
+            self._update_graph_checks()
+
+    def update(self, changed_devices, changed_edges=(), graph_checks=True):
+        """
+        Re-indexes the changed devices and recomputes the scopes they touch.
+        graph_checks=False leaves the graph-wide results as they were, even
+        if edges changed; a later call with graph_checks=True catches up.
+        """
+        validator = self.validator
+        devices = set(changed_devices)
+        addresses, subnets = set(), set()
+        for device in devices:
+            old_rows = self.rows.pop(device, [])
+            self._unindex(device, old_rows)
+            old_gateway = self.gateways.pop(device, None)
+            if old_gateway is not None:
+                self.gateway_users[self._gateway_key(old_gateway)].discard(device)
+
+            rows = []
+            if device in validator.device_addresses:
+                self._assign_sequence(device)
+                rows = self._device_rows(validator.device_addresses[device])
+                self.rows[device] = rows
+                self._index(device, rows)
+            else:
+                self._sequence.pop(device, None)
+            gateway = validator.default_gateways.get(device)
+            if gateway is not None:
+                self.gateways[device] = gateway
+                self.gateway_users[self._gateway_key(gateway)].add(device)
+
+            for _, address, network, prefix_len in old_rows + rows:
+                addresses.add(address)
+                subnets.add((network, prefix_len))
+
+        endpoints = {node for edge in changed_edges for node in edge}
+        self._refresh(devices | endpoints, addresses, subnets)
+        self._pending_devices |= devices
+        self._pending_edges.update(_edge_key(*edge) for edge in changed_edges)
+        if graph_checks:
+            self._update_graph_checks()
+
+    def _assign_sequence(self, device):
+        if device not in self._sequence:
+            self._sequence[device] = self._next_sequence
+            self._next_sequence += 1
+
+    @staticmethod
+    def _device_rows(device_addresses):
+        if_names = [if_name for if_name, _, _ in device_addresses]
+        rows, addresses, networks, prefix_lens = address_columns(
+            [ip for _, ip, _ in device_addresses], [mask for _, _, mask in device_addresses])
+        return [(if_names[row], *values) for row, *values in zip(rows, addresses, networks, prefix_lens)]
+
+    @staticmethod
+    def _gateway_key(gateway):
+        # Invalid gateways keep their string, which never equals an address
+        try:
+            return ip_to_int(gateway)
+        except ValueError:
+            return gateway
+
+    def _index(self, device, rows):
+        for _, address, network, prefix_len in rows:
+            self.address_devices[address].add(device)
+            subnet = (network, prefix_len)
+            if subnet not in self.subnet_devices:
+                insort(self.subnets, subnet)
+            self.subnet_devices[subnet].add(device)
+
+    def _unindex(self, device, rows):
+        for _, address, network, prefix_len in rows:
+            subnet = (network, prefix_len)
+            for index, key in ((self.address_devices, address), (self.subnet_devices, subnet)):
+                members = index.get(key)
+                if members is None:
+                    continue
+                members.discard(device)
+                if not members:
+                    del index[key]
+                    if index is self.subnet_devices:
+                        del self.subnets[bisect_left(self.subnets, subnet)]
+
+    def _matching_rows(self, index, key, column):
+        """[(rank, device, row)] for rows whose column equals key, in full-run row order."""
+        matches = []
+        for device in sorted(index.get(key, ()), key=self._sequence.__getitem__):
+            for position, row in enumerate(self.rows[device]):
+                if (row[column] if column is not None else row[2:]) == key:
+                    matches.append(((self._sequence[device], position), device, row))
+        return matches
+
+    def _address_rows(self, address):
+        return self._matching_rows(self.address_devices, address, 1)
+
+    def _subnet_rows(self, subnet):
+        return self._matching_rows(self.subnet_devices, subnet, None)
+
+    def _enclosing_subnet(self, subnet):
+        """Nearest configured subnet strictly containing subnet, or None."""
+        network, prefix_len = subnet
+        for shorter in range(prefix_len - 1, -1, -1):
+            candidate = (network & prefix_to_mask(shorter), shorter)
+            if candidate in self.subnet_devices:
+                return candidate
+        return None
+
+    def _nested_subnets(self, subnet):
+        """Configured subnets strictly inside subnet."""
+        network, prefix_len = subnet
+        last = network | (ALL_ONES >> prefix_len)
+        nested = []
+        for index in range(bisect_left(self.subnets, (network, prefix_len + 1)), len(self.subnets)):
+            if self.subnets[index][0] > last:
+                break
+            nested.append(self.subnets[index])
+        return nested
+
+    def _set(self, check, scope, key, issues):
+        """Stores one scope's issues, marking the check for merging only if they changed."""
+        partials = self.partials[check]
+        if issues:
+            if partials.get(scope) != (key, issues):
+                partials[scope] = (key, issues)
+                self._dirty.add(check)
+        elif partials.pop(scope, None) is not None:
+            self._dirty.add(check)
+
+    def _refresh(self, devices, addresses, subnets, nested=True):
+        """Recomputes the partial results of the given scopes and merges them into the results."""
+        validator = self.validator
+        for address in addresses:
+            members = self._address_rows(address)
+            issues = []
+            if len(members) > 1:
+                issues.append(validator._duplicate_ip_issue(
+                    address, [(device, tuple(row[2:])) for _, device, row in members]))
+            self._set('duplicate_ips', address, members[0][0] if members else None, issues)
+
+        for subnet in subnets:
+            members = self._subnet_rows(subnet)
+            key = (1, members[0][0]) if members else None
+            link_members = [(device, row) for _, device, row in members]
+            issue = None
+            if len({device for device, _ in link_members}) > 1:
+                issue = validator._mtu_issue(subnet, [(device, row[0], validator._interface_mtu(device, row[0]))
+                                                      for device, row in link_members])
+            self._set('mtu_mismatches', subnet, key, [issue] if issue else [])
+            issue = validator._dangling_link_issue(subnet, [(device, row[0]) for device, row in link_members]) \
+                if members else None
+            self._set('missing_components', ('subnet', subnet), key, [issue] if issue else [])
+
+        inner_subnets = set(subnets)
+        if nested:
+            for subnet in subnets:
+                inner_subnets.update(self._nested_subnets(subnet))
+        for inner in inner_subnets:
+            outer = self._enclosing_subnet(inner) if inner in self.subnet_devices else None
+            issues = []
+            if outer is not None:
+                issues.append(validator._overlap_issue(outer, self._subnet_device_names(outer),
+                                                       inner, self._subnet_device_names(inner)))
+            self._set('overlapping_subnets', ('overlap', inner), (1, inner), issues)
+
+        owners_changed = {user for address in addresses for user in self.gateway_users.get(address, ())}
+        for device in devices | owners_changed:
+            rows = self.rows.get(device, [])
+            key = (0, self._sequence.get(device, float('inf')), device)
+            gateway = self.gateways.get(device)
+            issues = []
+            if gateway is not None:
+                gateway_key = self._gateway_key(gateway)
+                owned_by = None if isinstance(gateway_key, str) else \
+                    [(owner, row[0]) for _, owner, row in self._address_rows(gateway_key)]
+                issues = validator._device_gateway_issues(
+                    device, gateway, owned_by, [(network, prefix_len) for _, _, network, prefix_len in rows])
+            self._set('gateway_issues', ('gateway', device), key, issues)
+            if device not in devices:
+                continue
+
+            issues = [validator._host_address_issue(device, *row[1:]) for row in rows]
+            self._set('overlapping_subnets', ('host', device), (0, key), [issue for issue in issues if issue])
+
+            access_ports, trunks = validator._switchport_groups(validator.device_switchports.get(device, []))
+            self._set('vlan_issues', ('ports', device), key,
+                      validator._device_vlan_issues(device, access_ports, trunks))
+            issues = [validator._svi_issue(device, row[0]) for row in rows]
+            self._set('vlan_issues', ('svi', device), (1,) + key[1:], [issue for issue in issues if issue])
+
+            issue = validator._missing_gateway_issue(device) if rows else None
+            self._set('gateway_issues', ('missing', device), (1,) + key[1:], [issue] if issue else [])
+            issue = validator._isolated_device_issue(device)
+            self._set('missing_components', ('device', device), (0, key), [issue] if issue else [])
+
+        for name in LOCAL_CHECKS:
+            if name in self._dirty or name not in validator.results:
+                validator.results[name] = [issue for _, issues in sorted(self.partials[name].values(),
+                                                                         key=lambda partial: partial[0])
+                                           for issue in issues]
+        self._dirty = set()
+
+    def _subnet_device_names(self, subnet):
+        return list(dict.fromkeys(device for _, device, _ in self._subnet_rows(subnet)))
+
+    def _update_graph_checks(self):
+        """
+        Applies the pending changes to the graph-wide checks. The first call
+        runs any that have no result yet in full, then keeps their state.
+        """
+        validator = self.validator
+        if validator.graph is None:
+            return
+        if self.graph is None:
+            missing = [name for name in GRAPH_CHECKS if name not in validator.results]
+            if missing or self._pending_edges:
+                validator._critical_links = None
+                results, _ = validator.checks.run(validator, names=GRAPH_CHECKS, executor='serial')
+                validator.results.update(results)
+            self.graph = GraphRevalidator(validator)
+        elif self._pending_devices or self._pending_edges:
+            self.graph.update(self._pending_devices, self._pending_edges)
+        self._pending_devices, self._pending_edges = set(), set()
+
+
+def _edge_key(u, v):
+    return (u, v) if u <= v else (v, u)
+
+
+class GraphRevalidator:
+    """
+    Incremental network_loops, load_analysis and load_balancing_recommendations
+    for a NetworkValidator whose graph changed.
+
+    Blocks: every biconnected block is kept as a CriticalLinkAnalyzer and
+    its id there, either the analyzer of the last full run or one built
+    for just the region around a change. Removing a link can only split the
+    block it was in. Adding links merges blocks only along the cycles the
+    new links close; when the endpoints of each group of new links (joined
+    through devices that had no links before) all lie in one block, the
+    cycles stay inside it. The blocks of the removed links and those
+    blocks are then decomposed again together with the new links, and
+    every other block is kept. New links between different blocks can
+    merge any number of blocks in between, and redo the decomposition of
+    the whole graph.
+
+    Loads: the per-direction loads of the last LinkLoadModel run are kept.
+    Traffic is routed per destination gateway, so a transit link that was
+    added, removed or re-costed only moves the traffic toward destinations
+    with a shortest path across it, before or after the change. That
+    traffic is routed again with the old and the new links and the
+    difference applied. Changes at PCs change the demand itself (the
+    traffic each PC sends, or where it enters), so they reroute everything,
+    as does ecmp=False, where next hops depend on node order.
+
+    Recommendations: alternate paths count hops inside a link's block, so
+    they keep while none of their links is removed; removing links
+    elsewhere cannot shorten a route or add a disjoint one. A link added to
+    the block can, unless the link already has all its routes and the new
+    link is too far from both ends to give a shorter one (measured with a
+    BFS from each end of the new link). Only the recommendations of links
+    that became heavy or fail these tests are recomputed.
+
+    Only the utilization entries of links whose loads or bandwidth changed
+    are recomputed. Sample loops are listed per block, so they can be other
+    (equally valid) cycles than a full run's cycle basis, and a kept
+    recommendation can name other routes than a new search would.
+    """
+    def __init__(self, validator):
+        self.validator = validator
+        self.blocks = {}       # Block id -> (CriticalLinkAnalyzer, block id in that analyzer)
+        self.edge_block = {}   # Sorted edge key -> block id
+        self.node_blocks = defaultdict(set)
+        self.loop_counts = {}  # Block id -> independent loops, for blocks that have any
+        self._next_block = 0
+        self.node_order = {node: position for position, node in enumerate(validator.graph)}
+        self._next_position = len(self.node_order)
+        self.partials = {name: {} for name in GRAPH_CHECKS[1:]}  # Check -> {edge key: (sort key, [result])}
+        self.routes = {}       # Heavy link -> (links of its alternate paths, hops of the shortest, path count)
+
+        self._add_blocks(validator.critical_links())
+        if validator.link_loads is None:
+            validator.results['load_analysis'] = validator._analyze_link_utilization()
+        self.model, self.loads, self.traffic_per_pc = validator.link_loads
+        self._adopt_results()
+
+    def _adopt_results(self):
+        """Splits the current load analysis and recommendations into per-link partial results."""
+        validator = self.validator
+        heavy = []
+        for entry in validator.results.get('load_analysis', []):
+            u, v = entry['link'].split('-')
+            self.partials['load_analysis'][_edge_key(u, v)] = (self._link_order(u, v), [entry])
+            if validator.graph.has_edge(u, v):
+                heavy.append(_edge_key(u, v))
+        recommendations = validator.results.get('load_balancing_recommendations', [])
+        if len(recommendations) == len(heavy):
+            for key, recommendation in zip(heavy, recommendations):
+                self.partials['load_balancing_recommendations'][key] = (self._link_order(*key), [recommendation])
+        else:
+            self._recommend(heavy)
+            self._merge('load_balancing_recommendations')
+
+    def update(self, devices, edges):
+        """Brings the graph-wide results up to date after the given devices and links changed."""
+        validator = self.validator
+        graph = validator.graph
+        nodes = set(devices) | {node for edge in edges for node in edge}
+        for node in nodes:
+            if node not in graph:
+                self.node_order.pop(node, None)
+            elif node not in self.node_order:
+                self.node_order[node] = self._next_position
+                self._next_position += 1
+
+        added = [key for key in edges if key not in self.edge_block and graph.has_edge(*key)]
+        removed = {key for key in edges if key in self.edge_block and not graph.has_edge(*key)}
+        changed_blocks = self._update_blocks(added, removed)
+        if changed_blocks:
+            domains = [(loop_count, block_id, *self.blocks[block_id])
+                       for block_id, loop_count in self.loop_counts.items()]
+            validator.results['network_loops'] = validator._block_loop_issues(domains)
+
+        links = self._update_loads(nodes, edges)
+        if links is None:
+            links = set(self.partials['load_analysis']) | {_edge_key(u, v) for u, v in graph.edges}
+        for key in links:
+            entry = None
+            if graph.has_edge(*key):
+                u, v = self._oriented(*key)
+                entry = validator._link_utilization(u, v, graph.adj[u][v].get('bandwidth'), self.loads)
+            self._set('load_analysis', key, entry)
+        self._merge('load_analysis')
+
+        heavy = self.partials['load_analysis']
+        recommended = self.partials['load_balancing_recommendations']
+        grown = defaultdict(list)
+        for key in added:
+            if key in self.edge_block:
+                grown[self.edge_block[key]].append(key)
+        stale = [key for key in recommended if key not in heavy]
+        reach = {}
+        for key in heavy:
+            block_id = self.edge_block.get(key)
+            routes = self.routes.get(key)
+            if key not in recommended:
+                stale.append(key)
+            elif routes is None:
+                if block_id in changed_blocks:  # Taken from a full run, so its paths are not known
+                    stale.append(key)
+            elif routes[0] & removed or self._shortened(key, routes, grown.get(block_id, ()), reach):
+                stale.append(key)
+        self._recommend(stale)
+        self._merge('load_balancing_recommendations')
+
+    # --- Blocks ---
+
+    def _add_blocks(self, analyzer):
+        """Registers every block of analyzer and returns their new ids."""
+        added = set()
+        for local_id, block in enumerate(analyzer.blocks):
+            block_id = self._next_block
+            self._next_block += 1
+            self.blocks[block_id] = (analyzer, local_id)
+            for u, v in block:
+                self.edge_block[_edge_key(u, v)] = block_id
+                self.node_blocks[u].add(block_id)
+                self.node_blocks[v].add(block_id)
+            loop_count = analyzer.block_loop_count(local_id)
+            if loop_count:
+                self.loop_counts[block_id] = loop_count
+            added.add(block_id)
+        return added
+
+    def _drop_block(self, block_id):
+        analyzer, local_id = self.blocks.pop(block_id)
+        for u, v in analyzer.blocks[local_id]:
+            key = _edge_key(u, v)
+            if self.edge_block.get(key) == block_id:
+                del self.edge_block[key]
+            for node in (u, v):
+                node_blocks = self.node_blocks[node]
+                node_blocks.discard(block_id)
+                if not node_blocks:
+                    del self.node_blocks[node]
+        self.loop_counts.pop(block_id, None)
+
+    def _update_blocks(self, added, removed):
+        """
+        Re-decomposes the blocks that the added and removed links (edge keys)
+        touch. Returns the ids of the blocks dropped and added.
+        """
+        validator = self.validator
+        graph = validator.graph
+        dirty = {self.edge_block[key] for key in removed}
+
+        shared = self._merged_block_of_groups(added)
+        if shared is None:
+            dropped = set(self.blocks)
+            for block_id in dropped:
+                self._drop_block(block_id)
+            validator._critical_links = None
+            return dropped | self._add_blocks(validator.critical_links())
+        dirty |= shared
+        if not dirty and not added:
+            return set()
+
+        region = nx.Graph()
+        for block_id in dirty:
+            analyzer, local_id = self.blocks[block_id]
+            region.add_edges_from(edge for edge in analyzer.blocks[local_id] if graph.has_edge(*edge))
+        region.add_edges_from(added)
+        for block_id in dirty:
+            self._drop_block(block_id)
+        validator._critical_links = None  # No longer matches the graph; the blocks live here now
+        return dirty | self._add_blocks(CriticalLinkAnalyzer(region).analyze())
+
+    def _merged_block_of_groups(self, added):
+        """
+        Groups the new links through nodes that had no links before. Returns
+        the blocks holding all of each group's previously linked endpoints,
+        or None if some group joins nodes that share no block.
+        """
+        parent = {}
+
+        def find(node):
+            while parent[node] != node:
+                parent[node] = parent[parent[node]]
+                node = parent[node]
+            return node
+
+        for u, v in added:
+            new_ends = [node for node in (u, v) if node not in self.node_blocks]
+            for node in new_ends:
+                parent.setdefault(node, node)
+            if len(new_ends) == 2:
+                parent[find(u)] = find(v)
+
+        groups = []
+        terminals = defaultdict(set)
+        for u, v in added:
+            if u in self.node_blocks and v in self.node_blocks:
+                groups.append({u, v})
+            elif u in self.node_blocks:
+                terminals[find(v)].add(u)
+            elif v in self.node_blocks:
+                terminals[find(u)].add(v)
+        groups += terminals.values()
+
+        shared = set()
+        for group in groups:
+            if len(group) < 2:
+                continue
+            common = set.intersection(*(self.node_blocks[node] for node in group))
+            if not common:
+                return None
+            shared |= common
+        return shared
+
+    # --- Loads ---
+
+    def _update_loads(self, nodes, edges):
+        """
+        Updates self.loads for the changes at nodes. Returns the links whose
+        utilization entries need recomputing, or None if all do.
+        """
+        validator = self.validator
+        graph = validator.graph
+        model = self.model
+        links = set(edges)
+        for node in nodes:
+            if node in graph:
+                links.update(_edge_key(node, neighbor) for neighbor in graph.adj[node])
+
+        endpoint_links = any(node in model.endpoint_set or
+                             (node in graph and graph.nodes[node].get('type') == model.endpoint_type)
+                             for edge in edges for node in edge)
+        # A changed gateway link can also move an attached PC to other gateways
+        attached = {neighbor for node in nodes if node in graph for neighbor in graph.adj[node]
+                    if neighbor in model.endpoint_set}
+        if not model.ecmp or endpoint_links or model.endpoints_changed(nodes | attached):
+            validator._analyze_link_utilization(self.traffic_per_pc, ecmp=model.ecmp)
+            self.model, self.loads, _ = validator.link_loads
+            return None
+
+        changes = model.changed_links(nodes)
+        if not changes:
+            return links
+        new_model = LinkLoadModel(graph, endpoint_type=model.endpoint_type, ecmp=True,
+                                  reference_kbps=model.reference_kbps)
+        destinations = model.gateway_names()
+        affected = model.tight_destinations({key: old for key, (old, _) in changes.items() if old is not None},
+                                            destinations)
+        affected |= new_model.tight_destinations({key: new for key, (_, new) in changes.items() if new is not None},
+                                                 destinations)
+        unrouted = model.unrouted  # Total of the last run, which the old routes toward affected are part of
+        if affected:
+            before = model.uniform_loads(self.traffic_per_pc, destinations=affected)
+            unrouted -= model.unrouted - unrouted
+            after = new_model.uniform_loads(self.traffic_per_pc, destinations=affected)
+            for arc in before.keys() | after.keys():
+                load = self.loads.get(arc, 0.0) + after.get(arc, 0.0) - before.get(arc, 0.0)
+                if abs(load) > LOAD_RESIDUE_BPS:
+                    self.loads[arc] = load
+                else:
+                    self.loads.pop(arc, None)
+                links.add(_edge_key(*arc))
+        new_model.unrouted += unrouted
+        validator._warn_unrouted(new_model.unrouted)
+        self.model = new_model
+        validator.link_loads = (new_model, self.loads, self.traffic_per_pc)
+        return links
+
+    # --- Partial results ---
+
+    def _recommend(self, links):
+        """Recomputes the load-balancing recommendation of each heavy link among links."""
+        validator = self.validator
+        for key in links:
+            recommendation = None
+            self.routes.pop(key, None)
+            if key in self.partials['load_analysis'] and validator.graph.has_edge(*key):
+                analyzer, _ = self.blocks[self.edge_block[key]]
+                u, v = self._oriented(*key)
+                paths = analyzer.alternate_paths(u, v, k=RECOMMENDED_ROUTES)
+                path_links = {_edge_key(a, b) for path in paths for a, b in zip(path, path[1:])}
+                self.routes[key] = (path_links, len(paths[0]) - 1 if paths else 0, len(paths))
+                recommendation = validator._load_balancing_recommendation(u, v, paths)
+            self._set('load_balancing_recommendations', key, recommendation)
+
+    def _shortened(self, key, routes, new_links, reach):
+        """
+        Whether any of new_links, added to key's block, can give key more
+        alternate routes or a shorter one. reach caches a hop-count BFS from
+        each end of each new link, up to the hops it was first asked for.
+        """
+        if not new_links:
+            return False
+        _, hops, count = routes
+        if count < RECOMMENDED_ROUTES:
+            return True
+        u, v = key
+        for a, b in new_links:
+            from_a, from_b = self._reach(a, key, hops, reach), self._reach(b, key, hops, reach)
+            far = hops  # A route through a-b has at least this many hops
+            if min(from_a.get(u, far) + 1 + from_b.get(v, far), from_b.get(u, far) + 1 + from_a.get(v, far)) < hops:
+                return True
+        return False
+
+    def _reach(self, source, key, limit, reach):
+        """Hop counts from source within key's block, up to limit hops, cached in reach."""
+        cached = reach.get(source)
+        if cached is not None and cached[0] >= limit:
+            return cached[1]
+        analyzer, local_id = self.blocks[self.edge_block[key]]
+        adjacency = analyzer.block_adjacency(local_id)
+        distance = {source: 0}
+        frontier = [source]
+        for hops in range(1, limit):
+            next_frontier = []
+            for node in frontier:
+                for neighbor in adjacency[node]:
+                    if neighbor not in distance:
+                        distance[neighbor] = hops
+                        next_frontier.append(neighbor)
+            frontier = next_frontier
+            if not frontier:
+                break
+        reach[source] = (limit, distance)
+        return distance
+
+    def _set(self, check, key, result):
+        """Stores one link's result; returns whether it changed."""
+        partials = self.partials[check]
+        if result is None:
+            return partials.pop(key, None) is not None
+        partial = (self._link_order(*key), [result])
+        if partials.get(key) == partial:
+            return False
+        partials[key] = partial
+        return True
+
+    def _merge(self, check):
+        self.validator.results[check] = [result for _, results in sorted(self.partials[check].values(),
+                                                                          key=lambda partial: partial[0])
+                                         for result in results]
+
+    def _oriented(self, u, v):
+        """u and v in the order graph.edges() reports them: the node added first leads."""
+        return (u, v) if self._link_order(u, v)[0] == self.node_order.get(u) else (v, u)
+
+    def _link_order(self, u, v):
+        return tuple(sorted((self.node_order.get(u, self._next_position), self.node_order.get(v, self._next_position))))
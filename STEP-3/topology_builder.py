@@ -1,72 +1,290 @@
 # src/topology_builder.py
 
 import networkx as nx
+import pyvis
 from pyvis.network import Network
-import ipaddress
+from collections import defaultdict
 from datetime import datetime
+import hashlib
+import json
+import math
 import os
+import re
+from network_model import network_key, int_to_ip
+from address_engine import subnet_keys
+from layout_engine import force_layout, spiral_offsets
+
+LARGE_GRAPH_NODES = 500    # Above this, visualize_topology draws a precomputed static layout
+CLUSTER_THRESHOLD = 2000   # Above this, the static view collapses nodes into expandable clusters
+LAYOUT_SPACING = 60        # Pixels per sqrt(node) of layout radius
+
+# Expands a collapsed cluster on double-click. Edges are re-aggregated so
+# every link is drawn between the nodes or clusters currently visible.
+CLUSTER_SCRIPT = """
+<script type="text/javascript">
+  var clusterMembers = %(clusters)s;
+  var topologyLinks = %(links)s;
+  var memberOf = {};
+  for (var clusterId in clusterMembers) {
+    clusterMembers[clusterId].forEach(function (node) { memberOf[node.id] = clusterId; });
+  }
+
+  function visibleEnd(nodeId) {
+    return memberOf.hasOwnProperty(nodeId) ? memberOf[nodeId] : nodeId;
+  }
+
+  function aggregateLinks() {
+    var merged = {};
+    var result = [];
+    topologyLinks.forEach(function (link) {
+      var a = visibleEnd(link[0]), b = visibleEnd(link[1]);
+      if (a === b) { return; }
+      var key = a < b ? a + "\\n" + b : b + "\\n" + a;
+      if (merged.hasOwnProperty(key)) {
+        merged[key].count += 1;
+        merged[key].title = merged[key].count + " links";
+        merged[key].width = 1 + Math.log2(merged[key].count);
+      } else {
+        merged[key] = {from: a, to: b, title: link[2], count: 1, width: 1};
+        result.push(merged[key]);
+      }
+    });
+    return result;
+  }
+
+  network.on("doubleClick", function (params) {
+    if (params.nodes.length !== 1 || !clusterMembers.hasOwnProperty(params.nodes[0])) { return; }
+    var clusterId = params.nodes[0];
+    var members = clusterMembers[clusterId];
+    delete clusterMembers[clusterId];
+    members.forEach(function (node) { delete memberOf[node.id]; });
+    nodes.remove(clusterId);
+    nodes.add(members);
+    edges.clear();
+    edges.add(aggregateLinks());
+  });
+</script>
+"""
 
 class TopologyBuilder:
     """
     Builds a network topology graph from parsed data and creates a visualization.
+
+    After build_graph, the graph can be patched in place with add_device,
+    update_device and remove_device. These use the persistent subnet index
+    built alongside the graph, so a change costs time proportional to the
+    changed device's interfaces and their subnets, not to the whole network.
     """
-    def __init__(self, network_data):
+    def __init__(self, network_data=None):
         self.network_data = network_data
         self.graph = nx.Graph()
+        # Addressed interfaces per device, filled by add_device
+        self.device_interfaces = {}
+        # Subnet key -> interfaces in that subnet, filled by build_graph
+        self.subnet_index = defaultdict(list)
+        self._device_sequence = {}  # Device -> insertion counter, orders interfaces like a full scan
+        self._next_sequence = 0
+        self._graph_built = False
+
+    def add_device(self, device):
+        """
+        Adds a single parsed device record (as yielded by
+        NetworkConfigParser.iter_devices) as a node and indexes its addressed
+        interfaces for link discovery. Adding a hostname again replaces it.
+
+        Before build_graph this only records the device. Afterwards it links
+        the device into the existing graph and returns (added, removed) sets
+        of edges, each edge a sorted (device, device) tuple.
+        """
+        if self._graph_built:
+            return self.update_device(device)
+        self._add_device(device['hostname'], device)
+        return set(), set()
 
-    def build_graph(self):
+    def update_device(self, device):
+        """
+        Replaces (or adds) a device in the built graph and re-links only its
+        own edges. Returns (added, removed) sets of sorted edge tuples.
+        """
+        device_name = device['hostname']
+        old_neighbors = set(self.graph[device_name]) if device_name in self.graph else set()
+
+        self._unindex_device(device_name)
+        self._add_device(device_name, device)
+        self._index_interfaces(self.device_interfaces[device_name])
+        new_neighbors = self._relink_device(device_name)
+
+        added = {self._edge_key(device_name, n) for n in new_neighbors - old_neighbors}
+        removed = {self._edge_key(device_name, n) for n in old_neighbors - new_neighbors}
+        return added, removed
+
+    def remove_device(self, device_name):
+        """
+        Removes a device and all of its links from the built graph. Returns
+        (added, removed) sets of sorted edge tuples; added is always empty.
+        """
+        if device_name not in self.graph:
+            print(f"Warning: Device {device_name} is not in the topology.")
+            return set(), set()
+
+        removed = {self._edge_key(device_name, n) for n in self.graph[device_name]}
+        self._unindex_device(device_name)
+        self.device_interfaces.pop(device_name, None)
+        self._device_sequence.pop(device_name, None)
+        self.graph.remove_node(device_name)
+        return set(), removed
+
+    def _add_device(self, device_name, data):
+        device_type = self._get_device_type(device_name)
+        self.graph.add_node(device_name, type=device_type, title=f"{device_type}: {device_name}")
+
+        if device_name not in self._device_sequence:
+            self._device_sequence[device_name] = self._next_sequence
+            self._next_sequence += 1
+        sequence = self._device_sequence[device_name]
+
+        interfaces = []
+        for if_name, if_data in data.get('interfaces', {}).items():
+            if 'ip_address' in if_data:
+                interfaces.append({
+                    'device': device_name,
+                    'interface_name': if_name,
+                    'ip': if_data['ip_address'],
+                    'mask': if_data['subnet_mask'],
+                    'bandwidth': if_data.get('bandwidth'),
+                    'rank': (sequence, len(interfaces))
+                })
+        self.device_interfaces[device_name] = interfaces
+
+    def _index_interfaces(self, interfaces):
+        """
+        Computes the subnet key of each interface in bulk and appends it to
+        the subnet index. Interfaces with invalid addresses are not indexed.
+        """
+        keys = subnet_keys([iface['ip'] for iface in interfaces],
+                           [iface['mask'] for iface in interfaces])
+        for iface, key in zip(interfaces, keys):
+            iface['subnet'] = key
+            if key is None:
+                try:
+                    network_key(iface['ip'], iface['mask'])
+                except ValueError as e:
+                    print(f"Warning: Could not process IP {iface['ip']} on {iface['device']}. Error: {e}")
+                continue
+            self.subnet_index[key].append(iface)
+
+    def _unindex_device(self, device_name):
+        for iface in self.device_interfaces.get(device_name, []):
+            key = iface.get('subnet')
+            if key is None or key not in self.subnet_index:
+                continue
+            members = [member for member in self.subnet_index[key] if member is not iface]
+            if members:
+                self.subnet_index[key] = members
+            else:
+                del self.subnet_index[key]
+
+    def _relink_device(self, device_name):
+        """
+        Recomputes every edge of one device from the subnet index. For each
+        neighbor, the link that a full rebuild would have written last
+        supplies the edge metadata. Returns the new set of neighbors.
+        """
+        best_links = {}
+        for iface in self.device_interfaces[device_name]:
+            key = iface.get('subnet')
+            if key is None:
+                continue
+            for other in self.subnet_index[key]:
+                if other['device'] == device_name:
+                    continue
+                first, second = (iface, other) if iface['rank'] < other['rank'] else (other, iface)
+                order = (first['rank'], second['rank'])
+                current = best_links.get(other['device'])
+                if current is None or order > current[0]:
+                    best_links[other['device']] = (order, first, second)
+
+        for neighbor in set(self.graph[device_name]) - set(best_links):
+            self.graph.remove_edge(device_name, neighbor)
+        for _, if1, if2 in best_links.values():
+            self._add_link(if1, if2)
+        return set(best_links)
+
+    def _add_link(self, if1, if2):
+        # Add an edge with metadata
+        self.graph.add_edge(
+            if1['device'], 
+            if2['device'],
+            title=f"Link between {if1['device']} ({if1['interface_name']}) and {if2['device']} ({if2['interface_name']})",
+            bandwidth=if1.get('bandwidth', 'N/A')
+        )
+
+    @staticmethod
+    def _edge_key(u, v):
+        return (u, v) if u <= v else (v, u)
+
+    def build_graph(self, devices=None):
         """
         Constructs the network graph using NetworkX based on parsed configurations.
+
+        Devices come from the network_data passed to the constructor, or from
+        the optional devices iterable, which is consumed one record at a time
+        (e.g. parser.iter_devices()) so the full parsed corpus is never held.
         """
         # 1. Add all devices as nodes
-        for device_name, data in self.network_data.items():
-            device_type = self._get_device_type(device_name)
-            self.graph.add_node(device_name, type=device_type, title=f"{device_type}: {device_name}")
+        if devices is not None:
+            for device in devices:
+                self._add_device(device['hostname'], device)
+        elif self.network_data:
+            for device_name, data in self.network_data.items():
+                self._add_device(device_name, data)
 
         # 2. Add edges by finding connected interfaces
         # Create a list of all interfaces from all devices
-        all_interfaces = []
-        for device_name, data in self.network_data.items():
-            for if_name, if_data in data.get('interfaces', {}).items():
-                if 'ip_address' in if_data:
-                    all_interfaces.append({
-                        'device': device_name,
-                        'interface_name': if_name,
-                        'ip': if_data['ip_address'],
-                        'mask': if_data['subnet_mask'],
-                        'bandwidth': if_data.get('bandwidth')
-                    })
-
-        # Compare every interface with every other interface to find links
-        for i in range(len(all_interfaces)):
-            for j in range(i + 1, len(all_interfaces)):
-                if1 = all_interfaces[i]
-                if2 = all_interfaces[j]
-
-                # Two interfaces are connected if they are in the same subnet
-                try:
-                    net1 = ipaddress.IPv4Interface(f"{if1['ip']}/{if1['mask']}").network
-                    net2 = ipaddress.IPv4Interface(f"{if2['ip']}/{if2['mask']}").network
-                    if net1 == net2 and if1['device'] != if2['device']:
-                        # Add an edge with metadata
-                        self.graph.add_edge(
-                            if1['device'], 
-                            if2['device'],
-                            title=f"Link between {if1['device']} ({if1['interface_name']}) and {if2['device']} ({if2['interface_name']})",
-                            bandwidth=if1.get('bandwidth', 'N/A')
-                        )
-                except (ipaddress.AddressValueError, ValueError) as e:
-                    print(f"Warning: Could not process IP {if1['ip']} or {if2['ip']}. Error: {e}")
-        
+        all_interfaces = [iface for interfaces in self.device_interfaces.values() for iface in interfaces]
+
+        # Index interfaces by the subnet they belong to. Subnet keys for all
+        # addresses are computed in bulk (vectorized when NumPy is available),
+        # and only interfaces in the same subnet are ever compared.
+        self.subnet_index = defaultdict(list)
+        self._index_interfaces(all_interfaces)
+
+        # Two interfaces are connected if they are in the same subnet. Pairs are
+        # visited in the same order as a full pairwise scan, so when several
+        # links join the same two devices the last one's metadata is kept.
+        positions = {}
+        for iface in all_interfaces:
+            key = iface['subnet']
+            if key is None:
+                continue
+            members = self.subnet_index[key]
+            position = positions.get(key, 0)
+            positions[key] = position + 1
+            for other in members[position + 1:]:
+                if iface['device'] != other['device']:
+                    self._add_link(iface, other)
+
+        self._graph_built = True
         return self.graph
 
-    def visualize_topology(self, output_dir='reports'):
+    def visualize_topology(self, output_dir='reports', large_graph=None, cluster_by='subnet'):
         """
         Creates an interactive HTML visualization of the network graph using Pyvis.
+
+        Graphs above LARGE_GRAPH_NODES (or any graph, with large_graph=True)
+        are drawn from a precomputed, cached layout with physics disabled; see
+        _visualize_large_topology. cluster_by ('subnet' or 'role') chooses how
+        nodes are collapsed once the graph passes CLUSTER_THRESHOLD.
         """
         if not self.graph.nodes:
             print("Graph is empty, cannot generate visualization.")
             return
+        if cluster_by not in ('subnet', 'role'):
+            raise ValueError(f"Unknown cluster_by '{cluster_by}'. Choose one of: subnet, role")
+        if large_graph is None:
+            large_graph = self.graph.number_of_nodes() > LARGE_GRAPH_NODES
+        if large_graph:
+            return self._visualize_large_topology(output_dir, cluster_by)
 
         # Ensure the output directory exists
         os.makedirs(output_dir, exist_ok=True)
@@ -76,13 +294,7 @@ class TopologyBuilder:
         
         # Add nodes with specific colors for device types
         for node, attrs in self.graph.nodes(data=True):
-            color = "#f0a30a"  # Default (e.g., PC)
-            if attrs.get('type') == 'Router':
-                color = "#e03021"  # Red
-            elif attrs.get('type') == 'Switch':
-                color = "#217ce0"  # Blue
-            
-            net.add_node(node, label=node, title=attrs.get('title'), color=color)
+            net.add_node(node, label=node, title=attrs.get('title'), color=self._node_color(attrs.get('type')))
 
         # Add edges from the graph
         for u, v, attrs in self.graph.edges(data=True):
@@ -107,6 +319,191 @@ class TopologyBuilder:
         net.show(filename, notebook=False)
         print(f"✅ Interactive topology visualization saved to '{filename}'")
 
+    def _visualize_large_topology(self, output_dir, cluster_by):
+        """
+        Writes a static view of a large graph. Node positions come from
+        compute_layout and physics is off, so the browser only draws. Past
+        CLUSTER_THRESHOLD, nodes are collapsed into clusters that expand on
+        double-click. The vis-network assets are inlined, so the file opens
+        without network access.
+        """
+        os.makedirs(output_dir, exist_ok=True)
+        positions = self.compute_layout(cache_dir=os.path.join(output_dir, 'layout_cache'))
+        clusters = {}
+        if self.graph.number_of_nodes() > CLUSTER_THRESHOLD:
+            clusters = self._cluster_nodes(cluster_by)
+        member_of = {node: cluster_id for cluster_id, members in clusters.items() for node in members}
+
+        # Pyvis add_node/add_edge scan every existing node and edge on each
+        # call, so the records are written into the network directly.
+        net = Network(height="750px", width="100%", notebook=False, cdn_resources='in_line', directed=False)
+        cluster_nodes = defaultdict(list)
+        for node, attrs in self.graph.nodes(data=True):
+            x, y = positions[node]
+            record = {'id': node, 'label': node, 'shape': 'dot', 'title': attrs.get('title'),
+                      'color': self._node_color(attrs.get('type')), 'x': x, 'y': y}
+            if node in member_of:
+                cluster_nodes[member_of[node]].append(record)
+            else:
+                net.nodes.append(record)
+
+        for cluster_id, members in cluster_nodes.items():
+            label = cluster_id.split(':', 1)[1]
+            net.nodes.append({
+                'id': cluster_id,
+                'label': f"{label} ({len(members)})",
+                'shape': 'dot',
+                'title': f"{len(members)} devices in {label}, double-click to expand",
+                'color': members[0]['color'],
+                'size': 10 + 4 * math.log2(len(members)),
+                'x': round(sum(m['x'] for m in members) / len(members), 1),
+                'y': round(sum(m['y'] for m in members) / len(members), 1),
+            })
+
+        links = [(u, v, attrs.get('title')) for u, v, attrs in self.graph.edges(data=True)]
+        net.edges = self._aggregate_links(links, member_of)
+        net.set_options(json.dumps({
+            "physics": {"enabled": False},
+            "edges": {"smooth": False},
+            "interaction": {"hideEdgesOnDrag": True, "tooltipDelay": 200}
+        }))
+
+        html = self._make_offline(net.generate_html())
+        if clusters:
+            script = CLUSTER_SCRIPT % {
+                'clusters': json.dumps(cluster_nodes).replace('</', '<\\/'),
+                'links': json.dumps(links).replace('</', '<\\/'),
+            }
+            html = html.replace('</body>', script + '</body>', 1)
+
+        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+        filename = os.path.join(output_dir, f'network_topology_{timestamp}.html')
+        with open(filename, 'w', encoding='utf-8') as f:
+            f.write(html)
+        print(f"✅ Static topology view ({len(net.nodes)} of {self.graph.number_of_nodes()} nodes shown) saved to '{filename}'")
+
+    def compute_layout(self, cache_dir=None, iterations=50, seed=42):
+        """
+        Returns {node: (x, y)} pixel positions for the current graph, computed
+        offline. Devices sharing an access subnet (see _cluster_nodes) are
+        contracted to one point, the contracted graph is laid out with
+        layout_engine.force_layout, and each group's members are spread on a
+        spiral around its point. With cache_dir, positions are stored under
+        topology_hash, so an unchanged topology is only laid out once.
+        """
+        digest = self.topology_hash(f"force:{iterations}:{seed}")
+        cache_path = os.path.join(cache_dir, f"layout_{digest}.json") if cache_dir else None
+        if cache_path and os.path.exists(cache_path):
+            with open(cache_path, 'r', encoding='utf-8') as f:
+                return {node: tuple(xy) for node, xy in json.load(f).items()}
+
+        groups = self._cluster_nodes('subnet')
+        member_of = {node: group for group, members in groups.items() for node in members}
+        points = {}
+        for node in self.graph.nodes:
+            points.setdefault(member_of.get(node, node), len(points))
+        edges = {self._edge_key(points[member_of.get(u, u)], points[member_of.get(v, v)])
+                 for u, v in self.graph.edges}
+        coords = force_layout(len(points), sorted(edge for edge in edges if edge[0] != edge[1]),
+                              iterations=iterations, seed=seed)
+
+        scale = LAYOUT_SPACING * math.sqrt(self.graph.number_of_nodes())
+        positions = {}
+        for point, index in points.items():
+            x, y = coords[index][0] * scale, coords[index][1] * scale
+            members = groups.get(point, [point])
+            for member, (dx, dy) in zip(members, spiral_offsets(len(members), LAYOUT_SPACING)):
+                positions[member] = (round(x + dx, 1), round(y + dy, 1))
+
+        if cache_path:
+            os.makedirs(cache_dir, exist_ok=True)
+            with open(cache_path, 'w', encoding='utf-8') as f:
+                f.write(json.dumps(positions))
+        return positions
+
+    def topology_hash(self, salt=''):
+        """
+        Returns a stable hex digest of the graph's node and edge sets, with
+        each node's type and interface subnets, which decide its cluster.
+        """
+        digest = hashlib.blake2b(salt.encode(), digest_size=16)
+        for node in sorted(self.graph.nodes):
+            subnets = sorted(iface['subnet'] for iface in self.device_interfaces.get(node, [])
+                             if iface.get('subnet') is not None)
+            digest.update(f"n:{node}\t{self.graph.nodes[node].get('type')}\t{subnets}\n".encode())
+        for u, v in sorted(self._edge_key(u, v) for u, v in self.graph.edges):
+            digest.update(f"e:{u}\t{v}\n".encode())
+        return digest.hexdigest()
+
+    def _cluster_nodes(self, cluster_by):
+        """
+        Groups nodes for the collapsed view as {cluster id: [nodes]}. By
+        'subnet', each non-router device joins the lowest subnet it has an
+        address in, and routers stay visible as the backbone. By 'role', nodes
+        are grouped by device type. Single-member groups are not collapsed.
+        """
+        groups = defaultdict(list)
+        for node, attrs in self.graph.nodes(data=True):
+            device_type = attrs.get('type') or 'Unknown'
+            if cluster_by == 'role':
+                label = device_type
+            elif device_type == 'Router':
+                continue
+            else:
+                subnets = [iface['subnet'] for iface in self.device_interfaces.get(node, [])
+                           if iface.get('subnet') is not None]
+                if subnets:
+                    network, prefix_len = min(subnets)
+                    label = f"{int_to_ip(network)}/{prefix_len}"
+                else:
+                    label = device_type
+            groups[label].append(node)
+        return {f"cluster:{label}": members for label, members in groups.items() if len(members) > 1}
+
+    @staticmethod
+    def _aggregate_links(links, member_of):
+        """
+        Maps each (u, v, title) link onto its visible endpoints and merges
+        links that land on the same pair, the same way CLUSTER_SCRIPT does.
+        """
+        merged = {}
+        for u, v, title in links:
+            a, b = member_of.get(u, u), member_of.get(v, v)
+            if a == b:
+                continue
+            key = (a, b) if a < b else (b, a)
+            edge = merged.get(key)
+            if edge is None:
+                merged[key] = {'from': a, 'to': b, 'title': title, 'count': 1, 'width': 1}
+            else:
+                edge['count'] += 1
+                edge['title'] = f"{edge['count']} links"
+                edge['width'] = 1 + math.log2(edge['count'])
+        return list(merged.values())
+
+    @staticmethod
+    def _make_offline(html):
+        """
+        Replaces the vis-network stylesheet link with the copy bundled in
+        pyvis and drops the Bootstrap references, which only style the page
+        frame, so the file loads nothing from the network.
+        """
+        html = re.sub(r'<link[^>]*bootstrap[^>]*>|<script[^>]*bootstrap[^>]*>\s*</script>', '', html)
+        css_path = os.path.join(os.path.dirname(pyvis.__file__), 'templates', 'lib', 'vis-9.1.2', 'vis-network.css')
+        if not os.path.exists(css_path):
+            return html
+        with open(css_path, 'r', encoding='utf-8') as f:
+            css = f.read()
+        return re.sub(r'<link[^>]*vis-network[^>]*>', lambda _: f"<style>{css}</style>", html)
+
+    @staticmethod
+    def _node_color(device_type):
+        if device_type == 'Router':
+            return "#e03021"  # Red
+        elif device_type == 'Switch':
+            return "#217ce0"  # Blue
+        return "#f0a30a"  # Default (e.g., PC)
+
     def _get_device_type(self, device_name):
         if device_name.startswith('R'):
             return 'Router'
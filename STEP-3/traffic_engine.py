@@ -0,0 +1,372 @@
+# src/traffic_engine.py
+
+from collections import defaultdict
+
+import networkx as nx
+
+try:
+    import numpy as np
+    from scipy import sparse
+    from scipy.sparse import csgraph
+except ImportError:  # NumPy/SciPy are optional; routing falls back to NetworkX Dijkstra
+    np = sparse = csgraph = None
+
+# OSPF auto-cost reference bandwidth (IOS default, 100 Mbps)
+REFERENCE_BANDWIDTH_KBPS = 100000
+# Destinations per batched shortest-path call
+DIJKSTRA_BATCH = 16
+
+
+def ospf_cost(bandwidth_kbps, reference_kbps=REFERENCE_BANDWIDTH_KBPS):
+    """OSPF interface cost: reference bandwidth / link bandwidth, at least 1."""
+    if not bandwidth_kbps:
+        return 1
+    return max(1, reference_kbps // bandwidth_kbps)
+
+
+class LinkLoadModel:
+    """
+    Routes a traffic matrix between endpoints (PCs) over the topology and
+    returns the load on each direction of every link.
+
+    Endpoints do not forward traffic. An endpoint reaches an endpoint it
+    shares a link with directly. All other traffic goes to its gateways:
+    the non-endpoint neighbors behind its cheapest links, split equally
+    between them. Between gateways, traffic follows shortest paths by OSPF
+    cost (reference bandwidth / link bandwidth). With ecmp=True, each node
+    splits it equally across all equal-cost next hops, otherwise one next
+    hop is used.
+
+    Routing runs once per destination gateway, not per endpoint pair. For
+    each destination, the tight shortest-path arcs form a DAG with split
+    matrix S. The per-node transit load x solves x = d + S^T x, found by
+    repeated sparse matrix-vector products. With NumPy and SciPy this is
+    batched C code; without them, NetworkX Dijkstra and plain Python are used.
+    Traffic toward an unreachable destination is added to self.unrouted.
+    """
+    def __init__(self, graph, endpoint_type='PC', ecmp=True, reference_kbps=REFERENCE_BANDWIDTH_KBPS):
+        self.graph = graph
+        self.endpoint_type = endpoint_type
+        self.ecmp = ecmp
+        self.reference_kbps = reference_kbps
+        self.unrouted = 0.0
+
+        self.endpoints = [node for node, attrs in graph.nodes(data=True) if attrs.get('type') == endpoint_type]
+        self.endpoint_set = set(self.endpoints)
+        self.transit = [node for node in graph if node not in self.endpoint_set]
+        self.transit_index = {node: i for i, node in enumerate(self.transit)}
+
+        # Endpoint -> [(gateway index, share of the endpoint's traffic)]
+        self.gateways = {}
+        for endpoint in self.endpoints:
+            chosen = self._choose_gateways(endpoint)
+            if chosen:
+                self.gateways[endpoint] = chosen
+
+        # Both directions of every link between transit nodes
+        self.arc_tail, self.arc_head, self.arc_cost = [], [], []
+        for u, v in graph.edges:
+            if u in self.transit_index and v in self.transit_index and u != v:
+                cost = self.link_cost(u, v)
+                iu, iv = self.transit_index[u], self.transit_index[v]
+                self.arc_tail += [iu, iv]
+                self.arc_head += [iv, iu]
+                self.arc_cost += [cost, cost]
+
+    def link_cost(self, u, v):
+        return ospf_cost(self.graph.adj[u][v].get('bandwidth'), self.reference_kbps)
+
+    def _choose_gateways(self, endpoint):
+        """The endpoint's [(gateway index, share)], from the graph as it is now."""
+        options = [(self.link_cost(endpoint, neighbor), self.transit_index[neighbor])
+                   for neighbor in self.graph.adj[endpoint] if neighbor in self.transit_index]
+        if not options:
+            return []
+        best = min(cost for cost, _ in options)
+        chosen = sorted(gateway for cost, gateway in options if cost == best)
+        if not self.ecmp:
+            chosen = chosen[:1]
+        return [(gateway, 1.0 / len(chosen)) for gateway in chosen]
+
+    def endpoints_changed(self, nodes):
+        """
+        Whether any of nodes became or stopped being an endpoint since the
+        model was built, or is an endpoint that would now pick other gateways.
+        """
+        for node in nodes:
+            is_endpoint = node in self.graph and self.graph.nodes[node].get('type') == self.endpoint_type
+            if is_endpoint != (node in self.endpoint_set):
+                return True
+            if is_endpoint and self._choose_gateways(node) != self.gateways.get(node, []):
+                return True
+        return False
+
+    def changed_links(self, nodes):
+        """
+        Compares this model's transit links at the given nodes with the graph
+        as it is now. Returns {(u, v): (cost then, cost now)} for every link
+        added, removed or re-costed since, with None for the side where it is
+        not a link between transit nodes. Keys are sorted node pairs.
+        """
+        nodes = set(nodes)
+        before = {}
+        for tail, head, cost in zip(self.arc_tail, self.arc_head, self.arc_cost):
+            u, v = self.transit[tail], self.transit[head]
+            if u in nodes:
+                before[(u, v) if u <= v else (v, u)] = cost
+        after = {}
+        for u in nodes:
+            if u not in self.graph or self.graph.nodes[u].get('type') == self.endpoint_type:
+                continue
+            for v in self.graph.adj[u]:
+                if v != u and self.graph.nodes[v].get('type') != self.endpoint_type:
+                    after[(u, v) if u <= v else (v, u)] = self.link_cost(u, v)
+        return {key: (before.get(key), after.get(key)) for key in before.keys() | after.keys()
+                if before.get(key) != after.get(key)}
+
+    def tight_destinations(self, links, destinations):
+        """
+        Returns the destinations (transit node names) whose shortest paths in
+        this model use any of links, a {(u, v): cost} dict of its own links:
+        those where d(u, t) = cost + d(v, t) in either direction. Traffic
+        toward any other destination is routed the same with or without them.
+        """
+        sources = sorted({node for link in links for node in link if node in self.transit_index})
+        if not sources:
+            return set()
+        distances = dict(zip(sources, self._distances([self.transit_index[node] for node in sources])))
+        targets = [(name, self.transit_index[name]) for name in destinations if name in self.transit_index]
+        tight = set()
+        for (u, v), cost in links.items():
+            du, dv = distances.get(u), distances.get(v)
+            if du is None or dv is None:
+                continue
+            for name, target in targets:
+                if du[target] == cost + dv[target] or dv[target] == cost + du[target]:
+                    tight.add(name)
+        return tight
+
+    def gateway_names(self):
+        """Names of the transit nodes that endpoints send their traffic to."""
+        return {self.transit[gateway] for chosen in self.gateways.values() for gateway, _ in chosen}
+
+    def uniform_loads(self, traffic_per_endpoint, destinations=None):
+        """
+        Loads when every endpoint sends traffic_per_endpoint (bps), spread
+        evenly over every other endpoint. The gateway-level demand is built
+        from aggregates, so the N x N endpoint matrix is never materialized.
+        Returns {(u, v): bps} for each direction of each loaded link.
+
+        With destinations (gateway names), only the traffic toward those
+        gateways is routed, and only its loads on transit links are returned:
+        the part of the loads that a change to the transit links can move
+        (see tight_destinations).
+        """
+        loads = defaultdict(float)
+        routable = [endpoint for endpoint in self.endpoints if endpoint in self.gateways]
+        if len(self.endpoints) < 2:
+            return loads
+        rate = traffic_per_endpoint / (len(self.endpoints) - 1)  # Each endpoint pair, each direction
+
+        direct_pairs = 0
+        for u, v in self.graph.edges if destinations is None else ():
+            if u in self.transit_index or v in self.transit_index or u == v:
+                continue
+            loads[(u, v)] += rate
+            loads[(v, u)] += rate
+            direct_pairs += 2
+
+        # Gateway demand G[s, t] = rate * (a[s] a[t] - C[s, t]), where a sums
+        # the endpoints' gateway shares and C removes self and adjacent pairs
+        routable_set = set(routable)
+        attachment = [0.0] * len(self.transit)
+        correction = defaultdict(float)
+        remote_pairs = len(self.endpoints) * (len(self.endpoints) - 1) - direct_pairs
+        for endpoint in routable:
+            peers = [peer for peer in self.graph.adj[endpoint] if peer in routable_set and peer != endpoint]
+            remote = len(routable) - 1 - len(peers)
+            remote_pairs -= remote
+            for gateway, share in self.gateways[endpoint]:
+                attachment[gateway] += share
+                if destinations is None:
+                    loads[(endpoint, self.transit[gateway])] += rate * remote * share
+                    loads[(self.transit[gateway], endpoint)] += rate * remote * share
+            for source_endpoint in [endpoint] + peers:
+                for source, source_share in self.gateways[source_endpoint]:
+                    for target, target_share in self.gateways[endpoint]:
+                        correction[(source, target)] += source_share * target_share
+
+        targets = [gateway for gateway, total in enumerate(attachment) if total > 0]
+        if destinations is None:
+            self.unrouted += rate * remote_pairs  # Pairs where either side has no gateway
+        else:
+            wanted = {self.transit_index[name] for name in destinations if name in self.transit_index}
+            targets = [gateway for gateway in targets if gateway in wanted]
+        if np is not None:
+            attachment = np.array(attachment)
+        correction_columns = defaultdict(dict)
+        for (source, target), value in correction.items():
+            correction_columns[target][source] = value
+
+        def demand_column(target):
+            if np is not None:
+                column = attachment * attachment[target]
+                for source, value in correction_columns[target].items():
+                    column[source] -= value
+                return column * rate
+            return [rate * (attachment[source] * attachment[target] - correction_columns[target].get(source, 0.0))
+                    for source in range(len(self.transit))]
+
+        self._route_transit(targets, demand_column, loads)
+        return loads
+
+    def demand_loads(self, demands):
+        """
+        Loads for an explicit traffic matrix: an iterable of (source,
+        destination, bps) between endpoints or transit nodes. Returns
+        {(u, v): bps} for each direction of each loaded link.
+        """
+        loads = defaultdict(float)
+        columns = defaultdict(lambda: defaultdict(float))
+        for source, destination, bps in demands:
+            if source == destination:
+                continue
+            endpoint_pair = source not in self.transit_index or destination not in self.transit_index
+            if endpoint_pair and self.graph.has_edge(source, destination):
+                loads[(source, destination)] += bps
+                continue
+            source_gateways = self._attachment(source)
+            destination_gateways = self._attachment(destination)
+            if not source_gateways or not destination_gateways:
+                self.unrouted += bps
+                continue
+            for gateway, share in source_gateways:
+                if self.transit[gateway] != source:
+                    loads[(source, self.transit[gateway])] += bps * share
+            for gateway, share in destination_gateways:
+                if self.transit[gateway] != destination:
+                    loads[(self.transit[gateway], destination)] += bps * share
+            for source_gateway, source_share in source_gateways:
+                for target, target_share in destination_gateways:
+                    columns[target][source_gateway] += bps * source_share * target_share
+
+        def demand_column(target):
+            column = [0.0] * len(self.transit)
+            for source, value in columns[target].items():
+                column[source] = value
+            return np.array(column) if np is not None else column
+
+        self._route_transit(sorted(columns), demand_column, loads)
+        return loads
+
+    def _attachment(self, node):
+        if node in self.transit_index:
+            return [(self.transit_index[node], 1.0)]
+        return self.gateways.get(node, [])
+
+    def _route_transit(self, destinations, demand_column, loads):
+        """Adds the transit-arc loads for every destination gateway into loads."""
+        if csgraph is not None:
+            arc_load = self._route_vectorized(destinations, demand_column)
+        else:
+            arc_load = self._route_python(destinations, demand_column)
+        for tail, head, load in zip(self.arc_tail, self.arc_head, arc_load):
+            if load:
+                loads[(self.transit[tail], self.transit[head])] += float(load)
+
+    def _distances(self, sources):
+        """Per source index, the OSPF-cost distance to every transit node (inf if unreachable)."""
+        if csgraph is not None:
+            return list(csgraph.dijkstra(self._cost_matrix(), directed=True, indices=sources))
+        core = self._core_graph()
+        distances = []
+        for source in sources:
+            lengths = nx.single_source_dijkstra_path_length(core, source, weight='cost')
+            distances.append([lengths.get(node, float('inf')) for node in range(len(self.transit))])
+        return distances
+
+    def _cost_matrix(self):
+        node_count = len(self.transit)
+        return sparse.csr_matrix((np.array(self.arc_cost, dtype=np.float64),
+                                  (np.array(self.arc_tail, dtype=np.int64), np.array(self.arc_head, dtype=np.int64))),
+                                 shape=(node_count, node_count))
+
+    def _core_graph(self):
+        core = nx.Graph()
+        core.add_nodes_from(range(len(self.transit)))
+        for tail, head, cost in zip(self.arc_tail, self.arc_head, self.arc_cost):
+            core.add_edge(tail, head, cost=cost)
+        return core
+
+    def _route_vectorized(self, destinations, demand_column):
+        node_count = len(self.transit)
+        tails = np.array(self.arc_tail, dtype=np.int64)
+        heads = np.array(self.arc_head, dtype=np.int64)
+        costs = np.array(self.arc_cost, dtype=np.float64)
+        arc_load = np.zeros(len(tails))
+        graph = self._cost_matrix()
+
+        # S^T over every arc, laid out once; each destination only rewrites
+        # its values, with zeros on arcs that are not on a shortest path
+        by_head = np.lexsort((tails, heads))
+        indptr = np.zeros(node_count + 1, dtype=np.int64)
+        np.cumsum(np.bincount(heads, minlength=node_count), out=indptr[1:])
+        split = sparse.csr_matrix((np.zeros(len(tails)), tails[by_head], indptr), shape=(node_count, node_count))
+        by_tail = np.lexsort((heads, tails))
+
+        for start in range(0, len(destinations), DIJKSTRA_BATCH):
+            batch = destinations[start:start + DIJKSTRA_BATCH]
+            # Links are symmetric, so distances from t are distances to t.
+            # An arc is tight when it lies on a shortest path toward t; arcs
+            # of unreachable nodes compare inf - inf and are never tight.
+            distances = csgraph.dijkstra(graph, directed=True, indices=batch)
+            with np.errstate(invalid='ignore'):
+                tight_rows = (distances[:, tails] - distances[:, heads]) == costs
+            for target, distance, tight in zip(batch, distances, tight_rows):
+                demand = np.asarray(demand_column(target), dtype=np.float64)
+                demand[target] = 0.0
+                unreachable = np.isinf(distance)
+                self.unrouted += float(demand[unreachable].sum())
+                demand[unreachable] = 0.0
+
+                if not self.ecmp:
+                    # Keep the tight arc with the lowest head per tail
+                    ordered = by_tail[tight[by_tail]]
+                    tight = np.zeros(len(tails), dtype=bool)
+                    tight[ordered[np.unique(tails[ordered], return_index=True)[1]]] = True
+                next_hops = np.bincount(tails[tight], minlength=node_count)
+                share = np.divide(1.0, next_hops[tails], out=np.zeros(len(tails)), where=tight)
+                split.data[:] = share[by_head]
+
+                # x = d + S^T x; S is nilpotent, so this settles within the
+                # longest tight path, and then repeats exactly
+                load = demand
+                for _ in range(node_count):
+                    updated = demand + split @ load
+                    if np.array_equal(updated, load):
+                        break
+                    load = updated
+                arc_load += load[tails] * share
+        return arc_load
+
+    def _route_python(self, destinations, demand_column):
+        core = self._core_graph()
+        arc_ids = {(tail, head): arc for arc, (tail, head) in enumerate(zip(self.arc_tail, self.arc_head))}
+        arc_load = [0.0] * len(self.arc_tail)
+
+        for target in destinations:
+            load = list(demand_column(target))
+            load[target] = 0.0
+            next_hops, distance = nx.dijkstra_predecessor_and_distance(core, target, weight='cost')
+            for node in range(len(self.transit)):
+                if node not in distance:
+                    self.unrouted += load[node]
+            for node in sorted(distance, key=distance.get, reverse=True):
+                hops = sorted(next_hops[node]) if self.ecmp else sorted(next_hops[node])[:1]
+                if not hops or not load[node]:
+                    continue
+                share = load[node] / len(hops)
+                for hop in hops:
+                    load[hop] += share
+                    arc_load[arc_ids[(node, hop)]] += share
+        return arc_load
@@ -1,133 +1,676 @@
 # src/validator.py
 
-import ipaddress
 import networkx as nx
 from collections import defaultdict
+from itertools import islice
+from network_model import (int_to_ip, ip_to_int, prefix_to_mask, ALL_ONES, merge_vlan_ranges,
+                           subtract_vlan_ranges, vlan_in_ranges, format_vlan_ranges)
+from address_engine import address_columns
+from critical_links import CriticalLinkAnalyzer
+from prefix_index import PrefixIndex
+from traffic_engine import LinkLoadModel
+from check_scheduler import CheckScheduler
+from revalidation import Revalidator
+
+MAX_LISTED_LOOPS = 100   # Above this many independent loops, loops are summarized per component
+MAX_LOOP_DOMAINS = 20    # Components listed in a loop summary
+LOOP_SAMPLES = 3         # Sample cycles listed per component
+DEFAULT_MTU = 1500       # IOS interface MTU when none is configured
+DEFAULT_VLAN = 1         # Always defined, even when missing from a VLAN database
+POINT_TO_POINT_PREFIX = 30  # /30 and longer subnets join exactly two devices
 
 class NetworkValidator:
     """
     Performs validation and optimization analysis on the parsed network data and topology graph.
     """
-    def __init__(self, network_data, graph):
+    checks = CheckScheduler()  # Registered checks and shared indexes, see register_check
+
+    def __init__(self, network_data=None, graph=None):
         self.network_data = network_data
         self.graph = graph
         self.results = {}
+        self.check_stats = {}  # Wall time and peak memory per check and index, from run_all_checks
+        self.link_loads = None  # (LinkLoadModel, {(u, v): bps}, bps per PC) from the last uniform load analysis
+        # Per-device settings, filled by add_device:
+        self.device_addresses = {}    # (interface, ip, mask) string triples
+        self.device_switchports = {}  # (interface, mode, access VLAN, trunk allowed VLANs, native VLAN)
+        self.device_vlans = {}        # VLAN IDs defined on the device, if any
+        self.default_gateways = {}    # 'ip default-gateway' address, if set
+        self.interface_mtus = {}      # {interface: mtu} for interfaces with an explicit MTU
+        self._reset_indexes()
+        self._critical_links = None  # CriticalLinkAnalyzer, cached per run of the checks
+        self._changed_devices = set()  # Devices added, replaced or removed since the last revalidate
+        self._revalidator = None       # Per-scope partial results, built by the first revalidate
+        if network_data:
+            for device_name, data in network_data.items():
+                self._index_device(device_name, data)
+
+    def add_device(self, device):
+        """
+        Indexes a single parsed device record (as yielded by
+        NetworkConfigParser.iter_devices), so validation can be fed from a
+        stream instead of a full network_data dict. Set self.graph before
+        running the checks. Adding a hostname again replaces it.
+        """
+        self._index_device(device['hostname'], device)
+
+    def remove_device(self, device_name):
+        """Drops a device's indexed settings, e.g. after TopologyBuilder.remove_device."""
+        for index in (self.device_addresses, self.device_switchports, self.device_vlans,
+                      self.default_gateways, self.interface_mtus):
+            index.pop(device_name, None)
+        self._reset_indexes()
+        self._changed_devices.add(device_name)
+
+    def _index_device(self, device_name, data):
+        self._reset_indexes()
+        self._changed_devices.add(device_name)
+        interfaces = data.get('interfaces', {})
+        self.device_addresses[device_name] = [
+            (if_name, if_data['ip_address'], if_data['subnet_mask'])
+            for if_name, if_data in interfaces.items()
+            if 'ip_address' in if_data and 'subnet_mask' in if_data
+        ]
+        switchports = [
+            (if_name, if_data.get('switchport_mode'), if_data.get('vlan'),
+             if_data.get('trunk_allowed_vlans', 'all'), if_data.get('native_vlan', DEFAULT_VLAN))
+            for if_name, if_data in interfaces.items()
+            if 'vlan' in if_data or 'switchport_mode' in if_data
+        ]
+        mtus = {if_name: if_data['mtu'] for if_name, if_data in interfaces.items() if 'mtu' in if_data}
+        # Sparse: most devices have no switchports, VLAN database or MTUs
+        for index, value in ((self.device_switchports, switchports), (self.interface_mtus, mtus),
+                             (self.device_vlans, data.get('vlans')),
+                             (self.default_gateways, data.get('default_gateway'))):
+            if value:
+                index[device_name] = value
+            else:
+                index.pop(device_name, None)
+
+    def _reset_indexes(self):
+        # Shared indexes derived from the device settings, rebuilt on next use
+        self._address_cache = None
+        self._subnet_members = None
+        self._subnet_prefixes = None
+        self._vlan_ports = None
+        self._gateway_owners = None
+        self._link_mtus = None
+
+    @classmethod
+    def register_check(cls, name, func, requires=(), uses=()):
+        """
+        Adds a check plugin. func(validator) returns the check's result, which
+        run_all_checks stores under name. requires names the checks whose
+        results func reads from self.results, and uses names the shared
+        indexes it reads. Both are finished before func starts.
+        """
+        cls.checks.register_check(name, func, requires, uses)
+
+    @classmethod
+    def register_index(cls, name, func, uses=()):
+        """
+        Adds a shared index. func(validator) builds and caches it on the
+        validator, after the indexes it uses. It runs once per
+        run_all_checks, before any check that uses it.
+        """
+        cls.checks.register_index(name, func, uses)
 
-    def run_all_checks(self):
+    def run_all_checks(self, names=None, executor='thread', max_workers=None, profile=False):
         """
-        Runs all validation and analysis checks and returns the results.
+        Runs all validation and analysis checks (or the named ones and their
+        dependencies) and returns the results. Independent checks run
+        concurrently on a thread or process pool; see CheckScheduler.
+        self.check_stats then holds each check's and index's wall time, and
+        with profile=True its peak traced memory.
         """
-        self.results['duplicate_ips'] = self._check_duplicate_ips()
-        self.results['network_loops'] = self._check_network_loops()
-        self.results['load_analysis'] = self._analyze_link_utilization()
-        self.results['load_balancing_recommendations'] = self._recommend_load_balancing()
-        # Placeholder for future checks
-        self.results['missing_components'] = [] 
-        self.results['vlan_issues'] = []
-        self.results['gateway_issues'] = []
-        self.results['mtu_mismatches'] = []
+        self._critical_links = None
+        self.results = {}
+        self.results, self.check_stats = self.checks.run(self, names=names, executor=executor,
+                                                         max_workers=max_workers, profile=profile)
+        return self.results
 
+    def revalidate(self, changed_devices=None, changed_edges=(), graph_checks=True):
+        """
+        Brings self.results up to date after devices were added, replaced or
+        removed, rerunning only the parts of each check those devices touch:
+        their addresses, subnets and gateways, and the devices whose gateway
+        they own. Devices changed through add_device and remove_device are
+        picked up automatically; changed_devices adds more. changed_edges
+        are the edges added or removed by TopologyBuilder.update_device or
+        remove_device (e.g. added | removed). The graph-wide checks (loops
+        and link loads) are redone only for the biconnected blocks of the
+        changed links and the traffic routed across them;
+        graph_checks=False defers them to a later call. The first call
+        builds the per-scope state in full, which costs a few times as much
+        as the local checks of run_all_checks. See Revalidator.
+        """
+        devices = self._changed_devices | set(changed_devices or ())
+        self._changed_devices = set()
+        if self._revalidator is None:
+            self._revalidator = Revalidator(self, graph_checks)
+        else:
+            self._revalidator.update(devices, changed_edges, graph_checks)
         return self.results
 
+    def _address_columns(self):
+        """
+        Returns parallel lists (devices, interfaces, addresses, networks,
+        prefix_lens) for every valid indexed interface, with all addresses
+        converted to integers in one bulk pass. Invalid IP data is skipped.
+        """
+        if self._address_cache is not None:
+            return self._address_cache
+        devices, interfaces, ips, masks = [], [], [], []
+        for device, addresses in self.device_addresses.items():
+            for if_name, ip, mask in addresses:
+                devices.append(device)
+                interfaces.append(if_name)
+                ips.append(ip)
+                masks.append(mask)
+        rows, addresses, networks, prefix_lens = address_columns(ips, masks)
+        self._address_cache = ([devices[row] for row in rows], [interfaces[row] for row in rows],
+                               addresses, networks, prefix_lens)
+        return self._address_cache
+
+    def _subnet_index(self):
+        """Returns {(network, prefix_len): [address rows]} over the address columns."""
+        if self._subnet_members is None:
+            _, _, _, networks, prefix_lens = self._address_columns()
+            self._subnet_members = defaultdict(list)
+            for row, subnet in enumerate(zip(networks, prefix_lens)):
+                self._subnet_members[subnet].append(row)
+        return self._subnet_members
+
+    def _prefix_index(self):
+        """Returns a PrefixIndex over the address columns, built from the subnet index."""
+        if self._subnet_prefixes is None:
+            self._subnet_prefixes = PrefixIndex(*self._address_columns(), subnet_rows=self._subnet_index())
+        return self._subnet_prefixes
+
+    def _vlan_port_index(self):
+        """
+        Returns (access_ports, trunks): access_ports maps device -> {VLAN:
+        [interfaces]} and trunks maps device -> [(interface, allowed VLAN
+        ranges or 'all', native VLAN)].
+        """
+        if self._vlan_ports is None:
+            access_ports, trunks = {}, {}
+            for device, switchports in self.device_switchports.items():
+                device_access, device_trunks = self._switchport_groups(switchports)
+                if device_access:
+                    access_ports[device] = device_access
+                if device_trunks:
+                    trunks[device] = device_trunks
+            self._vlan_ports = (access_ports, trunks)
+        return self._vlan_ports
+
+    @staticmethod
+    def _switchport_groups(switchports):
+        """Splits one device's switchports into ({VLAN: [interfaces]}, [trunks])."""
+        access_ports, trunks = {}, []
+        for if_name, mode, vlan, allowed, native_vlan in switchports:
+            if mode == 'trunk':
+                trunks.append((if_name, allowed, native_vlan))
+            elif vlan is not None:
+                access_ports.setdefault(vlan, []).append(if_name)
+        return access_ports, trunks
+
+    def _gateway_owner_index(self):
+        """
+        Returns {default gateway: [(device, interface)]}, the interfaces
+        configured with each distinct default-gateway address, looked up in
+        the prefix index. An invalid gateway address maps to None.
+        """
+        if self._gateway_owners is None:
+            index = self._prefix_index()
+            owners = {}
+            for gateway in set(self.default_gateways.values()):
+                try:
+                    owners[gateway] = [(owner['device'], owner['interface']) for owner in index.owners_of(gateway)]
+                except ValueError:
+                    owners[gateway] = None
+            self._gateway_owners = owners
+        return self._gateway_owners
+
+    def _link_mtu_index(self):
+        """
+        Returns [(subnet, [(device, interface, mtu)])] for every subnet shared
+        by interfaces on more than one device, i.e. every link. Interfaces
+        without an explicit MTU use DEFAULT_MTU.
+        """
+        if self._link_mtus is None:
+            devices, interfaces, _, _, _ = self._address_columns()
+            self._link_mtus = []
+            for subnet, rows in self._subnet_index().items():
+                if len(rows) < 2 or all(devices[row] == devices[rows[0]] for row in rows):
+                    continue
+                self._link_mtus.append((subnet, [
+                    (devices[row], interfaces[row], self._interface_mtu(devices[row], interfaces[row]))
+                    for row in rows
+                ]))
+        return self._link_mtus
+
+    def _interface_mtu(self, device, if_name):
+        return self.interface_mtus.get(device, {}).get(if_name, DEFAULT_MTU)
+
+    @staticmethod
+    def _format_subnet(network, prefix_len):
+        return f"{int_to_ip(network)}/{prefix_len}"
+
     def _check_duplicate_ips(self):
         """
-        Checks for duplicate IP addresses within the same subnet across all devices.
+        Checks for IP addresses configured on more than one interface. One
+        hash pass over the integer addresses finds duplicates across the
+        whole network, including copies configured with different masks.
+        """
+        devices, _, addresses, networks, prefix_lens = self._address_columns()
+        first_rows = {}
+        duplicate_rows = {}
+        for row, address in enumerate(addresses):
+            first = first_rows.setdefault(address, row)
+            if first != row:
+                duplicate_rows.setdefault(address, [first]).append(row)
+        if not duplicate_rows:
+            return []
+
+        # Report grouped by subnet in the order subnets were first seen, then
+        # in the order addresses were first seen
+        subnets = list(zip(networks, prefix_lens))
+        subnet_order = {subnet: i for i, subnet in enumerate(dict.fromkeys(subnets))}
+        duplicates = sorted(duplicate_rows.items(), key=lambda item: (subnet_order[subnets[item[1][0]]], item[1][0]))
+        return [self._duplicate_ip_issue(address, [(devices[row], subnets[row]) for row in rows])
+                for address, rows in duplicates]
+
+    def _duplicate_ip_issue(self, address, members):
+        """Formats a duplicate-IP issue; members are (device, subnet) pairs in row order."""
+        device_list = ', '.join(device for device, _ in members)
+        subnet_list = list(dict.fromkeys(self._format_subnet(*subnet) for _, subnet in members))
+        if len(subnet_list) == 1:
+            return f"Duplicate IP {int_to_ip(address)} found on devices: {device_list} in subnet {subnet_list[0]}"
+        return f"Duplicate IP {int_to_ip(address)} found on devices: {device_list} in subnets {', '.join(subnet_list)}"
+
+    def _check_overlapping_subnets(self):
+        """
+        Checks for configured subnets that overlap without being equal (e.g.
+        the two ends of a link with different masks), and for interface
+        addresses that are the network or broadcast address of their subnet.
+        CIDR ranges are either nested or disjoint, so each nested subnet is
+        reported once, with its nearest enclosing subnet from the prefix index.
+        """
+        devices, _, addresses, networks, prefix_lens = self._address_columns()
+        issues = []
+        for row, (address, network, prefix_len) in enumerate(zip(addresses, networks, prefix_lens)):
+            issue = self._host_address_issue(devices[row], address, network, prefix_len)
+            if issue:
+                issues.append(issue)
+
+        overlaps = self._prefix_index().overlapping_subnets()
+        if not overlaps:
+            return issues
+
+        # Device names are only collected for the subnets that overlap
+        involved = {subnet for pair in overlaps for subnet in pair}
+        subnet_devices = defaultdict(dict)
+        for device, subnet in zip(devices, zip(networks, prefix_lens)):
+            if subnet in involved:
+                subnet_devices[subnet][device] = None
+        for outer, inner in overlaps:
+            issues.append(self._overlap_issue(outer, subnet_devices[outer], inner, subnet_devices[inner]))
+        return issues
+
+    def _host_address_issue(self, device, address, network, prefix_len):
+        """Returns an issue if an interface address is its subnet's network or broadcast address."""
+        if prefix_len > 30:
+            return None  # /31 and /32 have no network or broadcast address
+        if address == network:
+            return (f"Interface address {int_to_ip(address)} on {device} is the network address "
+                    f"of subnet {self._format_subnet(network, prefix_len)}")
+        if address == network | (ALL_ONES >> prefix_len):
+            return (f"Interface address {int_to_ip(address)} on {device} is the broadcast address "
+                    f"of subnet {self._format_subnet(network, prefix_len)}")
+        return None
+
+    def _overlap_issue(self, outer, outer_devices, inner, inner_devices):
+        return (f"Overlapping subnets {self._format_subnet(*outer)} (on {', '.join(outer_devices)}) "
+                f"and {self._format_subnet(*inner)} (on {', '.join(inner_devices)})")
+
+    def _check_vlan_issues(self):
+        """
+        Checks each switch's VLANs against its VLAN database and trunks:
+        access ports and SVIs in VLANs that are not defined, access VLANs no
+        trunk carries, trunks allowing undefined VLANs, and native VLANs
+        missing from a trunk's allowed list. Devices without a VLAN database
+        are only checked against their trunks.
+        """
+        access_ports, trunks = self._vlan_port_index()
+        devices, interfaces, _, _, _ = self._address_columns()
+        issues = []
+        for device in self.device_switchports:
+            issues += self._device_vlan_issues(device, access_ports.get(device, {}), trunks.get(device, []))
+        for device, if_name in zip(devices, interfaces):
+            issue = self._svi_issue(device, if_name)
+            if issue:
+                issues.append(issue)
+        return issues
+
+    def _device_vlan_issues(self, device, access_ports, trunks):
+        """VLAN issues of one device, from its {VLAN: [access ports]} and trunk list."""
+        defined = self.device_vlans.get(device)
+        defined = set(defined) | {DEFAULT_VLAN} if defined else None
+        issues = []
+        for vlan, ports in access_ports.items():
+            port_list = ', '.join(ports)
+            if defined is not None and vlan not in defined:
+                issues.append(f"VLAN {vlan} on {device} (ports {port_list}) is not defined in its VLAN database")
+            if trunks and not any(allowed == 'all' or vlan_in_ranges(vlan, allowed) for _, allowed, _ in trunks):
+                issues.append(f"VLAN {vlan} on {device} (ports {port_list}) is not allowed on any trunk")
+        for if_name, allowed, native_vlan in trunks:
+            if allowed == 'all':
+                continue
+            if not vlan_in_ranges(native_vlan, allowed):
+                issues.append(f"Trunk {if_name} on {device} has native VLAN {native_vlan}, "
+                              f"which is not in its allowed VLAN list")
+            if defined is None:
+                continue
+            undefined = subtract_vlan_ranges(allowed, merge_vlan_ranges((vlan, vlan) for vlan in defined))
+            if undefined:
+                issues.append(f"Trunk {if_name} on {device} allows VLANs not defined on the device: "
+                              f"{format_vlan_ranges(undefined)}")
+        return issues
+
+    def _svi_issue(self, device, if_name):
+        """SVIs (interface VlanN) need VLAN N in the device's VLAN database."""
+        defined = self.device_vlans.get(device)
+        if not defined or not if_name.startswith('Vlan') or not if_name[4:].isdigit():
+            return None
+        vlan = int(if_name[4:])
+        if vlan != DEFAULT_VLAN and vlan not in defined:
+            return f"SVI {if_name} on {device} has no VLAN {vlan} in its VLAN database"
+        return None
+
+    def _check_gateway_issues(self):
+        """
+        Checks every device's default gateway against the interface that owns
+        that address: the gateway must be a valid address owned by another
+        device, inside one of the device's own subnets, and a router.
+        PCs with an address but no default gateway are reported too.
+        """
+        owners = self._gateway_owner_index()
+        devices, _, addresses, networks, prefix_lens = self._address_columns()
+        device_subnets = defaultdict(list)
+        for device, network, prefix_len in zip(devices, networks, prefix_lens):
+            if device in self.default_gateways:
+                device_subnets[device].append((network, prefix_len))
+
+        issues = []
+        for device, gateway in self.default_gateways.items():
+            issues += self._device_gateway_issues(device, gateway, owners[gateway], device_subnets.get(device, []))
+        for device in dict.fromkeys(devices):
+            issue = self._missing_gateway_issue(device)
+            if issue:
+                issues.append(issue)
+        return issues
+
+    def _device_gateway_issues(self, device, gateway, owned_by, subnets):
+        """
+        Gateway issues of one device. owned_by lists the (device, interface)
+        pairs configured with the gateway address, or is None if it is
+        invalid; subnets are the device's own (network, prefix_len) pairs.
         """
+        if owned_by is None:
+            return [f"Default gateway {gateway} on {device} is not a valid IPv4 address"]
+        if not owned_by:
+            return [f"Default gateway {gateway} on {device} is not configured on any device"]
+        other_owners = [(owner, if_name) for owner, if_name in owned_by if owner != device]
+        if not other_owners:
+            return [f"Default gateway {gateway} on {device} is one of its own addresses"]
         issues = []
-        subnet_map = defaultdict(list)
-        
-        # Group IPs by subnet
-        for device, data in self.network_data.items():
-            for if_name, if_data in data.get('interfaces', {}).items():
-                if 'ip_address' in if_data and 'subnet_mask' in if_data:
-                    try:
-                        ip_interface = ipaddress.IPv4Interface(f"{if_data['ip_address']}/{if_data['subnet_mask']}")
-                        subnet = str(ip_interface.network)
-                        subnet_map[subnet].append({'device': device, 'ip': if_data['ip_address']})
-                    except ValueError:
-                        continue # Ignore invalid IP data
-        
-        # Find duplicates in each subnet
-        for subnet, devices in subnet_map.items():
-            ip_counts = defaultdict(list)
-            for dev_info in devices:
-                ip_counts[dev_info['ip']].append(dev_info['device'])
-            
-            for ip, dev_list in ip_counts.items():
-                if len(dev_list) > 1:
-                    issues.append(f"Duplicate IP {ip} found on devices: {', '.join(dev_list)} in subnet {subnet}")
+        address = ip_to_int(gateway)
+        if subnets and not any(address & prefix_to_mask(prefix_len) == network for network, prefix_len in subnets):
+            issues.append(f"Default gateway {gateway} on {device} is outside all of its subnets")
+        if self.graph is not None:
+            owner, if_name = other_owners[0]
+            owner_type = self.graph.nodes[owner].get('type') if owner in self.graph else None
+            if owner_type not in (None, 'Router'):
+                issues.append(f"Default gateway {gateway} on {device} belongs to {owner} {if_name}, "
+                              f"which is a {owner_type}, not a router")
         return issues
 
-    def _check_network_loops(self):
+    def _missing_gateway_issue(self, device):
+        """Reports a PC that has an address but no default gateway."""
+        if self.graph is None or device in self.default_gateways or device not in self.graph:
+            return None
+        if self.graph.nodes[device].get('type') == 'PC':
+            return f"{device} has an IP address but no default gateway"
+        return None
+
+    def _check_mtu_mismatches(self):
+        """Checks that every interface on a link (a shared subnet) has the same MTU."""
+        issues = []
+        for subnet, members in self._link_mtu_index():
+            issue = self._mtu_issue(subnet, members)
+            if issue:
+                issues.append(issue)
+        return issues
+
+    def _mtu_issue(self, subnet, members):
+        """members are the link's (device, interface, mtu) triples."""
+        if len({mtu for _, _, mtu in members}) > 1:
+            member_list = ', '.join(f"{device} {if_name} ({mtu})" for device, if_name, mtu in members)
+            return f"MTU mismatch on link {self._format_subnet(*subnet)}: {member_list}"
+        return None
+
+    def _check_missing_components(self):
+        """
+        Checks for devices with no links at all, and for point-to-point
+        subnets (/30 and longer) configured on one device only, whose other
+        end is missing.
+        """
+        devices, interfaces, _, _, _ = self._address_columns()
+        issues = []
+        if self.graph is not None:
+            for device in self.graph:
+                issue = self._isolated_device_issue(device)
+                if issue:
+                    issues.append(issue)
+        for subnet, rows in self._subnet_index().items():
+            issue = self._dangling_link_issue(subnet, [(devices[row], interfaces[row]) for row in rows])
+            if issue:
+                issues.append(issue)
+        return issues
+
+    def _isolated_device_issue(self, device):
+        if self.graph is not None and device in self.graph and self.graph.degree(device) == 0:
+            return f"Device {device} has no links to any other device"
+        return None
+
+    def _dangling_link_issue(self, subnet, members):
+        """members are the subnet's (device, interface) pairs."""
+        network, prefix_len = subnet
+        if prefix_len < POINT_TO_POINT_PREFIX or prefix_len == 32:
+            return None  # /32 loopbacks have no other end
+        if all(device == members[0][0] for device, _ in members):
+            return (f"Link subnet {self._format_subnet(network, prefix_len)} on {members[0][0]} "
+                    f"{members[0][1]} has no device at the other end")
+        return None
+
+    def _check_network_loops(self, summarize=None):
         """
-        Uses NetworkX to detect cyclical paths (loops) in the topology.
+        Detects cyclical paths (loops) in the topology.
+
+        With few loops, one issue is listed per cycle of the NetworkX cycle
+        basis. Beyond MAX_LISTED_LOOPS independent loops (or with
+        summarize=True), loops are summarized per biconnected component
+        instead: its device, link and loop counts plus up to LOOP_SAMPLES
+        sample cycles, for at most MAX_LOOP_DOMAINS components. That keeps
+        the output bounded however meshed the network is.
         """
         issues = []
         try:
-            loops = list(nx.cycle_basis(self.graph))
-            if loops:
-                for loop in loops:
-                    issues.append(f"Potential network loop detected involving: {' -> '.join(loop)}")
+            if summarize is None:
+                analyzer = self.critical_links()
+                loop_count = sum(analyzer.block_loop_count(block_id) for block_id in range(len(analyzer.blocks)))
+                summarize = loop_count > MAX_LISTED_LOOPS
+            if summarize:
+                return self._summarize_network_loops()
+            for loop in nx.cycle_basis(self.graph):
+                issues.append(self._loop_issue(loop))
         except nx.NetworkXError as e:
             issues.append(f"Could not perform loop detection. Error: {e}")
         return issues
 
-    def _analyze_link_utilization(self, traffic_per_pc=50000):
+    def _summarize_network_loops(self):
         """
-        Analyzes link utilization based on a simple traffic model.
-        Assumes each PC generates a fixed amount of traffic.
+        Groups loops by biconnected component, largest first. Sample cycles
+        are generated lazily, so only the listed components are walked.
+        """
+        analyzer = self.critical_links()
+        domains = []
+        for block_id in range(len(analyzer.blocks)):
+            loop_count = analyzer.block_loop_count(block_id)
+            if loop_count > 0:
+                domains.append((loop_count, block_id, analyzer, block_id))
+        return self._block_loop_issues(domains, summarize=True)
+
+    def _block_loop_issues(self, domains, summarize=None):
+        """
+        Loop issues from domains, (loop count, order, analyzer, block id)
+        tuples for the blocks that have loops. They are summarized largest
+        first (ties in order) when summarize is set, or by default when they
+        hold more than MAX_LISTED_LOOPS loops; otherwise each block's
+        fundamental cycles are listed. Revalidation keeps blocks from several
+        analyzers, so it reports loops this way instead of by cycle basis.
+        """
+        domains = sorted(domains, key=lambda domain: (-domain[0], domain[1]))
+        if summarize is None:
+            summarize = sum(domain[0] for domain in domains) > MAX_LISTED_LOOPS
+        if not summarize:
+            return [self._loop_issue(loop) for _, _, analyzer, block_id in domains
+                    for loop in analyzer.iter_block_cycles(block_id)]
+
+        issues = []
+        for number, (loop_count, _, analyzer, block_id) in enumerate(domains[:MAX_LOOP_DOMAINS], start=1):
+            issues.append(
+                f"Loop domain {number}: {len(analyzer.block_nodes(block_id))} devices, "
+                f"{len(analyzer.blocks[block_id])} links, {loop_count} independent loops"
+            )
+            for loop in islice(analyzer.iter_block_cycles(block_id), LOOP_SAMPLES):
+                issues.append(f"Loop domain {number} sample loop: {' -> '.join(loop)}")
+        if len(domains) > MAX_LOOP_DOMAINS:
+            remaining = domains[MAX_LOOP_DOMAINS:]
+            issues.append(f"... and {len(remaining)} more loop domains with "
+                          f"{sum(domain[0] for domain in remaining)} independent loops")
+        return issues
+
+    @staticmethod
+    def _loop_issue(loop):
+        return f"Potential network loop detected involving: {' -> '.join(loop)}"
+
+    def _analyze_link_utilization(self, traffic_per_pc=50000, traffic_matrix=None, ecmp=True):
+        """
+        Analyzes link utilization by routing PC traffic along shortest paths
+        by OSPF cost, with equal-cost multipath splitting (see LinkLoadModel).
+        By default each PC sends traffic_per_pc bps spread evenly over all
+        other PCs. traffic_matrix can instead give explicit
+        {(source, destination): bps} demands. A link's utilization is its
+        busier direction's load over its bandwidth.
         """
         analysis = []
-        pcs = [node for node, attr in self.graph.nodes(data=True) if attr.get('type') == 'PC']
-        
-        for u, v, attrs in self.graph.edges(data=True):
-            bandwidth_kbps = attrs.get('bandwidth')
-            if not bandwidth_kbps:
-                continue
+        model = LinkLoadModel(self.graph, ecmp=ecmp)
+        if traffic_matrix is None:
+            loads = model.uniform_loads(traffic_per_pc)
+            self.link_loads = (model, loads, traffic_per_pc)  # Revalidation updates these in place of a rerun
+        else:
+            loads = model.demand_loads((source, destination, bps) for (source, destination), bps in traffic_matrix.items())
+        self._warn_unrouted(model.unrouted)
 
-            # Simple model: assume traffic from all PCs could traverse this link
-            # A more complex model would use routing paths
-            potential_load = len(pcs) * traffic_per_pc
-            utilization = (potential_load / (bandwidth_kbps * 1000)) * 100  # Convert kbps to bps
-            
-            if utilization > 80: # Threshold for high utilization
-                analysis.append({
-                    "link": f"{u}-{v}",
-                    "utilization": round(utilization, 2),
-                    "status": "Heavily utilized"
-                })
+        for u, v, attrs in self.graph.edges(data=True):
+            entry = self._link_utilization(u, v, attrs.get('bandwidth'), loads)
+            if entry:
+                analysis.append(entry)
         return analysis
 
-    def _recommend_load_balancing(self):
+    @staticmethod
+    def _warn_unrouted(unrouted):
+        if round(unrouted) > 0:  # Ignore floating-point residue
+            print(f"Warning: {unrouted:.0f} bps of traffic has no route and was left out of the load analysis.")
+
+    @staticmethod
+    def _link_utilization(u, v, bandwidth_kbps, loads):
+        """The load-analysis entry of link u-v, or None unless it is heavily utilized."""
+        if not bandwidth_kbps:
+            return None
+
+        load = max(loads.get((u, v), 0.0), loads.get((v, u), 0.0))
+        utilization = (load / (bandwidth_kbps * 1000)) * 100  # Convert kbps to bps
+
+        if utilization > 80: # Threshold for high utilization
+            return {
+                "link": f"{u}-{v}",
+                "utilization": round(utilization, 2),
+                "status": "Heavily utilized"
+            }
+        return None
+
+    def critical_links(self):
         """
-        Recommends alternative paths for heavily utilized links.
+        Returns the CriticalLinkAnalyzer for the current graph. It is built on
+        first use and cached until run_all_checks starts again.
+        """
+        if self._critical_links is None or self._critical_links.graph is not self.graph:
+            self._critical_links = CriticalLinkAnalyzer(self.graph)
+        return self._critical_links.analyze()
+
+    def _recommend_load_balancing(self, max_routes=3):
+        """
+        Recommends alternative paths for heavily utilized links. A link that
+        is a bridge is critical. For any other link, up to max_routes
+        alternate routes are found inside its biconnected component, without
+        modifying the graph, and a shortest one is given as the example.
         """
         recommendations = []
-        # This check depends on the results of the utilization analysis
+        # Registered as requiring load_analysis, so its result is in place
         utilized_links = self.results.get('load_analysis', [])
 
         for link_info in utilized_links:
             if link_info['status'] == "Heavily utilized":
                 u, v = link_info['link'].split('-')
-                
-                # Temporarily remove the overloaded edge to find alternate paths
-                original_edge_data = self.graph.get_edge_data(u, v)
-                self.graph.remove_edge(u, v)
-                
-                try:
-                    paths = list(nx.all_simple_paths(self.graph, source=u, target=v, cutoff=5))
-                    if paths:
-                        recommendations.append(
-                            f"For heavily utilized link {u}-{v}, consider distributing load across {len(paths)} alternate routes. "
-                            f"Example alternate path: {' -> '.join(paths[0])}"
-                        )
-                    else:
-                        recommendations.append(f"Link {u}-{v} is critical and has no simple alternate paths.")
-                except nx.NetworkXNoPath:
-                     recommendations.append(f"Link {u}-{v} is critical and has no alternate paths.")
-
-                # Add the edge back for subsequent analysis
-                self.graph.add_edge(u, v, **original_edge_data)
+                if not self.graph.has_edge(u, v):
+                    continue
+
+                paths = self.critical_links().alternate_paths(u, v, k=max_routes)
+                recommendations.append(self._load_balancing_recommendation(u, v, paths))
 
         return recommendations
 
+    @staticmethod
+    def _load_balancing_recommendation(u, v, paths):
+        """The recommendation for heavily utilized link u-v, given its alternate paths."""
+        if paths:
+            return (f"For heavily utilized link {u}-{v}, consider distributing load across {len(paths)} alternate routes. "
+                    f"Example alternate path: {' -> '.join(paths[0])}")
+        return f"Link {u}-{v} is critical and has no alternate paths."
+
+
+NetworkValidator.register_index('address_columns', NetworkValidator._address_columns)
+NetworkValidator.register_index('critical_links', NetworkValidator.critical_links)
+NetworkValidator.register_index('subnet_members', NetworkValidator._subnet_index, uses=('address_columns',))
+NetworkValidator.register_index('vlan_ports', NetworkValidator._vlan_port_index)
+NetworkValidator.register_index('prefix_index', NetworkValidator._prefix_index,
+                                uses=('address_columns', 'subnet_members'))
+NetworkValidator.register_index('gateway_owners', NetworkValidator._gateway_owner_index, uses=('prefix_index',))
+NetworkValidator.register_index('link_mtus', NetworkValidator._link_mtu_index, uses=('subnet_members',))
+NetworkValidator.register_check('duplicate_ips', NetworkValidator._check_duplicate_ips, uses=('address_columns',))
+NetworkValidator.register_check('overlapping_subnets', NetworkValidator._check_overlapping_subnets,
+                                uses=('address_columns', 'prefix_index'))
+NetworkValidator.register_check('network_loops', NetworkValidator._check_network_loops, uses=('critical_links',))
+NetworkValidator.register_check('load_analysis', NetworkValidator._analyze_link_utilization)
+NetworkValidator.register_check('load_balancing_recommendations', NetworkValidator._recommend_load_balancing,
+                                requires=('load_analysis',), uses=('critical_links',))
+NetworkValidator.register_check('missing_components', NetworkValidator._check_missing_components,
+                                uses=('address_columns', 'subnet_members'))
+NetworkValidator.register_check('vlan_issues', NetworkValidator._check_vlan_issues,
+                                uses=('address_columns', 'vlan_ports'))
+NetworkValidator.register_check('gateway_issues', NetworkValidator._check_gateway_issues,
+                                uses=('address_columns', 'gateway_owners'))
+NetworkValidator.register_check('mtu_mismatches', NetworkValidator._check_mtu_mismatches, uses=('link_mtus',))
@@ -0,0 +1,150 @@
+# src/async_runtime.py
+
+import asyncio
+import logging
+import random
+from event_recorder import EventRecorder
+from ospf_engine import OspfDomain
+from simulation_engine import DeviceNode, active_nodes, apply_link_status
+
+
+class _LoopClock:
+    """Simulated seconds since start on the running event loop, scaled by speed."""
+    def __init__(self, speed):
+        self.speed = speed
+        self.start = None
+
+    @property
+    def now(self):
+        if self.start is None:
+            return 0.0
+        return (asyncio.get_running_loop().time() - self.start) * self.speed
+
+
+def _wake(future):
+    if not future.done():
+        future.set_result(None)
+
+
+class AsyncSimulationRuntime:
+    """
+    Runs the simulation on the live clock, with every device a coroutine on
+    one asyncio event loop.
+
+    Each coroutine boots its DeviceNode, then awaits a wake-up future that a
+    loop timer completes at its next tick. Pausing cancels the timer and
+    resuming starts a new one, so a waiting or paused device costs no CPU
+    and is never woken just to check a flag. network_data enables OSPF
+    routing and recorder collects device events, as in SimulationEngine.
+    speed scales the clock: 1.0 is real time, 10.0 runs ten simulated
+    seconds per second. stop() cancels
+    every device task and waits for all of them to finish. Use the runtime
+    as an async context manager to start and stop it:
+
+        async with AsyncSimulationRuntime(graph, seed=42) as runtime:
+            await runtime.run_for(10)
+            await runtime.pause()
+            await runtime.resume()
+    """
+    def __init__(self, graph, seed=None, speed=1.0, network_data=None, recorder=None):
+        if speed <= 0:
+            raise ValueError(f"Simulation speed must be positive, got {speed}.")
+        self.graph = graph
+        self.seed = seed
+        self.rng = random.Random(seed)
+        self.clock = _LoopClock(speed)
+        self.devices = {}
+        self._wakeups = {}  # Device name -> future its coroutine awaits for the next tick
+        self._timers = {}   # Device name -> timer completing that future; None while paused
+        self._tasks = {}
+        self.ospf = OspfDomain.from_network_data(network_data) if network_data else None
+        self.recorder = recorder if recorder is not None else EventRecorder(echo=True)
+
+    async def __aenter__(self):
+        await self.start()
+        return self
+
+    async def __aexit__(self, *exc_info):
+        await self.stop()
+
+    @property
+    def now(self):
+        return self.clock.now
+
+    async def start(self):
+        """Creates one device task per router and switch and lets them all boot."""
+        logging.info("Starting asyncio simulation runtime...")
+        self.clock.start = asyncio.get_running_loop().time()
+        for node_name, device_type, neighbors in active_nodes(self.graph):
+            device = DeviceNode(node_name, device_type, neighbors, self.clock, self.rng, self.ospf,
+                                self.recorder)
+            self.devices[node_name] = device
+            self._tasks[node_name] = asyncio.create_task(self._run_device(device), name=f"Node-{node_name}")
+        await asyncio.sleep(0)  # Every task runs to its first wait, i.e. boots
+
+    async def _run_device(self, device):
+        name = device.device_name
+        device.boot()
+        try:
+            while True:
+                self._wakeups[name] = asyncio.get_running_loop().create_future()
+                if device.is_running:
+                    self._start_timer(name)
+                await self._wakeups[name]
+                device.tick()
+        finally:
+            device.is_running = False
+            timer = self._timers.pop(name, None)
+            if timer is not None:
+                timer.cancel()
+
+    def _start_timer(self, name):
+        delay = self.devices[name].tick_interval() / self.clock.speed
+        self._timers[name] = asyncio.get_running_loop().call_later(delay, _wake, self._wakeups[name])
+
+    async def run_for(self, seconds):
+        """Lets the simulation run for seconds of simulated time."""
+        await asyncio.sleep(seconds / self.clock.speed)
+
+    def _select(self, device_names):
+        return list(self.devices) if device_names is None else list(device_names)
+
+    async def pause(self, device_names=None):
+        """
+        Pauses the named devices (default: all). Once this returns, none of
+        them ticks again until it is resumed.
+        """
+        for name in self._select(device_names):
+            self.devices[name].is_running = False
+            timer = self._timers.get(name)
+            if timer is not None:
+                timer.cancel()
+                self._timers[name] = None
+        await asyncio.sleep(0)
+
+    async def resume(self, device_names=None):
+        """Resumes the named devices (default: all); each restarts its tick interval."""
+        for name in self._select(device_names):
+            device = self.devices[name]
+            if not device.is_running and name in self._tasks and name in self._wakeups:
+                device.is_running = True
+                self._start_timer(name)
+        await asyncio.sleep(0)
+
+    async def set_link_status(self, u, v, status):
+        """Tells both ends of link u-v that it went 'up' or 'down'."""
+        apply_link_status(self.devices, self.ospf, u, v, status)
+        await asyncio.sleep(0)
+
+    async def stop(self):
+        """Cancels every device task and waits until all of them have exited."""
+        tasks = list(self._tasks.values())
+        for task in tasks:
+            task.cancel()
+        results = await asyncio.gather(*tasks, return_exceptions=True)
+        self._tasks = {}
+        errors = [result for result in results
+                  if isinstance(result, BaseException) and not isinstance(result, asyncio.CancelledError)]
+        logging.info("Asyncio simulation runtime stopped (%d device tasks).", len(tasks))
+        if errors:
+            raise errors[0]
@@ -0,0 +1,137 @@
+# src/event_recorder.py
+
+import json
+import logging
+
+# Events kept in memory before the oldest are overwritten (or flushed, with a path)
+DEFAULT_CAPACITY = 65536
+
+# Message template and log level per event kind; peer and detail depend on the kind
+EVENT_FORMATS = {
+    'start':     ("{detail} {device} started.", logging.INFO),
+    'discover':  ("{device} is discovering neighbors...", logging.INFO),
+    'arp':       ("{device} ARP table populated ({detail} entries).", logging.INFO),
+    'routes':    ("{device} initial routing table established ({detail} routes).", logging.INFO),
+    'spf':       ("{device} SPF recalculated: {detail} routes installed.", logging.INFO),
+    'tick':      ("{device} tick.", logging.DEBUG),
+    'pause':     ("Node {device} paused.", logging.INFO),
+    'resume':    ("Node {device} resumed.", logging.INFO),
+    'link_down': ("{device} detected link to {peer} is down. Updating routing table.", logging.WARNING),
+    'link_up':   ("{device} detected link to {peer} is restored. Updating routing table.", logging.INFO),
+}
+EVENT_FIELDS = ('time', 'device', 'kind', 'peer', 'detail')
+
+
+def format_event(event):
+    """Renders an event tuple as the human-readable message for its kind."""
+    time, device, kind, peer, detail = event
+    template = EVENT_FORMATS[kind][0]
+    return f"[t={time:.3f}s] " + template.format(device=device, peer=peer, detail=detail)
+
+
+class EventRecorder:
+    """
+    Structured log of simulation events.
+
+    Each event is a (time, device, kind, peer, detail) tuple stored in a
+    ring buffer preallocated to capacity, so recording is a tuple build and
+    a list store: nothing is formatted and no lock is taken. Messages are
+    only rendered when read (format_event), when echoed to a logger that
+    is enabled for the event's level, or on flush. A simulation runs on one
+    thread or one event loop, so each engine (and each worker process)
+    owns its own recorder.
+
+    sampling maps a kind to N to keep one in every N events of that kind,
+    e.g. {'tick': 100}; the events skipped are counted. With a path, a full
+    buffer is flushed to it as NDJSON instead of overwriting the oldest
+    events. echo also passes each event to logging, as the engine's
+    device messages always were.
+    """
+    def __init__(self, capacity=DEFAULT_CAPACITY, path=None, sampling=None, echo=False):
+        if capacity < 1:
+            raise ValueError(f"Event buffer capacity must be positive, got {capacity}.")
+        unknown = [kind for kind in (sampling or {}) if kind not in EVENT_FORMATS]
+        if unknown:
+            raise ValueError(f"Unknown event kind '{unknown[0]}'. Choose one of: {', '.join(EVENT_FORMATS)}")
+        self.capacity = capacity
+        self.path = path
+        self.sampling = dict(sampling or {})
+        self.echo = echo
+        self.counts = dict.fromkeys(EVENT_FORMATS, 0)  # Events seen per kind, sampled or not
+        self.sampled_out = 0
+        self.overwritten = 0
+        self.flushed = 0
+        self._buffer = [None] * capacity
+        self._start = 0
+        self._size = 0
+
+    def __len__(self):
+        return self._size
+
+    def __iter__(self):
+        """Yields the buffered events, oldest first."""
+        buffer, capacity = self._buffer, self.capacity
+        for offset in range(self._size):
+            yield buffer[(self._start + offset) % capacity]
+
+    def record(self, time, device, kind, peer=None, detail=None):
+        seen = self.counts[kind] = self.counts[kind] + 1
+        every = self.sampling.get(kind)
+        if every and seen % every:
+            self.sampled_out += 1
+            return
+        event = (time, device, kind, peer, detail)
+        if self._size == self.capacity:
+            if self.path is not None:
+                self.flush()
+            else:
+                self._start = (self._start + 1) % self.capacity
+                self._size -= 1
+                self.overwritten += 1
+        self._buffer[(self._start + self._size) % self.capacity] = event
+        self._size += 1
+        if self.echo:
+            level = EVENT_FORMATS[kind][1]
+            if logging.getLogger().isEnabledFor(level):
+                logging.log(level, "%s", format_event(event))
+
+    def clear(self):
+        # The buffer list is reused; its old events are overwritten as new ones arrive
+        self._start = self._size = 0
+
+    def flush(self, path=None):
+        """
+        Appends the buffered events to path (default: the recorder's path)
+        as NDJSON, one object per line, and empties the buffer. Returns the
+        number of events written.
+        """
+        path = path or self.path
+        if path is None:
+            raise ValueError("No NDJSON path to flush simulation events to.")
+        lines = [json.dumps(dict(zip(EVENT_FIELDS, event))) + "\n" for event in self]
+        with open(path, 'a') as f:
+            f.writelines(lines)
+        self.flushed += len(lines)
+        self.clear()
+        return len(lines)
+
+    def summary(self):
+        return (f"Recorded {sum(self.counts.values())} simulation events "
+                f"({self.sampled_out} sampled out, {self.overwritten} overwritten, {self.flushed} flushed).")
+
+    def to_report(self, limit=None):
+        """
+        Returns the events for a JSON report: per-kind counts and the
+        buffered events (the last limit of them, if given) as dicts with
+        their formatted message.
+        """
+        events = list(self)
+        if limit is not None:
+            events = events[-limit:] if limit else []
+        return {
+            'counts': {kind: count for kind, count in self.counts.items() if count},
+            'sampled_out': self.sampled_out,
+            'overwritten': self.overwritten,
+            'flushed': self.flushed,
+            'events': [dict(zip(EVENT_FIELDS, event), message=format_event(event)) for event in events],
+        }
@@ -0,0 +1,73 @@
+# src/event_scheduler.py
+
+import heapq
+import itertools
+
+
+class EventScheduler:
+    """
+    Discrete-event scheduler with a virtual clock.
+
+    Events are (time, sequence, handler, args) tuples on a binary heap.
+    run() pops them in time order, sets the clock to each event's time and
+    calls handler(*args); handlers schedule further events. Nothing sleeps,
+    so a simulated minute takes only as long as its events do. Events at
+    the same time run in the order they were scheduled, so a run is fully
+    deterministic as long as the handlers are.
+    """
+    def __init__(self, start_time=0.0):
+        self.now = start_time
+        self.events_processed = 0
+        self._queue = []
+        self._sequence = itertools.count()
+        self._cancelled = set()  # Sequence numbers of cancelled events still on the heap
+
+    def __len__(self):
+        return len(self._queue)
+
+    def schedule(self, delay, handler, *args):
+        """Schedules handler(*args) delay virtual seconds from now. Returns the event, for cancel."""
+        if delay < 0:
+            raise ValueError(f"Cannot schedule an event {-delay}s in the past.")
+        return self.schedule_at(self.now + delay, handler, *args)
+
+    def schedule_at(self, time, handler, *args):
+        # (time, sequence) is unique, so heap comparisons never reach the handler
+        event = (time, next(self._sequence), handler, args)
+        heapq.heappush(self._queue, event)
+        return event
+
+    def cancel(self, event):
+        """Cancels a scheduled event. It stays on the heap and is skipped when popped."""
+        self._cancelled.add(event[1])
+
+    def run(self, until=None, max_events=None):
+        """
+        Processes events in time order until the queue is empty, the next
+        event is later than until, or max_events have run. With until, the
+        clock then advances to until even if no event falls on it. Returns
+        the number of events processed.
+        """
+        processed = 0
+        queue, cancelled, heappop = self._queue, self._cancelled, heapq.heappop
+        try:
+            while queue and (until is None or queue[0][0] <= until):
+                if max_events is not None and processed >= max_events:
+                    return processed
+                time, sequence, handler, args = heappop(queue)
+                if cancelled and sequence in cancelled:
+                    cancelled.discard(sequence)
+                    continue
+                self.now = time
+                handler(*args)
+                processed += 1
+        finally:
+            self.events_processed += processed
+        if until is not None and until > self.now:
+            self.now = until
+        return processed
+
+    def clear(self):
+        """Drops every pending event; the clock keeps its time."""
+        self._queue.clear()
+        self._cancelled.clear()
@@ -0,0 +1,307 @@
+# src/failure_campaign.py
+
+import math
+import os
+import random
+from concurrent.futures import ProcessPoolExecutor
+from critical_links import CriticalLinkAnalyzer
+
+DUAL_MODES = ('exhaustive', 'sample', 'none')
+# Node types whose reachability a failure scenario is scored on
+ENDPOINT_TYPES = ('PC',)
+# In 'sample' mode, N-2 is exhaustive up to this many link pairs and a random sample of this size above it
+DEFAULT_MAX_PAIRS = 1000000
+# Link pairs per task sent to a worker process
+PAIR_CHUNK = 100000
+
+
+class _UnionFind:
+    """Disjoint sets over 0..size-1 with path halving and union by size."""
+    def __init__(self, size):
+        self.parent = list(range(size))
+        self.size = [1] * size
+
+    def find(self, x):
+        parent = self.parent
+        while parent[x] != x:
+            parent[x] = parent[parent[x]]
+            x = parent[x]
+        return x
+
+    def union(self, a, b):
+        a, b = self.find(a), self.find(b)
+        if a == b:
+            return
+        if self.size[a] < self.size[b]:
+            a, b = b, a
+        self.parent[b] = a
+        self.size[a] += self.size[b]
+
+
+class LinkFailureModel:
+    """
+    Precomputed connectivity structure that scores any one- or two-link
+    failure in O(1), without copying or searching the graph.
+
+    Components come from a union-find over all links, bridges from
+    CriticalLinkAnalyzer. A spanning forest records each node's DFS entry
+    and exit times and the endpoints in its subtree, so the endpoints cut
+    off by removing tree links are subtree-count arithmetic. Every non-tree
+    link gets a random 64-bit label, and every tree link the XOR of the
+    labels of the non-tree links whose cycles cover it. Two non-bridge
+    links disconnect the graph exactly when their labels are equal (the
+    chance of a false match is 2^-64 per pair; seed makes it reproducible).
+
+    Scores are (pieces, isolated): how many components the failure adds,
+    and how many endpoints lose their path to the largest group of
+    endpoints of their original component.
+    """
+    def __init__(self, graph, endpoint_types=ENDPOINT_TYPES, seed=0):
+        self.nodes = list(graph.nodes())
+        index = {node: i for i, node in enumerate(self.nodes)}
+        self.links = [(u, v) for u, v in graph.edges() if u != v]
+        analyzer = CriticalLinkAnalyzer(graph).analyze()
+        self.bridge = [analyzer.is_bridge(u, v) for u, v in self.links]
+
+        components = _UnionFind(len(self.nodes))
+        adjacency = [[] for _ in self.nodes]
+        for link_id, (u, v) in enumerate(self.links):
+            a, b = index[u], index[v]
+            components.union(a, b)
+            adjacency[a].append((b, link_id))
+            adjacency[b].append((a, link_id))
+        self.component = [components.find(i) for i in range(len(self.nodes))]
+
+        weight = [1 if graph.nodes[node].get('type') in endpoint_types else 0 for node in self.nodes]
+        self.component_weight = {}
+        for i, w in enumerate(weight):
+            self.component_weight[self.component[i]] = self.component_weight.get(self.component[i], 0) + w
+
+        # Spanning forest by iterative DFS: entry/exit times and subtree endpoint counts
+        rng = random.Random(seed)
+        self.child = [-1] * len(self.links)  # Tree link -> its lower node; -1 for non-tree links
+        self.label = [0] * len(self.links)
+        self.entry = [-1] * len(self.nodes)
+        self.exit = [0] * len(self.nodes)
+        node_label = [0] * len(self.nodes)
+        clock = 0
+        for root in range(len(self.nodes)):
+            if self.entry[root] != -1:
+                continue
+            self.entry[root] = clock
+            clock += 1
+            stack = [(root, -1, iter(adjacency[root]))]
+            while stack:
+                node, parent_link, neighbors = stack[-1]
+                for neighbor, link_id in neighbors:
+                    if link_id == parent_link:
+                        continue
+                    if self.entry[neighbor] == -1:
+                        self.entry[neighbor] = clock
+                        clock += 1
+                        self.child[link_id] = neighbor
+                        stack.append((neighbor, link_id, iter(adjacency[neighbor])))
+                        break
+                    if self.entry[neighbor] < self.entry[node]:
+                        # Non-tree link, seen first from its lower end
+                        label = rng.getrandbits(64) or 1
+                        self.label[link_id] = label
+                        node_label[node] ^= label
+                        node_label[neighbor] ^= label
+                else:
+                    stack.pop()
+                    self.exit[node] = clock
+                    if stack:
+                        parent = stack[-1][0]
+                        weight[parent] += weight[node]
+                        node_label[parent] ^= node_label[node]
+                        self.label[parent_link] = node_label[node]
+        self.subtree_weight = weight
+
+    def _is_ancestor(self, a, b):
+        return self.entry[a] <= self.entry[b] < self.exit[a]
+
+    def single(self, link_id):
+        """Scores the failure of one link."""
+        if not self.bridge[link_id]:
+            return 0, 0
+        node = self.child[link_id]
+        below = self.subtree_weight[node]
+        return 1, min(below, self.component_weight[self.component[node]] - below)
+
+    def dual(self, first, second):
+        """Scores the simultaneous failure of two links."""
+        first_bridge, second_bridge = self.bridge[first], self.bridge[second]
+        if first_bridge and second_bridge:
+            a, b = self.child[first], self.child[second]
+            if self.component[a] != self.component[b]:
+                return 2, self.single(first)[1] + self.single(second)[1]
+            if self._is_ancestor(b, a):
+                a, b = b, a
+            total = self.component_weight[self.component[a]]
+            weight_a, weight_b = self.subtree_weight[a], self.subtree_weight[b]
+            if self._is_ancestor(a, b):
+                parts = (weight_b, weight_a - weight_b, total - weight_a)
+            else:
+                parts = (weight_a, weight_b, total - weight_a - weight_b)
+            return 2, total - max(parts)
+        if first_bridge:
+            return self.single(first)
+        if second_bridge:
+            return self.single(second)
+
+        if self.label[first] != self.label[second]:
+            return 0, 0
+        # A cut pair: the links cut the subtree between them off their component
+        a, b = self.child[first], self.child[second]
+        if a != -1 and b != -1:
+            if self._is_ancestor(b, a):
+                a, b = b, a
+            if not self._is_ancestor(a, b):
+                return 0, 0
+            cut = self.subtree_weight[a] - self.subtree_weight[b]
+        elif a != -1 or b != -1:
+            a = max(a, b)
+            cut = self.subtree_weight[a]
+        else:
+            return 0, 0
+        return 1, min(cut, self.component_weight[self.component[a]] - cut)
+
+
+def pair_from_index(k, n):
+    """The k-th pair (i, j), i < j, of range(n) in lexicographic order."""
+    i = n - 2 - (math.isqrt(4 * n * (n - 1) - 8 * k - 7) - 1) // 2
+    j = k + i + 1 - n * (n - 1) // 2 + (n - i) * (n - i - 1) // 2
+    return i, j
+
+
+_worker_model = None
+
+
+def _init_worker(model):
+    global _worker_model
+    _worker_model = model
+
+
+def _score_pairs(model, pairs):
+    """Returns (first, second, pieces, isolated) for every partitioning pair."""
+    model = model or _worker_model
+    dual = model.dual
+    partitions = []
+    for first, second in pairs:
+        pieces, isolated = dual(first, second)
+        if pieces:
+            partitions.append((first, second, pieces, isolated))
+    return partitions
+
+
+def _score_pair_rows(model, first_row, last_row):
+    """Scores every pair (i, j), first_row <= i < last_row, i < j."""
+    n = len((model or _worker_model).links)
+    return _score_pairs(model, ((i, j) for i in range(first_row, last_row) for j in range(i + 1, n)))
+
+
+def _score_pair_indexes(model, indexes):
+    n = len((model or _worker_model).links)
+    return _score_pairs(model, (pair_from_index(k, n) for k in indexes))
+
+
+class FailureCampaign:
+    """
+    Evaluates every single-link failure (N-1) and all or a random sample
+    of the dual-link failures (N-2) of a topology, and lists the ones that
+    partition it.
+
+    Scenarios are scored by a LinkFailureModel, so none of them copies
+    the graph. N-2 pairs are split into chunks scored across a process
+    pool; each worker receives the model once, when it starts.
+    """
+    def __init__(self, graph, endpoint_types=ENDPOINT_TYPES, seed=0):
+        self.graph = graph
+        self.seed = seed
+        self.model = LinkFailureModel(graph, endpoint_types, seed)
+
+    def run(self, dual='sample', max_pairs=DEFAULT_MAX_PAIRS, workers=None):
+        """
+        Runs the campaign and returns a report: for 'single' and 'dual',
+        the number of scenarios evaluated and the partitioning ones, as
+        {'links', 'components_added', 'isolated_endpoints'} dicts, worst
+        first. dual is 'exhaustive', 'sample' (exhaustive up to max_pairs
+        pairs, else a random sample of max_pairs) or 'none'. workers=1
+        scores pairs in this process; None uses every CPU.
+        """
+        if dual not in DUAL_MODES:
+            raise ValueError(f"Unknown dual-failure mode '{dual}'. Choose one of: {', '.join(DUAL_MODES)}")
+        model = self.model
+        links = model.links
+        single = [(link_id, *model.single(link_id)) for link_id in range(len(links))]
+        report = {
+            'links': len(links),
+            'single': {'scenarios': len(links), 'partitions': self._sorted(
+                [self._partition((link_id,), pieces, isolated) for link_id, pieces, isolated in single if pieces])},
+        }
+        if dual == 'none':
+            return report
+
+        total_pairs = len(links) * (len(links) - 1) // 2
+        sampled = dual == 'sample' and total_pairs > max_pairs
+        if sampled:
+            indexes = sorted(random.Random(self.seed).sample(range(total_pairs), max_pairs))
+            tasks = [(_score_pair_indexes, indexes[start:start + PAIR_CHUNK])
+                     for start in range(0, len(indexes), PAIR_CHUNK)]
+        else:
+            tasks = [(_score_pair_rows, *rows) for rows in self._row_chunks(len(links))]
+
+        if workers == 1 or len(tasks) < 2:
+            results = [function(model, *args) for function, *args in tasks]
+        else:
+            with ProcessPoolExecutor(max_workers=workers or os.cpu_count(), initializer=_init_worker,
+                                     initargs=(model,)) as executor:
+                futures = [executor.submit(function, None, *args) for function, *args in tasks]
+                results = [future.result() for future in futures]
+
+        partitions = [self._partition((first, second), pieces, isolated)
+                      for result in results for first, second, pieces, isolated in result]
+        report['dual'] = {'scenarios': len(indexes) if sampled else total_pairs, 'sampled': sampled,
+                          'partitions': self._sorted(partitions)}
+        return report
+
+    @staticmethod
+    def _row_chunks(n):
+        """Splits the pair rows 0..n-1 into ranges of about PAIR_CHUNK pairs each."""
+        chunks = []
+        start, pairs = 0, 0
+        for i in range(n):
+            pairs += n - 1 - i
+            if pairs >= PAIR_CHUNK:
+                chunks.append((start, i + 1))
+                start, pairs = i + 1, 0
+        if start < n:
+            chunks.append((start, n))
+        return chunks
+
+    def _partition(self, link_ids, pieces, isolated):
+        return {'links': [self.model.links[link_id] for link_id in link_ids],
+                'components_added': pieces, 'isolated_endpoints': isolated}
+
+    @staticmethod
+    def _sorted(partitions):
+        return sorted(partitions, key=lambda partition: -partition['isolated_endpoints'])
+
+
+def print_campaign_report(report, limit=10):
+    """Prints a campaign report, with the limit worst scenarios of each kind."""
+    print(f"\n--- Failure Campaign ({report['links']} links) ---")
+    for kind, title in (('single', 'N-1'), ('dual', 'N-2')):
+        if kind not in report:
+            continue
+        section = report[kind]
+        scope = 'sampled' if section.get('sampled') else 'all'
+        print(f"{title}: {len(section['partitions'])} of {section['scenarios']} scenarios ({scope}) "
+              f"partition the network")
+        for partition in section['partitions'][:limit]:
+            links = ', '.join(f"{u}<->{v}" for u, v in partition['links'])
+            print(f"  ❌ {links}: +{partition['components_added']} components, "
+                  f"{partition['isolated_endpoints']} endpoints isolated")
+        if len(section['partitions']) > limit:
+            print(f"  ... and {len(section['partitions']) - limit} more")
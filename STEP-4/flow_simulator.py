@@ -0,0 +1,484 @@
+# src/flow_simulator.py
+
+from network_model import ip_to_int, int_to_ip, network_key
+from traffic_engine import ospf_cost
+
+try:
+    import numpy as np
+    from scipy import sparse
+    from scipy.sparse import csgraph
+except ImportError:  # NumPy/SciPy are optional; only the flow simulator needs them
+    np = sparse = csgraph = None
+
+ENDPOINT_TYPES = ('PC',)
+# Synthetic host blocks are allocated from here (RFC 6598 space, unlikely to clash with configs)
+SYNTHETIC_BASE = '100.64.0.0'
+# Capacity of a link without a configured bandwidth (bps)
+DEFAULT_LINK_CAPACITY_BPS = 1000000000
+# Mean rate of one flow (bps); flow rates are exponentially distributed
+DEFAULT_FLOW_BPS = 100000
+# Flows forwarded per vectorized batch, to bound memory
+FLOW_BATCH = 262144
+# Hop limit: a flow still in transit after this many router hops is dropped
+MAX_HOPS = 64
+DROP_REASONS = ('no_route', 'host_unreachable', 'ttl_expired')
+
+# FIB entries that are not a next hop
+NO_ROUTE = -1
+DELIVER = -2
+
+
+def numpy_available():
+    return np is not None
+
+
+class FlowSimulator:
+    """
+    Flow-level traffic simulation: flows between endpoints (PCs) are
+    forwarded hop by hop through per-router FIBs derived from the topology,
+    and per-link throughput, drops and path lengths are recorded per step.
+
+    Addressing: endpoints keep their configured address and subnet when
+    network_data has one, otherwise each gateway gets a synthetic block for
+    the endpoints behind it. An endpoint's gateway is its neighbor behind
+    its cheapest link. Each gateway advertises its subnets; a subnet whose
+    hosts sit behind several gateways is advertised by the one with the
+    most of them, and every other host in it gets a /32 route from its own
+    gateway, so lookups are genuinely longest-prefix.
+
+    Forwarding: one batched Dijkstra toward every advertising gateway, by
+    OSPF cost, gives each router its next hop per prefix. A router without
+    a route to a prefix falls back to the covering prefix's route, exactly
+    as a longest-prefix lookup in its own FIB would. The FIB is a dense
+    (router x prefix) matrix, with a parallel matrix of outgoing link ids.
+    The prefixes never overlap partially, so one sorted interval table maps
+    every address to its most specific prefix: each flow's lookup is a
+    vectorized searchsorted, and each hop for a whole batch of flows is a
+    gather from the two matrices. Endpoints do not forward traffic.
+
+    A flow lasts the step it arrives in and sends at a constant rate.
+    Offered load above a link's capacity counts as dropped on that link,
+    and each delivered flow gets the share of its rate that its most
+    congested link carries (its bottleneck ratio); the load offered to
+    links further along is not reduced. Flows are dropped outright with no route, when the destination address
+    is not a reachable host behind the gateway it arrives at, or after
+    MAX_HOPS. Requires NumPy and SciPy.
+    """
+    def __init__(self, graph, network_data=None, endpoint_types=ENDPOINT_TYPES, flows_per_second=100000,
+                 mean_flow_bps=DEFAULT_FLOW_BPS, unknown_fraction=0.0, seed=None):
+        if np is None:
+            raise ImportError("NumPy and SciPy are required for FlowSimulator")
+        self.graph = graph
+        self.flows_per_second = flows_per_second
+        self.mean_flow_bps = mean_flow_bps
+        self.unknown_fraction = unknown_fraction  # Share of flows sent to a random address in the plan
+        self.rng = np.random.default_rng(seed)
+
+        # Transit nodes first, so router indexes are FIB rows
+        endpoint_set = {node for node, attrs in graph.nodes(data=True) if attrs.get('type') in endpoint_types}
+        self.nodes = [node for node in graph if node not in endpoint_set] + [node for node in graph
+                                                                             if node in endpoint_set]
+        self.transit_count = len(graph) - len(endpoint_set)
+        self.index = {node: i for i, node in enumerate(self.nodes)}
+        self.down_links = set()
+
+        self._build_arcs()
+        self._assign_gateways(endpoint_set)
+        self._build_address_plan(network_data or {})
+        self._build_lookup_table()
+        self._fib = None
+
+        self.times = []
+        self.steps = []
+        self.throughput = []  # Per step: bps carried on each arc
+        self.link_drops = []  # Per step: bps dropped on each arc
+
+    # --- Topology ---------------------------------------------------------
+
+    def _build_arcs(self):
+        tails, heads, capacities, costs = [], [], [], []
+        for u, v in self.graph.edges():
+            if u == v:
+                continue
+            bandwidth = self._bandwidth(u, v)
+            capacity = bandwidth * 1000 if bandwidth else DEFAULT_LINK_CAPACITY_BPS
+            iu, iv = self.index[u], self.index[v]
+            tails += [iu, iv]
+            heads += [iv, iu]
+            capacities += [capacity, capacity]
+            costs += [ospf_cost(bandwidth)] * 2
+        self.arc_tail = np.array(tails, dtype=np.int64)
+        self.arc_head = np.array(heads, dtype=np.int64)
+        self.arc_capacity = np.array(capacities, dtype=np.float64)
+        self.arc_cost = np.array(costs, dtype=np.float64)
+        keys = self.arc_tail * len(self.nodes) + self.arc_head
+        self._arc_order = np.argsort(keys)
+        self._arc_keys = keys[self._arc_order]
+
+    def _bandwidth(self, u, v):
+        """The link's configured bandwidth in kbps, or None ('N/A' when the config has none)."""
+        bandwidth = self.graph.adj[u][v].get('bandwidth')
+        return bandwidth if isinstance(bandwidth, int) else None
+
+    def _arc_ids(self, tails, heads):
+        keys = np.asarray(tails, dtype=np.int64) * len(self.nodes) + heads
+        return self._arc_order[np.searchsorted(self._arc_keys, keys)]
+
+    def _assign_gateways(self, endpoint_set):
+        """Each endpoint's gateway: the transit neighbor behind its cheapest link (lowest index on ties)."""
+        endpoints, gateways = [], []
+        for node in self.nodes[self.transit_count:]:
+            options = [(ospf_cost(self._bandwidth(node, neighbor)), self.index[neighbor])
+                       for neighbor in self.graph.adj[node] if neighbor not in endpoint_set and neighbor != node]
+            if options:
+                endpoints.append(self.index[node])
+                gateways.append(min(options)[1])
+        self.endpoints = np.array(endpoints, dtype=np.int64)
+        self.gateway = np.array(gateways, dtype=np.int64)
+        self.uplink = self._arc_ids(self.endpoints, self.gateway)    # Endpoint -> gateway arc
+        self.downlink = self._arc_ids(self.gateway, self.endpoints)  # Gateway -> endpoint arc
+
+    def set_link_status(self, u, v, status):
+        """Takes link u-v 'down' or brings it back 'up'; routes are recomputed at the next step."""
+        if status not in ('down', 'up'):
+            raise ValueError(f"Unknown link status '{status}'. Choose one of: down, up")
+        key = (u, v) if u <= v else (v, u)
+        if status == 'down':
+            self.down_links.add(key)
+        else:
+            self.down_links.discard(key)
+        self._fib = None
+
+    def _arc_up(self):
+        up = np.ones(len(self.arc_tail), dtype=bool)
+        for u, v in self.down_links:
+            if self.graph.has_edge(u, v) and u != v:
+                up[self._arc_ids([self.index[u], self.index[v]], [self.index[v], self.index[u]])] = False
+        return up
+
+    # --- Addressing -------------------------------------------------------
+
+    def _build_address_plan(self, network_data):
+        """Assigns every endpoint an address and builds the advertised prefixes."""
+        address = np.full(len(self.endpoints), -1, dtype=np.int64)
+        subnet_hosts = {}  # (network, prefix_len) -> endpoint positions
+        for position, node_index in enumerate(self.endpoints):
+            for if_data in network_data.get(self.nodes[node_index], {}).get('interfaces', {}).values():
+                try:
+                    key = network_key(if_data['ip_address'], if_data['subnet_mask'])
+                    address[position] = ip_to_int(if_data['ip_address'])
+                except (KeyError, ValueError):
+                    continue
+                subnet_hosts.setdefault(key, []).append(position)
+                break
+
+        # Synthetic blocks, per gateway, for endpoints without a configured address
+        unaddressed = {}
+        for position in np.flatnonzero(address < 0):
+            unaddressed.setdefault(int(self.gateway[position]), []).append(position)
+        cursor = ip_to_int(SYNTHETIC_BASE)
+        for gateway in sorted(unaddressed):
+            positions = unaddressed[gateway]
+            host_bits = max(8, (len(positions) + 1).bit_length())
+            network = -(-cursor >> host_bits) << host_bits  # Align up to the block size
+            address[positions] = network + 1 + np.arange(len(positions))
+            subnet_hosts[(network, 32 - host_bits)] = positions
+            cursor = network + (1 << host_bits)
+        self.address = address
+
+        prefixes = {}  # (network, prefix_len) -> advertising gateway
+        for key, positions in subnet_hosts.items():
+            gateways = [int(self.gateway[position]) for position in positions]
+            owner = min(set(gateways), key=lambda gateway: (-gateways.count(gateway), gateway))
+            prefixes[key] = owner
+            for position, gateway in zip(positions, gateways):
+                if gateway != owner:
+                    prefixes.setdefault((int(address[position]), 32), gateway)
+        self.prefixes = sorted(prefixes)
+        self.prefix_owner = np.array([prefixes[key] for key in self.prefixes], dtype=np.int64)
+
+        order = np.argsort(address, kind='stable')
+        self._host_addresses = address[order]
+        self._host_positions = order
+
+    def _build_lookup_table(self):
+        """
+        Flattens the prefixes into sorted disjoint intervals, each labelled
+        with the most specific prefix covering it (-1 for none), and records
+        each prefix's covering parent.
+        """
+        starts, labels = [0], [NO_ROUTE]
+        parent = [-1] * len(self.prefixes)
+        stack = []  # (end, prefix id) of the prefixes enclosing the current address
+
+        def emit(start, label):
+            if starts[-1] == start:
+                labels[-1] = label
+            else:
+                starts.append(start)
+                labels.append(label)
+
+        for prefix_id, (network, prefix_len) in enumerate(self.prefixes):
+            while stack and stack[-1][0] <= network:
+                end, _ = stack.pop()
+                emit(end, stack[-1][1] if stack else NO_ROUTE)
+            parent[prefix_id] = stack[-1][1] if stack else -1
+            emit(network, prefix_id)
+            stack.append((network + (1 << (32 - prefix_len)), prefix_id))
+        while stack:
+            end, _ = stack.pop()
+            emit(end, stack[-1][1] if stack else NO_ROUTE)
+
+        self._interval_starts = np.array(starts, dtype=np.int64)
+        self.address_range = (starts[1], starts[-1]) if len(starts) > 1 else (0, 1)  # Span of the plan
+        self._interval_prefix = np.array(labels, dtype=np.int64)
+        self.prefix_parent = parent
+
+    def lookup(self, addresses):
+        """Longest-prefix match of an array of addresses: prefix ids, -1 where none matches."""
+        return self._interval_prefix[np.searchsorted(self._interval_starts, addresses, side='right') - 1]
+
+    def _host_of(self, addresses):
+        """Endpoint positions owning the addresses, -1 for unassigned ones."""
+        found = np.searchsorted(self._host_addresses, addresses)
+        found = np.minimum(found, len(self._host_addresses) - 1)
+        hit = self._host_addresses[found] == addresses
+        return np.where(hit, self._host_positions[found], -1)
+
+    # --- FIB --------------------------------------------------------------
+
+    def _build_fib(self):
+        """Computes the (router x prefix) next-hop and outgoing-arc matrices."""
+        up = self._arc_up()
+        transit = (self.arc_tail < self.transit_count) & (self.arc_head < self.transit_count) & up
+        count = self.transit_count
+        costs = sparse.csr_matrix((self.arc_cost[transit], (self.arc_tail[transit], self.arc_head[transit])),
+                                  shape=(count, count))
+        owners, owner_row = np.unique(self.prefix_owner, return_inverse=True)
+        fib = np.full((count, len(self.prefixes)), NO_ROUTE, dtype=np.int32)
+        if len(owners):
+            # Costs are symmetric, so the predecessor of a router on the path
+            # from a gateway is that router's next hop toward the gateway
+            _, predecessors = csgraph.dijkstra(costs, directed=True, indices=owners, return_predecessors=True)
+            fib[:] = predecessors[owner_row].T
+            fib[fib < 0] = NO_ROUTE
+            fib[self.prefix_owner, np.arange(len(self.prefixes))] = DELIVER
+        for prefix_id in sorted(range(len(self.prefixes)), key=lambda p: self.prefixes[p][1]):
+            parent = self.prefix_parent[prefix_id]
+            if parent >= 0:
+                column = fib[:, prefix_id]
+                missing = column == NO_ROUTE
+                column[missing] = fib[missing, parent]
+
+        arcs = np.full(fib.shape, -1, dtype=np.int32)
+        moving = fib >= 0
+        rows = np.nonzero(moving)[0]
+        arcs[moving] = self._arc_ids(rows, fib[moving])
+        self._fib = (fib.ravel(), arcs.ravel(), up)
+
+    # --- Simulation -------------------------------------------------------
+
+    def run(self, duration, step=1.0):
+        """Simulates duration seconds in steps of step seconds and returns the step reports."""
+        reports = []
+        time = self.times[-1] if self.times else 0.0
+        for _ in range(int(round(duration / step))):
+            time += step
+            reports.append(self.step(time, step))
+        return reports
+
+    def step(self, time, duration=1.0):
+        """
+        Generates the flows arriving in one step of duration seconds,
+        forwards them and records the step. Returns its report.
+        """
+        if self._fib is None:
+            self._build_fib()
+        offered = np.zeros(len(self.arc_tail))
+        path_lengths = np.zeros(MAX_HOPS + 3, dtype=np.int64)
+        totals = dict.fromkeys(DROP_REASONS, 0)
+        totals.update(flows=0, delivered=0, offered_bps=0.0)
+        delivered = []  # Per batch: (source, host, first FIB slot, rate) of the delivered flows
+        if len(self.endpoints) >= 2:
+            flow_count = int(self.rng.poisson(self.flows_per_second * duration))
+            for start in range(0, flow_count, FLOW_BATCH):
+                delivered.append(self._forward_batch(min(FLOW_BATCH, flow_count - start), offered,
+                                                     path_lengths, totals))
+
+        carried = np.minimum(offered, self.arc_capacity)
+        dropped = offered - carried
+        throttled, delivered_bps = 0, 0.0
+        if dropped.any():
+            ratio = np.divide(carried, offered, out=np.ones_like(offered), where=offered > 0)
+            bottleneck = self._path_bottleneck(ratio)
+            for source, host, slot, rate in delivered:
+                share = np.minimum(np.minimum(ratio[self.uplink[source]], ratio[self.downlink[host]]),
+                                   bottleneck[slot])
+                throttled += int(np.count_nonzero(share < 1))
+                delivered_bps += float((rate * share).sum())
+        else:
+            delivered_bps = float(sum(rate.sum() for _, _, _, rate in delivered))
+        self.times.append(time)
+        self.throughput.append(carried)
+        self.link_drops.append(dropped)
+        hops = np.arange(len(path_lengths))
+        report = {
+            'time': time,
+            'flows': totals['flows'],
+            'delivered': totals['delivered'],
+            'throttled': throttled,
+            'dropped': {reason: totals[reason] for reason in DROP_REASONS},
+            'offered_bps': totals['offered_bps'],
+            'delivered_bps': delivered_bps,
+            'link_drop_bps': float(dropped.sum()),
+            'congested_links': int(np.count_nonzero(dropped)),
+            'mean_path_length': float((hops * path_lengths).sum() / max(1, path_lengths.sum())),
+            'max_path_length': int(hops[path_lengths > 0].max()) if path_lengths.any() else 0,
+        }
+        self.steps.append(report)
+        return report
+
+    def _forward_batch(self, size, offered, path_lengths, totals):
+        """
+        Forwards size new flows, adding their load to offered. Returns the
+        delivered flows as (source, host, first FIB slot, rate) arrays.
+        """
+        rng = self.rng
+        fib, arcs, up = self._fib
+        prefix_count = len(self.prefixes)
+        arc_count = len(offered)
+
+        source = rng.integers(0, len(self.endpoints), size)
+        target = (source + rng.integers(1, len(self.endpoints), size)) % len(self.endpoints)
+        address = self.address[target]
+        if self.unknown_fraction:
+            unknown = np.flatnonzero(rng.random(size) < self.unknown_fraction)
+            address[unknown] = rng.integers(*self.address_range, len(unknown))
+            target[unknown] = self._host_of(address[unknown])  # Usually -1: no such host
+        rate = rng.exponential(self.mean_flow_bps, size)
+        totals['flows'] += size
+        totals['offered_bps'] += float(rate.sum())
+
+        prefix = self.lookup(address)
+        routable = (prefix >= 0) & up[self.uplink[source]]
+        totals['no_route'] += int(size - np.count_nonzero(routable))
+        flows = np.flatnonzero(routable)
+        offered += np.bincount(self.uplink[source[flows]], weights=rate[flows], minlength=arc_count)
+        node = self.gateway[source[flows]]
+        prefix = prefix[flows]
+        first_slot = np.zeros(size, dtype=np.int64)
+        first_slot[flows] = node * prefix_count + prefix
+        done_flows, done_hosts = [], []
+
+        for hop in range(MAX_HOPS + 1):
+            slot = node * prefix_count + prefix
+            next_hop = fib[slot]
+
+            arrived = next_hop == DELIVER
+            if arrived.any():
+                arriving = flows[arrived]
+                host = target[arriving]
+                safe = np.maximum(host, 0)
+                ok = (host >= 0) & (self.gateway[safe] == node[arrived]) & up[self.downlink[safe]]
+                done = arriving[ok]
+                totals['delivered'] += len(done)
+                done_flows.append(done)
+                done_hosts.append(host[ok])
+                totals['host_unreachable'] += int(len(arriving) - len(done))
+                offered += np.bincount(self.downlink[host[ok]], weights=rate[done], minlength=arc_count)
+                path_lengths[hop + 2] += len(done)  # Uplink, hop router links, downlink
+            totals['no_route'] += int(np.count_nonzero(next_hop == NO_ROUTE))
+
+            moving = next_hop >= 0
+            if not moving.any():
+                break
+            if hop == MAX_HOPS:
+                totals['ttl_expired'] += int(np.count_nonzero(moving))
+                break
+            flows = flows[moving]
+            offered += np.bincount(arcs[slot[moving]], weights=rate[flows], minlength=arc_count)
+            node = next_hop[moving].astype(np.int64)
+            prefix = prefix[moving]
+
+        done = np.concatenate(done_flows) if done_flows else np.zeros(0, dtype=np.int64)
+        host = np.concatenate(done_hosts) if done_hosts else np.zeros(0, dtype=np.int64)
+        return source[done], host, first_slot[done], rate[done]
+
+    def _path_bottleneck(self, ratio):
+        """
+        For every FIB slot (router, prefix), the lowest of ratio over the
+        router links from that router to the prefix's gateway. Each round
+        of pointer doubling covers twice the hops of the one before.
+        """
+        fib, arcs, _ = self._fib
+        prefix_count = len(self.prefixes)
+        slots = np.arange(len(fib))
+        moving = fib >= 0
+        bottleneck = np.ones(len(fib))
+        bottleneck[moving] = ratio[arcs[moving]]
+        following = slots.copy()  # Slot of the next router on the path; delivering slots point to themselves
+        following[moving] = fib[moving].astype(np.int64) * prefix_count + slots[moving] % prefix_count
+        covered = 1
+        while covered <= MAX_HOPS:
+            bottleneck = np.minimum(bottleneck, bottleneck[following])
+            following = following[following]
+            covered *= 2
+        return bottleneck
+
+    # --- Results ----------------------------------------------------------
+
+    def link_series(self, u, v):
+        """[(time, carried bps, dropped bps)] for the u -> v direction of a link."""
+        arc = self._arc_ids([self.index[u]], [self.index[v]])[0]
+        return [(time, float(carried[arc]), float(dropped[arc]))
+                for time, carried, dropped in zip(self.times, self.throughput, self.link_drops)]
+
+    def busiest_links(self, k=10):
+        """
+        The k link directions with the highest peak utilization (offered
+        load over capacity, so saturated links rank above 100%):
+        [(u, v, mean carried bps, peak utilization)].
+        """
+        if not self.throughput:
+            return []
+        carried = np.vstack(self.throughput)
+        mean = carried.mean(axis=0)
+        peak = (carried + np.vstack(self.link_drops)).max(axis=0) / self.arc_capacity
+        return [(self.nodes[self.arc_tail[arc]], self.nodes[self.arc_head[arc]], float(mean[arc]), float(peak[arc]))
+                for arc in np.argsort(-peak, kind='stable')[:k] if peak[arc] > 0]
+
+    def address_of(self, endpoint):
+        position = np.flatnonzero(self.endpoints == self.index[endpoint])
+        return int_to_ip(int(self.address[position[0]])) if len(position) else None
+
+
+def print_traffic_report(simulator, limit=5):
+    """Prints the flow and throughput totals over all steps and the busiest links."""
+    steps = simulator.steps
+    print(f"\n--- Traffic Simulation ({len(steps)} steps, {len(simulator.endpoints)} endpoints, "
+          f"{len(simulator.prefixes)} prefixes) ---")
+    if not steps:
+        print("No traffic simulated.")
+        return
+    flows = sum(step['flows'] for step in steps)
+    delivered = sum(step['delivered'] for step in steps)
+    throttled = sum(step['throttled'] for step in steps)
+    print(f"Flows: {flows}, delivered: {delivered} ({delivered / max(1, flows):.1%}), "
+          f"{throttled} of them cut back by congested links")
+    offered_bps = sum(step['offered_bps'] for step in steps)
+    delivered_bps = sum(step['delivered_bps'] for step in steps)
+    link_drop_bps = sum(step['link_drop_bps'] for step in steps)
+    print(f"Throughput: {delivered_bps / 1e6:.2f} of {offered_bps / 1e6:.2f} Mbps delivered "
+          f"({delivered_bps / max(1.0, offered_bps):.1%}), {link_drop_bps / 1e6:.2f} Mbps dropped on links")
+    for reason in DROP_REASONS:
+        count = sum(step['dropped'][reason] for step in steps)
+        if count:
+            print(f"  Dropped ({reason.replace('_', ' ')}): {count}")
+    mean_length = sum(step['mean_path_length'] * step['delivered'] for step in steps) / max(1, delivered)
+    print(f"Path length: mean {mean_length:.2f} links, max {max(step['max_path_length'] for step in steps)}")
+    congested = [step for step in steps if step['congested_links']]
+    if congested:
+        print(f"⚠️ Congestion in {len(congested)} steps, up to {max(s['congested_links'] for s in congested)} "
+              f"links dropping traffic")
+    for u, v, mean, peak in simulator.busiest_links(limit):
+        print(f"  {u} -> {v}: {mean / 1e6:.2f} Mbps mean carried, {peak:.0%} peak utilization")
@@ -52,10 +52,11 @@ def main():
     validation_results = validator.run_all_checks()
     print_results(validation_results)
 
-    # --- Step 4: Multithreaded Simulation ---
-    print("\nStep 4: Initializing multithreaded simulation engine...")
-    sim_engine = SimulationEngine(graph)
+    # --- Step 4: Discrete-Event Simulation ---
+    print("\nStep 4: Initializing discrete-event simulation engine...")
+    sim_engine = SimulationEngine(graph, network_data=network_data)
     sim_engine.start_simulation()
+    sim_engine.start_traffic(flows_per_second=500)
     
     # Run Day-1 Scenario
     sim_engine.run_day1_scenario()
@@ -63,6 +64,12 @@ def main():
     # Run Day-2 Scenario
     sim_engine.run_day2_fault_injection()
 
+    # Evaluate every single and dual link failure
+    sim_engine.run_failure_campaign()
+
+    # Traffic carried through Day-1 and Day-2
+    sim_engine.report_traffic()
+
     # Demonstrate Pause/Resume
     sim_engine.pause_and_resume()
 
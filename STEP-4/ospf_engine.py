@@ -0,0 +1,413 @@
+# src/ospf_engine.py
+
+import heapq
+from collections import defaultdict
+from network_model import ip_to_int, int_to_ip, network_key, wildcard_to_prefix
+from traffic_engine import ospf_cost
+from prefix_index import PrefixIndex
+
+# IOS auto-cost reference bandwidth when none is configured (Mbps)
+DEFAULT_REFERENCE_MBPS = 100
+BACKBONE_AREA = 0
+UNREACHABLE = float('inf')
+
+
+def _format_prefix(prefix):
+    return f"{int_to_ip(prefix[0])}/{prefix[1]}"
+
+
+class AreaGraph:
+    """
+    One OSPF area's link-state graph, built from its router LSAs: routers
+    are indexed 0..n-1 and out[i] maps each adjacent router to the cost of
+    i's outgoing interface. Routers sharing a subnet are adjacent; a
+    multi-access subnet joins every pair of its routers (no pseudonode).
+    Parallel links keep the cheapest cost in each direction.
+    """
+    def __init__(self, area):
+        self.area = area
+        self.routers = []
+        self.index = {}
+        self.out = []
+        self.stubs = []  # Per router: [(prefix, cost)] for its interfaces in the area
+
+    def add_router(self, router):
+        if router not in self.index:
+            self.index[router] = len(self.routers)
+            self.routers.append(router)
+            self.out.append({})
+            self.stubs.append([])
+        return self.index[router]
+
+
+class LinkStateDatabase:
+    """
+    The LSDB of every OSPF area, built from parsed configs. An interface
+    runs OSPF when its address matches a 'network ... area' statement of
+    the router's process (the most specific statement wins). Its cost is
+    'ip ospf cost' if set, else the reference bandwidth divided by the
+    interface bandwidth.
+    """
+    def __init__(self):
+        self.areas = {}  # Area ID -> AreaGraph
+        self.router_areas = defaultdict(list)
+
+    @classmethod
+    def from_network_data(cls, network_data):
+        lsdb = cls()
+        subnet_members = defaultdict(list)  # (area, prefix) -> [(router, cost)]
+        for router, data in network_data.items():
+            ospf = data.get('ospf') or {}
+            statements = []
+            for statement in ospf.get('networks', []):
+                try:
+                    prefix_len = wildcard_to_prefix(ip_to_int(statement['wildcard']))
+                except ValueError:
+                    continue
+                statements.append((prefix_len, statement['network'], statement['wildcard'], statement['area']))
+            if not statements:
+                continue
+            statements.sort(key=lambda statement: -statement[0])  # Most specific first
+            reference_kbps = ospf.get('reference_bandwidth', DEFAULT_REFERENCE_MBPS) * 1000
+
+            # Each interface joins the area of the most specific statement covering its address
+            index = PrefixIndex.from_network_data({router: data})
+            interface_areas = {}
+            for _, network, wildcard, area in statements:
+                try:
+                    covered = index.interfaces_in(network, wildcard)
+                except ValueError:
+                    continue
+                for interface in covered:
+                    interface_areas.setdefault(interface['interface'], area)
+
+            for if_name, if_data in data.get('interfaces', {}).items():
+                if if_name not in interface_areas:
+                    continue
+                area = interface_areas[if_name]
+                prefix = network_key(if_data['ip_address'], if_data['subnet_mask'])
+                cost = if_data.get('ospf_cost') or ospf_cost(if_data.get('bandwidth'), reference_kbps)
+                graph = lsdb._area(area)
+                graph.stubs[graph.add_router(router)].append((prefix, cost))
+                if area not in lsdb.router_areas[router]:
+                    lsdb.router_areas[router].append(area)
+                subnet_members[(area, prefix)].append((router, cost))
+
+        for (area, _), members in subnet_members.items():
+            graph = lsdb.areas[area]
+            for router, cost in members:
+                for neighbor, _ in members:
+                    if neighbor != router:
+                        i, j = graph.index[router], graph.index[neighbor]
+                        graph.out[i][j] = min(cost, graph.out[i].get(j, cost))
+        return lsdb
+
+    def _area(self, area):
+        if area not in self.areas:
+            self.areas[area] = AreaGraph(area)
+        return self.areas[area]
+
+
+def full_spf(out, source):
+    """
+    Dijkstra from source over out. Returns (dist, parents): parents[x]
+    holds every predecessor of x on an equal-cost shortest path.
+    """
+    dist = [UNREACHABLE] * len(out)
+    parents = [()] * len(out)
+    dist[source] = 0
+    heap = [(0, source)]
+    while heap:
+        d, x = heapq.heappop(heap)
+        if d > dist[x]:
+            continue
+        for y, cost in out[x].items():
+            candidate = d + cost
+            if candidate < dist[y]:
+                dist[y] = candidate
+                parents[y] = (x,)
+                heapq.heappush(heap, (candidate, y))
+            elif candidate == dist[y]:
+                parents[y] += (x,)
+    return dist, parents
+
+
+def remove_arc(out, tree, u, v):
+    """
+    Repairs a shortest-path tree after arc u->v was removed from out.
+    Only the subtree that depended on the arc is recomputed: its nodes
+    start from their best distance through the unaffected part of the
+    tree, and a Dijkstra pass restricted to them settles the rest.
+    In-neighbors are found through out, so every arc must have its
+    reverse: take both arcs of a link out before repairing either.
+    Returns the number of nodes whose distance was recomputed.
+    """
+    dist, parents = tree
+    if u not in parents[v]:
+        return 0
+    if len(parents[v]) > 1:
+        parents[v] = tuple(parent for parent in parents[v] if parent != u)  # Another equal-cost path remains
+        return 0
+
+    # Nodes whose every shortest path used the arc
+    affected = {v}
+    stack = [v]
+    while stack:
+        x = stack.pop()
+        for y in out[x]:
+            if y not in affected and x in parents[y] and all(parent in affected for parent in parents[y]):
+                affected.add(y)
+                stack.append(y)
+    # Affected nodes get strictly longer paths, so they stop being parents of the others
+    for x in affected:
+        for y in out[x]:
+            if y not in affected and x in parents[y]:
+                parents[y] = tuple(parent for parent in parents[y] if parent not in affected)
+
+    heap = []
+    for x in affected:
+        best = UNREACHABLE
+        for w in out[x]:
+            cost = out[w].get(x)
+            if cost is not None and w not in affected and dist[w] + cost < best:
+                best = dist[w] + cost
+        dist[x] = best
+        parents[x] = ()
+        if best < UNREACHABLE:
+            heap.append((best, x))
+    heapq.heapify(heap)
+
+    settled = set()
+    while heap:
+        d, x = heapq.heappop(heap)
+        if x in settled or d > dist[x]:
+            continue
+        settled.add(x)
+        parents[x] = tuple(w for w in out[x] if (w not in affected or w in settled)
+                           and out[w].get(x) is not None and dist[w] + out[w][x] == d)
+        for y, cost in out[x].items():
+            if y in affected and y not in settled and d + cost < dist[y]:
+                dist[y] = d + cost
+                heapq.heappush(heap, (dist[y], y))
+    return len(affected)
+
+
+def add_arc(out, tree, u, v):
+    """
+    Repairs a shortest-path tree after arc u->v was added to out. Only
+    nodes whose distance improves are visited. Returns their number.
+    """
+    dist, parents = tree
+    candidate = dist[u] + out[u][v]
+    if candidate == UNREACHABLE or candidate > dist[v]:
+        return 0
+    if candidate == dist[v]:
+        if u not in parents[v]:
+            parents[v] += (u,)
+        return 0
+
+    dist[v] = candidate
+    parents[v] = (u,)
+    heap = [(candidate, v)]
+    improved = 0
+    while heap:
+        d, x = heapq.heappop(heap)
+        if d > dist[x]:
+            continue
+        improved += 1
+        for y, cost in out[x].items():
+            candidate = d + cost
+            if candidate < dist[y]:
+                dist[y] = candidate
+                parents[y] = (x,)
+                heapq.heappush(heap, (candidate, y))
+            elif candidate == dist[y] and x not in parents[y]:
+                parents[y] += (x,)
+    return improved
+
+
+class OspfDomain:
+    """
+    Link-state routing for every OSPF router in the network.
+
+    Each router keeps one shortest-path tree per area it belongs to, with
+    equal-cost parents for ECMP. When a link goes down or comes back up,
+    the trees are repaired by incremental SPF (remove_arc / add_arc), so
+    only routers whose tree used the link, and only the subtrees that
+    depended on it, are recomputed. Routing tables are derived from the
+    trees on demand: intra-area routes from the area's stub prefixes, and
+    inter-area routes through the area border routers (ABRs), which
+    summarize their other areas' routes into each area they attach to.
+    """
+    def __init__(self, lsdb):
+        self.lsdb = lsdb
+        self.trees = {}  # (area, router index) -> (dist, parents)
+        self.down_links = {}  # (area, i, j) -> cost of arc i->j while the link is down
+        self._tables = {}
+
+    @classmethod
+    def from_network_data(cls, network_data):
+        domain = cls(LinkStateDatabase.from_network_data(network_data))
+        domain.run_full_spf()
+        return domain
+
+    @property
+    def routers(self):
+        return self.lsdb.router_areas
+
+    def run_full_spf(self):
+        """Recomputes every router's trees from scratch."""
+        for area, graph in self.lsdb.areas.items():
+            for source in range(len(graph.routers)):
+                self.trees[(area, source)] = full_spf(graph.out, source)
+        self._tables = {}
+
+    def set_link_status(self, u, v, status):
+        """
+        Brings every adjacency between routers u and v 'down' or 'up' and
+        repairs the trees incrementally. Returns the routers whose trees
+        changed.
+        """
+        if status not in ('down', 'up'):
+            raise ValueError(f"Unknown link status '{status}'. Choose one of: down, up")
+        changed = set()
+        for area, graph in self.lsdb.areas.items():
+            if u not in graph.index or v not in graph.index:
+                continue
+            i, j = graph.index[u], graph.index[v]
+            arcs = []
+            for tail, head in ((i, j), (j, i)):
+                if status == 'down' and head in graph.out[tail]:
+                    self.down_links[(area, tail, head)] = graph.out[tail].pop(head)
+                    arcs.append((tail, head))
+                elif status == 'up' and (area, tail, head) in self.down_links:
+                    graph.out[tail][head] = self.down_links.pop((area, tail, head))
+                    arcs.append((tail, head))
+            repair = remove_arc if status == 'down' else add_arc
+            for source in range(len(graph.routers)):
+                tree = self.trees[(area, source)]
+                for tail, head in arcs:
+                    before = (tree[0][head], tree[1][head])
+                    repair(graph.out, tree, tail, head)
+                    if before != (tree[0][head], tree[1][head]):
+                        changed.add(graph.routers[source])
+        if changed:
+            self._tables = {}  # Inter-area routes depend on other routers' trees
+        return changed
+
+    def _first_hops(self, area, source):
+        """Per node of the area: the set of source's neighbors that start its shortest paths."""
+        dist, parents = self.trees[(area, source)]
+        first_hops = [None] * len(dist)
+        for x in sorted((x for x in range(len(dist)) if dist[x] < UNREACHABLE), key=dist.__getitem__):
+            if x == source:
+                first_hops[x] = frozenset()
+                continue
+            hops = set()
+            for parent in parents[x]:
+                hops |= {x} if parent == source else first_hops[parent]
+            first_hops[x] = frozenset(hops)
+        return first_hops
+
+    def _intra_routes(self, router, area):
+        """{prefix: (cost, next-hop router indexes)} for the area's prefixes."""
+        graph = self.lsdb.areas[area]
+        source = graph.index[router]
+        dist, _ = self.trees[(area, source)]
+        first_hops = self._first_hops(area, source)
+        routes = {}
+        for x, stubs in enumerate(graph.stubs):
+            if dist[x] == UNREACHABLE:
+                continue
+            for prefix, cost in stubs:
+                total = dist[x] + cost
+                current = routes.get(prefix)
+                if current is None or total < current[0]:
+                    routes[prefix] = (total, set(first_hops[x]))
+                elif total == current[0]:
+                    current[1].update(first_hops[x])
+        return routes
+
+    def _abrs(self, area):
+        return [router for router in self.lsdb.areas[area].routers if len(self.lsdb.router_areas[router]) > 1]
+
+    def _summaries(self, abr, into_area, backbone_inter=None):
+        """Prefix costs an ABR advertises into one of its areas: its routes in its other areas."""
+        summary = {}
+        for area in self.lsdb.router_areas[abr]:
+            if area == into_area:
+                continue
+            for prefix, (cost, _) in self._intra_routes(abr, area).items():
+                summary[prefix] = min(cost, summary.get(prefix, cost))
+        if into_area != BACKBONE_AREA and BACKBONE_AREA in self.lsdb.router_areas[abr] and backbone_inter:
+            for prefix, (cost, _) in backbone_inter.items():
+                summary[prefix] = min(cost, summary.get(prefix, cost))
+        return summary
+
+    def _inter_routes(self, router, area, known, summaries):
+        """Routes to prefixes not in known, through the area's ABRs."""
+        graph = self.lsdb.areas[area]
+        source = graph.index[router]
+        dist, _ = self.trees[(area, source)]
+        first_hops = None
+        routes = {}
+        for abr, summary in summaries.items():
+            x = graph.index[abr]
+            if abr == router or dist[x] == UNREACHABLE:
+                continue
+            if first_hops is None:
+                first_hops = self._first_hops(area, source)
+            for prefix, cost in summary.items():
+                if prefix in known:
+                    continue
+                total = dist[x] + cost
+                current = routes.get(prefix)
+                if current is None or total < current[0]:
+                    routes[prefix] = (total, set(first_hops[x]))
+                elif total == current[0]:
+                    current[1].update(first_hops[x])
+        return routes
+
+    def _backbone_inter_routes(self, router):
+        """Inter-area routes of a backbone router, learned from the backbone's ABRs."""
+        if BACKBONE_AREA not in self.lsdb.router_areas[router]:
+            return {}
+        known = set()
+        for area in self.lsdb.router_areas[router]:
+            known.update(self._intra_routes(router, area))
+        summaries = {abr: self._summaries(abr, BACKBONE_AREA) for abr in self._abrs(BACKBONE_AREA)}
+        return self._inter_routes(router, BACKBONE_AREA, known, summaries)
+
+    def routing_table(self, router):
+        """
+        Returns the router's routing table, {prefix: {'cost', 'next_hops',
+        'area', 'type'}}, with type 'connected', 'intra-area' or
+        'inter-area'. Tables are cached until a link changes.
+        """
+        table = self._tables.get(router)
+        if table is not None:
+            return table
+        table = {}
+        areas = self.lsdb.router_areas.get(router, [])
+        best = {}  # prefix -> (cost, next hops, area, type)
+        for area in areas:
+            graph = self.lsdb.areas[area]
+            for prefix, (cost, hops) in self._intra_routes(router, area).items():
+                kind = 'connected' if not hops else 'intra-area'
+                if prefix not in best or cost < best[prefix][0]:
+                    best[prefix] = (cost, {graph.routers[hop] for hop in hops}, area, kind)
+        for area in areas:
+            graph = self.lsdb.areas[area]
+            if area == BACKBONE_AREA:
+                summaries = {abr: self._summaries(abr, area) for abr in self._abrs(area)}
+            else:
+                summaries = {abr: self._summaries(abr, area, self._backbone_inter_routes(abr))
+                             for abr in self._abrs(area)}
+            for prefix, (cost, hops) in self._inter_routes(router, area, best, summaries).items():
+                current = best.get(prefix)
+                if current is None or (current[3] == 'inter-area' and cost < current[0]):
+                    best[prefix] = (cost, {graph.routers[hop] for hop in hops}, area, 'inter-area')
+        for prefix, (cost, hops, area, kind) in sorted(best.items()):
+            table[_format_prefix(prefix)] = {'cost': cost, 'next_hops': sorted(hops), 'area': area, 'type': kind}
+        self._tables[router] = table
+        return table
@@ -0,0 +1,368 @@
+# src/simulation_benchmark.py
+
+import argparse
+import asyncio
+import io
+import logging
+import os
+import random
+import tempfile
+import time
+import networkx as nx
+from simulation_engine import SimulationEngine
+from async_runtime import AsyncSimulationRuntime
+from network_model import int_to_ip
+from ospf_engine import OspfDomain, full_spf
+from failure_campaign import FailureCampaign
+from event_recorder import EventRecorder
+from flow_simulator import FlowSimulator, numpy_available
+
+
+def generate_topology(router_count, switches_per_router=1, links_per_router=2, seed=7, pcs_per_switch=0):
+    """
+    Builds a synthetic topology graph: routers joined by random links, each
+    with a few access switches hanging off it, and pcs_per_switch PCs on
+    each switch.
+    """
+    rng = random.Random(seed)
+    graph = nx.Graph()
+    for r in range(router_count):
+        graph.add_node(f"R{r}", type='Router')
+        for s in range(switches_per_router):
+            graph.add_node(f"S{r}_{s}", type='Switch')
+            graph.add_edge(f"R{r}", f"S{r}_{s}")
+            for p in range(pcs_per_switch):
+                graph.add_node(f"PC{r}_{s}_{p}", type='PC')
+                graph.add_edge(f"S{r}_{s}", f"PC{r}_{s}_{p}")
+    for r in range(router_count):
+        for _ in range(links_per_router):
+            peer = rng.randrange(router_count)
+            if peer != r:
+                graph.add_edge(f"R{r}", f"R{peer}")
+    return graph
+
+
+def generate_ospf_network(router_count, links_per_router=3, areas=1, seed=7):
+    """
+    Builds parsed-config style network_data for router_count OSPF routers,
+    each with a loopback and /30 point-to-point links to random peers, so
+    the OSPF domain can be built without config files. With areas > 1,
+    router r's home area is r % areas; a link between routers of different
+    home areas goes in the backbone (area 0), making both ends ABRs.
+    """
+    rng = random.Random(seed)
+    network_data = {}
+    for r in range(router_count):
+        loopback = f"10.255.{r // 256}.{r % 256}"
+        network_data[f"R{r}"] = {
+            'hostname': f"R{r}",
+            'interfaces': {'Loopback0': {'ip_address': loopback, 'subnet_mask': '255.255.255.255'}},
+            'ospf': {'process_id': '1', 'networks': [{'network': loopback, 'wildcard': '0.0.0.0', 'area': r % areas}]},
+        }
+    subnet = 0
+    for r in range(router_count):
+        for _ in range(links_per_router):
+            peer = rng.randrange(router_count)
+            if peer == r:
+                continue
+            area = r % areas if r % areas == peer % areas else 0
+            cost = rng.choice((1, 10, 100))
+            for end, name in enumerate((f"R{r}", f"R{peer}")):
+                address = int_to_ip((10 << 24) + subnet * 4 + end + 1)
+                data = network_data[name]
+                data['interfaces'][f"Gi0/{len(data['interfaces'])}"] = {
+                    'ip_address': address, 'subnet_mask': '255.255.255.252', 'ospf_cost': cost}
+                data['ospf']['networks'].append({'network': address, 'wildcard': '0.0.0.0', 'area': area})
+            subnet += 1
+    return network_data
+
+
+def _state_fingerprint(engine):
+    return (engine.scheduler.events_processed,
+            tuple((name, device.ticks, tuple(device.arp_table.items()))
+                  for name, device in engine.devices.items()))
+
+
+def benchmark_event_engine(device_count=100000, virtual_seconds=60, seed=42):
+    """
+    Simulates device_count routers and switches for virtual_seconds and
+    compares the virtual time covered with the wall time taken.
+    """
+    print(f"\n--- Event Engine Benchmark ({device_count} devices, {virtual_seconds}s virtual) ---")
+    graph = generate_topology(device_count // 2)
+    previous_level = logging.getLogger().level
+    logging.getLogger().setLevel(logging.WARNING)  # Per-device INFO messages would dominate
+    try:
+        engine = SimulationEngine(graph, seed=seed)
+        start = time.perf_counter()
+        engine.start_simulation()
+        start_time = time.perf_counter() - start
+        processed, run_time = engine.run_for(virtual_seconds)
+
+        small = generate_topology(500)
+        fingerprints = []
+        for _ in range(2):
+            replay = SimulationEngine(small, seed=seed)
+            replay.start_simulation()
+            replay.run_for(virtual_seconds)
+            fingerprints.append(_state_fingerprint(replay))
+    finally:
+        logging.getLogger().setLevel(previous_level)
+
+    print(f"{'✅' if fingerprints[0] == fingerprints[1] else '❌'} Same seed gives the same run")
+    print(f"start events:   {start_time:8.3f}s for {len(engine.devices)} devices")
+    print(f"{virtual_seconds}s virtual:    {run_time:8.3f}s wall ({processed} events, "
+          f"{virtual_seconds / run_time:.1f}x faster than real time)")
+    print("-------------------------------")
+
+
+def benchmark_async_runtime(device_count=20000, seconds=3):
+    """
+    Holds device_count devices as coroutines on one event loop on the live
+    clock, and measures CPU use while running and while paused, and the
+    time a full cancellation shutdown takes.
+    """
+    print(f"\n--- Asyncio Runtime Benchmark ({device_count} devices, {seconds}s live phases) ---")
+    graph = generate_topology(device_count // 2)
+
+    async def scenario():
+        runtime = AsyncSimulationRuntime(graph, seed=42)
+        start = time.perf_counter()
+        await runtime.start()
+        start_time = time.perf_counter() - start
+
+        cpu = time.process_time()
+        await runtime.run_for(seconds)
+        running_cpu = (time.process_time() - cpu) / seconds
+        await runtime.pause()
+        ticks = sum(device.ticks for device in runtime.devices.values())
+        cpu = time.process_time()
+        await runtime.run_for(seconds)
+        paused_cpu = (time.process_time() - cpu) / seconds
+        paused_ticks = sum(device.ticks for device in runtime.devices.values()) - ticks
+        await runtime.resume()
+
+        start = time.perf_counter()
+        await runtime.stop()
+        stop_time = time.perf_counter() - start
+        tasks_left = len(asyncio.all_tasks()) - 1  # All but this one
+        return start_time, running_cpu, ticks, paused_cpu, paused_ticks, stop_time, tasks_left
+
+    previous_level = logging.getLogger().level
+    logging.getLogger().setLevel(logging.WARNING)
+    try:
+        start_time, running_cpu, ticks, paused_cpu, paused_ticks, stop_time, tasks_left = asyncio.run(scenario())
+    finally:
+        logging.getLogger().setLevel(previous_level)
+
+    print(f"start:    {start_time:8.3f}s")
+    print(f"running:  {running_cpu:8.1%} CPU  ({ticks} ticks)")
+    print(f"paused:   {paused_cpu:8.1%} CPU  ({paused_ticks} ticks)")
+    print(f"stop:     {stop_time:8.3f}s  ({tasks_left} tasks left)")
+    print("-------------------------------")
+
+
+def benchmark_incremental_spf(router_count=1000, link_events=50, seed=42):
+    """
+    Fails and restores random links in a single-area OSPF domain and
+    compares incremental SPF repair of every router's tree with rerunning
+    full SPF for every router.
+    """
+    print(f"\n--- Incremental SPF Benchmark ({router_count} routers, {link_events} link failures) ---")
+    domain = OspfDomain.from_network_data(generate_ospf_network(router_count))
+    start = time.perf_counter()
+    domain.run_full_spf()
+    full_time = time.perf_counter() - start
+    graph = domain.lsdb.areas[0]
+
+    rng = random.Random(seed)
+    links = sorted({tuple(sorted((graph.routers[i], graph.routers[j])))
+                    for i, neighbors in enumerate(graph.out) for j in neighbors})
+    down_times, up_times, changed_routers = [], [], 0
+    for u, v in rng.sample(links, min(link_events, len(links))):
+        start = time.perf_counter()
+        changed_routers += len(domain.set_link_status(u, v, 'down'))
+        down_times.append(time.perf_counter() - start)
+        start = time.perf_counter()
+        domain.set_link_status(u, v, 'up')
+        up_times.append(time.perf_counter() - start)
+
+    u, v = rng.choice(links)
+    domain.set_link_status(u, v, 'down')
+    matches = all(domain.trees[(0, source)][0] == full_spf(graph.out, source)[0]
+                  for source in range(len(graph.routers)))
+    domain.set_link_status(u, v, 'up')
+    table_start = time.perf_counter()
+    routes = len(domain.routing_table(graph.routers[0]))
+    table_time = time.perf_counter() - table_start
+
+    down_ms = 1000 * sum(down_times) / len(down_times)
+    up_ms = 1000 * sum(up_times) / len(up_times)
+    print(f"{'✅' if matches else '❌'} Incremental trees match full SPF after a failure")
+    print(f"full SPF (all routers): {1000 * full_time:9.2f} ms")
+    print(f"link down (incremental):{down_ms:9.2f} ms avg, {changed_routers / len(down_times):.0f} routers changed "
+          f"({1000 * full_time / down_ms:.1f}x faster)")
+    print(f"link up (incremental):  {up_ms:9.2f} ms avg ({1000 * full_time / up_ms:.1f}x faster)")
+    print(f"routing table:          {1000 * table_time:9.2f} ms for {routes} routes")
+    print("-------------------------------")
+
+
+def benchmark_failure_campaign(router_count=1000, sampled_pairs=1000000, copy_scenarios=200):
+    """
+    Runs the N-1 and N-2 failure campaign on a synthetic topology and
+    compares its per-scenario cost with copying the graph and checking
+    connectivity for each failure.
+    """
+    graph = generate_topology(router_count, pcs_per_switch=2)
+    print(f"\n--- Failure Campaign Benchmark ({graph.number_of_nodes()} nodes, "
+          f"{graph.number_of_edges()} links) ---")
+    links = list(graph.edges())
+
+    start = time.perf_counter()
+    for u, v in links[:copy_scenarios]:
+        temp_graph = graph.copy()
+        temp_graph.remove_edge(u, v)
+        nx.is_connected(temp_graph)
+    copy_time = (time.perf_counter() - start) / copy_scenarios
+
+    start = time.perf_counter()
+    campaign = FailureCampaign(graph, seed=1)
+    model_time = time.perf_counter() - start
+    start = time.perf_counter()
+    single = campaign.run(dual='none')['single']
+    single_time = time.perf_counter() - start
+    start = time.perf_counter()
+    report = campaign.run(dual='sample', max_pairs=sampled_pairs, workers=1)
+    serial_time = time.perf_counter() - start
+    start = time.perf_counter()
+    pooled = campaign.run(dual='sample', max_pairs=sampled_pairs)
+    pooled_time = time.perf_counter() - start
+
+    bridges = sum(1 for _ in nx.bridges(graph))
+    print(f"{'✅' if len(single['partitions']) == bridges else '❌'} N-1 partitions match the bridges "
+          f"({bridges})")
+    print(f"{'✅' if pooled['dual'] == report['dual'] else '❌'} Process pool gives the same N-2 result")
+    print(f"graph copy + is_connected: {1e6 * copy_time:10.1f} us per scenario")
+    print(f"model build:               {model_time:10.3f}s")
+    print(f"N-1 ({single['scenarios']} scenarios):     {1e6 * single_time / single['scenarios']:10.1f} us per scenario")
+    print(f"N-2 ({report['dual']['scenarios']} sampled): {1e6 * serial_time / report['dual']['scenarios']:10.1f} us "
+          f"per scenario serial, {pooled_time:.2f}s pooled vs {serial_time:.2f}s serial "
+          f"({len(report['dual']['partitions'])} partitioning)")
+    print("-------------------------------")
+
+
+def benchmark_event_recorder(event_count=200000, device_count=20000, virtual_seconds=30):
+    """
+    Compares recording device events in an EventRecorder with formatting
+    each one into an emitted log message, then measures a whole engine
+    run with sampled tick events flushed to NDJSON.
+    """
+    print(f"\n--- Event Recorder Benchmark ({event_count} events) ---")
+    arp_table = {f"R{n}": f"00:1A:2B:{n % 90 + 10}:11:22" for n in range(4)}
+    logger = logging.getLogger('simulation_benchmark')
+    logger.addHandler(logging.StreamHandler(io.StringIO()))
+    logger.propagate = False
+    logger.setLevel(logging.INFO)
+    start = time.perf_counter()
+    for n in range(event_count):
+        logger.info(f"[t={n * 0.001:.3f}s] R{n % 1000} ARP table populated: {arp_table}")
+    logging_time = time.perf_counter() - start
+
+    recorder = EventRecorder(capacity=event_count)
+    start = time.perf_counter()
+    for n in range(event_count):
+        recorder.record(n * 0.001, f"R{n % 1000}", 'arp', None, len(arp_table))
+    record_time = time.perf_counter() - start
+
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, 'events.ndjson')
+        start = time.perf_counter()
+        written = recorder.flush(path)
+        flush_time = time.perf_counter() - start
+
+        graph = generate_topology(device_count // 2)
+        previous_level = logging.getLogger().level
+        logging.getLogger().setLevel(logging.WARNING)
+        try:
+            engine = SimulationEngine(graph, seed=42, recorder=EventRecorder(path=path, sampling={'tick': 100}))
+            engine.start_simulation()
+            processed, run_time = engine.run_for(virtual_seconds)
+            engine.recorder.flush()
+        finally:
+            logging.getLogger().setLevel(previous_level)
+        with open(path) as f:
+            lines = sum(1 for _ in f)
+
+    print(f"{'✅' if lines == written + engine.recorder.flushed else '❌'} Every recorded event reached the NDJSON file")
+    print(f"logging (formatted):  {1e6 * logging_time / event_count:8.2f} us per event")
+    print(f"recorder:             {1e6 * record_time / event_count:8.2f} us per event "
+          f"({logging_time / record_time:.1f}x faster)")
+    print(f"NDJSON flush:         {1e6 * flush_time / written:8.2f} us per event")
+    print(f"engine, 1/100 ticks:  {processed} events in {run_time:.3f}s, "
+          f"{engine.recorder.counts['tick']} ticks ({engine.recorder.sampled_out} sampled out)")
+    print("-------------------------------")
+
+
+def benchmark_flow_simulator(router_count=1000, pcs_per_switch=20, flows_per_second=2000000, seconds=3):
+    """
+    Forwards flows_per_second flows per simulated second through the FIBs
+    of a synthetic topology and measures forwarding throughput in flows
+    per wall-clock second.
+    """
+    graph = generate_topology(router_count, pcs_per_switch=pcs_per_switch)
+    print(f"\n--- Flow Simulator Benchmark ({graph.number_of_nodes()} nodes, "
+          f"{flows_per_second} flows per simulated second) ---")
+    if not numpy_available():
+        print("Skipped: NumPy and SciPy are required.")
+        return
+    start = time.perf_counter()
+    simulator = FlowSimulator(graph, flows_per_second=flows_per_second, seed=42)
+    simulator.step(0.0, 0.0)  # Builds the FIBs
+    build_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    reports = simulator.run(seconds)
+    run_time = time.perf_counter() - start
+    flows = sum(report['flows'] for report in reports)
+    delivered = sum(report['delivered'] for report in reports)
+    mean_length = sum(report['mean_path_length'] for report in reports) / len(reports)
+
+    u, v = next((u, v) for u, v in graph.edges() if u.startswith('R') and v.startswith('R'))
+    simulator.set_link_status(u, v, 'down')
+    start = time.perf_counter()
+    simulator.step(seconds + 1.0, 0.0)
+    reroute_time = time.perf_counter() - start
+
+    print(f"{'✅' if delivered == flows else '❌'} Every flow delivered on the connected topology")
+    print(f"address plan + FIBs:  {build_time:8.3f}s ({len(simulator.prefixes)} prefixes)")
+    print(f"{seconds}s simulated:       {run_time:8.3f}s wall, {flows / run_time / 1e6:.2f}M flows/s, "
+          f"mean path {mean_length:.2f} links")
+    print(f"FIB rebuild (1 link): {reroute_time:8.3f}s")
+    print("-------------------------------")
+
+
+BENCHMARKS = {
+    'events': benchmark_event_engine,
+    'asyncio': benchmark_async_runtime,
+    'spf': benchmark_incremental_spf,
+    'campaign': benchmark_failure_campaign,
+    'recorder': benchmark_event_recorder,
+    'flows': benchmark_flow_simulator,
+}
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(description="Performance benchmarks for the simulation engine.")
+    arg_parser.add_argument('names', nargs='*', help=f"Benchmarks to run: {', '.join(BENCHMARKS)} (default: all)")
+    args = arg_parser.parse_args()
+
+    unknown = [name for name in args.names if name not in BENCHMARKS]
+    if unknown:
+        arg_parser.error(f"Unknown benchmark(s): {', '.join(unknown)}")
+
+    for name in args.names or BENCHMARKS:
+        BENCHMARKS[name]()
+
+
+if __name__ == "__main__":
+    main()
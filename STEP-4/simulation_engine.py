@@ -1,171 +1,321 @@
 # src/simulation_engine.py
 
-import threading
-import time
 import logging
 import random
+import time
 import networkx as nx
+from event_recorder import EventRecorder
+from event_scheduler import EventScheduler
+from failure_campaign import FailureCampaign, print_campaign_report
+from flow_simulator import FlowSimulator, numpy_available, print_traffic_report
+from ospf_engine import OspfDomain
 
 # --- Basic Logging Setup ---
-# This setup ensures that logs from different threads are clearly marked.
+# Device events go to an EventRecorder; with echo on, they are also logged
+# with the virtual time of the event.
 logging.basicConfig(
     level=logging.INFO,
-    format='%(asctime)s - [%(threadName)s] - %(message)s',
+    format='%(asctime)s - %(message)s',
     datefmt='%Y-%m-%d %H:%M:%S'
 )
 
+# Virtual seconds between a device's periodic housekeeping events
+TICK_INTERVAL = (2, 5)
+
+
+def active_nodes(graph):
+    """Yields (name, type, neighbors) for every router and switch in the graph."""
+    for node_name in graph.nodes():
+        device_type = graph.nodes[node_name].get('type', 'Unknown')
+        # PCs are not simulated as active nodes in this model
+        if device_type in ['Router', 'Switch']:
+            yield node_name, device_type, list(graph.neighbors(node_name))
+
+
+def apply_link_status(devices, ospf, u, v, status):
+    """
+    Tells both ends of link u-v that it went 'up' or 'down'. With an OSPF
+    domain, the domain reconverges first and every other router whose
+    shortest paths changed reinstalls its routes.
+    """
+    changed = ospf.set_link_status(u, v, status) if ospf is not None else ()
+    for device, neighbor in ((u, v), (v, u)):
+        if device in devices:
+            devices[device].update_link_status(neighbor, status)
+    for name in changed:
+        if name not in (u, v) and name in devices:
+            devices[name].refresh_routes()
+
 
-class DeviceNode(threading.Thread):
+class DeviceNode:
     """
-    Represents a network device (router, switch) running in its own thread.
-    Simulates basic network behavior like discovering neighbors and responding to events.
+    Represents a network device (router, switch) in the simulation.
+    Its behavior is a set of event handlers run by the engine's scheduler:
+    start (neighbor discovery), a periodic tick, and link status changes.
+    A live runtime (see async_runtime) can drive the same handlers instead;
+    scheduler then only needs a now attribute for the event timestamps.
+    A router in the OspfDomain ospf takes its routing table from SPF;
+    other devices keep a one-hop table of their neighbors. What the device
+    does is recorded as structured events in recorder.
     """
-    def __init__(self, device_name, device_type, neighbors):
-        super().__init__(name=f"Node-{device_name}")
+    def __init__(self, device_name, device_type, neighbors, scheduler, rng, ospf=None, recorder=None):
         self.device_name = device_name
         self.device_type = device_type
         self.neighbors = neighbors
+        self.scheduler = scheduler
+        self.rng = rng  # The engine's seeded generator, so runs are reproducible
         self.arp_table = {}  # Maps IP to MAC, simplified
         self.routing_table = {} # Simplified routing table
-        self.is_running = threading.Event()
-        self.is_running.set()  # Set to True by default, allowing the loop to run
+        self.ospf = ospf if ospf is not None and device_name in ospf.routers else None
+        self.recorder = recorder if recorder is not None else EventRecorder()
+        self.is_running = True
+        self.ticks = 0
+        self._next_tick = None  # Pending tick event, cancelled on pause
 
-    def run(self):
-        """The main loop for the device thread."""
-        logging.info(f"{self.device_type} {self.device_name} started.")
+    def _record(self, kind, peer=None, detail=None):
+        self.recorder.record(self.scheduler.now, self.device_name, kind, peer, detail)
+
+    def start(self):
+        """Start event: boots the device and schedules the first tick."""
+        self.boot()
+        self._schedule_tick()
+
+    def boot(self):
+        """Brings the device up and discovers its neighbors."""
+        self._record('start', detail=self.device_type)
         self._discover_neighbors()
 
-        while True:
-            if not self.is_running.is_set(): # If event is cleared, pause
-                time.sleep(0.5)
-                continue
-            
-            # In a real simulation, this is where you would process packets,
-            # update routing tables periodically, etc.
-            # For this simulation, we just keep it alive.
-            time.sleep(random.uniform(2, 5))
+    def tick_interval(self):
+        """Virtual seconds until the next tick."""
+        return self.rng.uniform(*TICK_INTERVAL)
+
+    def tick(self):
+        """
+        Periodic housekeeping. In a real simulation, this is where you would
+        process packets, update routing tables periodically, etc.
+        """
+        self.ticks += 1
+        self._record('tick')
+
+    def _schedule_tick(self):
+        self._next_tick = self.scheduler.schedule(self.tick_interval(), self._tick)
+
+    def _tick(self):
+        self._next_tick = None
+        if not self.is_running:
+            return
+        self.tick()
+        self._schedule_tick()
 
     def _discover_neighbors(self):
         """Simulates ARP and OSPF neighbor discovery."""
-        logging.info(f"{self.device_name} is discovering neighbors...")
+        self._record('discover')
+        randint = self.rng.randint
         for neighbor in self.neighbors:
             # Simulate ARP request/response
-            simulated_mac = f"00:1A:2B:{random.randint(10,99)}:{random.randint(10,99)}:{random.randint(10,99)}"
-            self.arp_table[neighbor] = simulated_mac
-        logging.info(f"{self.device_name} ARP table populated: {self.arp_table}")
-        
+            self.arp_table[neighbor] = f"00:1A:2B:{randint(10, 99)}:{randint(10, 99)}:{randint(10, 99)}"
+        self._record('arp', detail=len(self.arp_table))
+
         # Simulate establishing routing adjacencies
-        self.routing_table = {n: {'cost': 1} for n in self.neighbors} # Simplified static routes
-        logging.info(f"{self.device_name} initial routing table established.")
+        if self.ospf is not None:
+            self.routing_table = self.ospf.routing_table(self.device_name)
+        else:
+            self.routing_table = {n: {'cost': 1} for n in self.neighbors} # Simplified static routes
+        self._record('routes', detail=len(self.routing_table))
+
+    def refresh_routes(self):
+        """Reinstalls the router's SPF routes after a topology change elsewhere."""
+        if self.ospf is not None:
+            self.routing_table = self.ospf.routing_table(self.device_name)
+            self._record('spf', detail=len(self.routing_table))
 
     def pause(self):
-        """Pauses the device's main loop."""
-        self.is_running.clear()
-        logging.info(f"Node {self.device_name} paused.")
+        """Pauses the device: its pending tick is cancelled until resume."""
+        self.is_running = False
+        if self._next_tick is not None:
+            self.scheduler.cancel(self._next_tick)
+            self._next_tick = None
+        self._record('pause')
 
     def resume(self):
-        """Resumes the device's main loop."""
-        self.is_running.set()
-        logging.info(f"Node {self.device_name} resumed.")
+        """Resumes the device's periodic ticks."""
+        if not self.is_running:
+            self.is_running = True
+            self._schedule_tick()
+        self._record('resume')
 
     def update_link_status(self, neighbor, status):
         """Simulates reacting to a link failure or restoration."""
-        if status == 'down':
+        if self.ospf is not None:
+            self._record('link_down' if status == 'down' else 'link_up', neighbor)
+            self.refresh_routes()
+        elif status == 'down':
             if neighbor in self.routing_table:
                 del self.routing_table[neighbor]
-                logging.warning(f"{self.device_name} detected link to {neighbor} is down. Updating routing table.")
+                self._record('link_down', neighbor)
         elif status == 'up':
             if neighbor not in self.routing_table:
                 self.routing_table[neighbor] = {'cost': 1}
-                logging.info(f"{self.device_name} detected link to {neighbor} is restored. Updating routing table.")
+                self._record('link_up', neighbor)
 
 
 class SimulationEngine:
     """
-    Manages the entire network simulation, including device threads and fault injection.
+    Manages the entire network simulation as a discrete-event simulation.
+
+    All devices share one EventScheduler. Scenarios advance its virtual
+    clock instead of sleeping, so they take only as long as their events
+    need, and one process can simulate 100k devices faster than real time.
+    All randomness comes from one generator seeded with seed, so the same
+    graph and seed always give the same run.
+
+    Given the parsed network_data, the engine also builds the OSPF domain
+    from the routers' configs: routers install SPF routing tables, and a
+    link event reconverges the domain with incremental SPF.
+
+    Device events go to recorder, by default an EventRecorder that also
+    echoes them to logging. Pass your own to sample high-rate events or
+    to flush them to NDJSON. start_traffic() adds flow-level traffic
+    between the endpoints, forwarded as periodic events on the same clock,
+    so link failures show up in the traffic statistics.
     """
-    def __init__(self, graph):
+    def __init__(self, graph, seed=None, network_data=None, recorder=None):
         self.graph = graph
         self.devices = {}
+        self.seed = seed
+        self.rng = random.Random(seed)
+        self.scheduler = EventScheduler()
+        self.ospf = OspfDomain.from_network_data(network_data) if network_data else None
+        self.recorder = recorder if recorder is not None else EventRecorder(echo=True)
+        self.network_data = network_data
+        self.traffic = None
 
     def start_simulation(self):
-        """Initializes and starts all device threads."""
-        logging.info("Starting multithreaded simulation engine...")
-        for node_name in self.graph.nodes():
-            device_type = self.graph.nodes[node_name].get('type', 'Unknown')
-            # PCs are not simulated as active nodes in this model
-            if device_type in ['Router', 'Switch']:
-                neighbors = list(self.graph.neighbors(node_name))
-                device_thread = DeviceNode(node_name, device_type, neighbors)
-                self.devices[node_name] = device_thread
-                device_thread.start()
+        """Creates all devices and runs their start events."""
+        logging.info("Starting discrete-event simulation engine...")
+        for node_name, device_type, neighbors in active_nodes(self.graph):
+            device = DeviceNode(node_name, device_type, neighbors, self.scheduler, self.rng, self.ospf,
+                                self.recorder)
+            self.devices[node_name] = device
+            self.scheduler.schedule(0, device.start)
+        self.scheduler.run(until=self.scheduler.now)
         print("\n✅ Simulation engine started with all devices running.")
 
+    def run_for(self, duration):
+        """
+        Advances the virtual clock by duration seconds, processing every
+        event due in that time. Returns (events processed, wall seconds).
+        """
+        start = time.perf_counter()
+        processed = self.scheduler.run(until=self.scheduler.now + duration)
+        return processed, time.perf_counter() - start
+
     def run_day1_scenario(self, stabilization_time=5):
         """Simulates the initial network bring-up and stabilization."""
-        print(f"\n--- Running Day-1 Simulation: Network Stabilization ({stabilization_time}s) ---")
-        time.sleep(stabilization_time)
-        print("✅ Day-1 stabilization complete. Network is operational.")
+        print(f"\n--- Running Day-1 Simulation: Network Stabilization ({stabilization_time}s virtual) ---")
+        processed, wall_time = self.run_for(stabilization_time)
+        print(f"✅ Day-1 stabilization complete. Network is operational "
+              f"({processed} events in {wall_time:.3f}s wall time).")
 
-    def run_day2_fault_injection(self):
+    def run_day2_fault_injection(self, failure_duration=3):
         """Simulates link failures and restorations to test network resilience."""
         print("\n--- Running Day-2 Simulation: Fault Injection ---")
         if not self.devices:
             print("No active devices to run fault injection on.")
             return
-            
+
         # Select a random link between two active devices to fail
         active_edges = [
-            (u, v) for u, v in self.graph.edges() 
+            (u, v) for u, v in self.graph.edges()
             if u in self.devices and v in self.devices
         ]
         if not active_edges:
             print("No active links between simulated devices.")
             return
 
-        u, v = random.choice(active_edges)
-        
+        u, v = self.rng.choice(active_edges)
+
         # --- Simulate Failure ---
         print(f"\nInjecting link failure: {u} <-> {v}")
-        self.devices[u].update_link_status(v, 'down')
-        self.devices[v].update_link_status(u, 'down')
-        
+        self._schedule_link_event(u, v, 'down')
+        self.run_for(0)
+
         # Check for connectivity after failure
         temp_graph = self.graph.copy()
         temp_graph.remove_edge(u, v)
-        
+
         if nx.is_connected(temp_graph):
             logging.info(f"✅ Network maintained connectivity after {u}<->{v} failure.")
         else:
             logging.error(f"❌ Network became partitioned after {u}<->{v} failure.")
-        
-        time.sleep(3) # Let the network run in a failed state
+
+        self.run_for(failure_duration) # Let the network run in a failed state
 
         # --- Simulate Restoration ---
         print(f"Restoring link: {u} <-> {v}")
-        self.devices[u].update_link_status(v, 'up')
-        self.devices[v].update_link_status(u, 'up')
+        self._schedule_link_event(u, v, 'up')
+        self.run_for(0)
         logging.info(f"✅ Link {u}<->{v} restored.")
-        
-    def pause_and_resume(self):
+
+    def run_failure_campaign(self, dual='sample', workers=None):
+        """
+        Evaluates every single-link failure and the dual-link failures
+        (see FailureCampaign.run for the modes), prints the scenarios that
+        partition the network and returns the report.
+        """
+        report = FailureCampaign(self.graph, seed=self.seed or 0).run(dual=dual, workers=workers)
+        print_campaign_report(report)
+        return report
+
+    def start_traffic(self, flows_per_second=100000, step=1.0, **options):
+        """
+        Starts a FlowSimulator that forwards flows_per_second new flows every
+        step virtual seconds (options go to FlowSimulator). Returns it, or
+        None without NumPy and SciPy.
+        """
+        if not numpy_available():
+            print("Warning: Traffic simulation needs NumPy and SciPy; skipping it.")
+            return None
+        self.traffic = FlowSimulator(self.graph, self.network_data, flows_per_second=flows_per_second,
+                                     seed=self.seed, **options)
+        self.scheduler.schedule(step, self._traffic_step, step)
+        return self.traffic
+
+    def _traffic_step(self, step):
+        self.traffic.step(self.scheduler.now, step)
+        self.scheduler.schedule(step, self._traffic_step, step)
+
+    def report_traffic(self):
+        """Prints the traffic statistics collected since start_traffic."""
+        if self.traffic is not None:
+            print_traffic_report(self.traffic)
+
+    def _schedule_link_event(self, u, v, status, delay=0):
+        """Schedules both ends of link u-v to see it go up or down."""
+        self.scheduler.schedule(delay, apply_link_status, self.devices, self.ospf, u, v, status)
+        if self.traffic is not None:
+            self.scheduler.schedule(delay, self.traffic.set_link_status, u, v, status)
+
+    def pause_and_resume(self, pause_time=3):
         """Demonstrates pausing and resuming the entire simulation."""
         print("\n--- Demonstrating Pause/Resume Capabilities ---")
         print("Pausing simulation...")
         for device in self.devices.values():
             device.pause()
-        
-        time.sleep(3) # Stay paused for 3 seconds
-        
-        print("Resuming simulation...")
+
+        processed, _ = self.run_for(pause_time) # Stay paused; no device events fire
+
+        print(f"Resuming simulation ({processed} events while paused)...")
         for device in self.devices.values():
             device.resume()
         print("✅ Simulation resumed.")
 
     def stop_simulation(self):
-        """Gracefully stops all running device threads."""
-        # This is a simplified stop; a more robust solution would use signaling.
+        """Stops the simulation by dropping every pending event."""
         print("\n--- Stopping Simulation ---")
-        # In this implementation, the threads are daemonic, so they will exit
-        # when the main thread exits. A production system would need a
-        # proper shutdown signal in the thread's main loop.
-        print("Simulation concluded.")
+        self.scheduler.clear()
+        print(f"Simulation concluded at t={self.scheduler.now:.3f}s virtual time, "
+              f"after {self.scheduler.events_processed} events.")
+        if self.recorder.path is not None:
+            self.recorder.flush()
+        print(self.recorder.summary())
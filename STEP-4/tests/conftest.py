@@ -0,0 +1,8 @@
+# tests/conftest.py
+
+import os
+import sys
+
+# The STEP-4 modules import their STEP-3 dependencies as top-level modules
+HERE = os.path.dirname(os.path.abspath(__file__))
+sys.path[:0] = [os.path.dirname(HERE), os.path.join(os.path.dirname(os.path.dirname(HERE)), 'STEP-3')]
@@ -0,0 +1,76 @@
+# tests/test_failure_campaign.py
+
+import itertools
+import random
+import networkx as nx
+import pytest
+from failure_campaign import FailureCampaign, LinkFailureModel, pair_from_index
+
+
+def random_network(rng):
+    """Sparse graphs (often several components) with bridges, cut pairs and PC leaves."""
+    graph = nx.Graph()
+    node_count = rng.randint(2, 16)
+    for node in range(node_count):
+        graph.add_node(f"R{node}", type='Router')
+    for node in range(1, node_count):
+        if rng.random() < 0.9:
+            graph.add_edge(f"R{rng.randrange(node)}", f"R{node}")
+    for _ in range(rng.randint(0, node_count)):
+        u, v = rng.sample(range(node_count), 2)
+        graph.add_edge(f"R{u}", f"R{v}")
+    for pc in range(rng.randint(0, 8)):
+        graph.add_node(f"PC{pc}", type='PC')
+        for router in rng.sample(range(node_count), rng.choice((1, 1, 2))):
+            graph.add_edge(f"PC{pc}", f"R{router}")
+    return graph
+
+
+def brute_force_score(graph, links):
+    """(components added, isolated endpoints) by removing the links from the graph itself."""
+    before = list(nx.connected_components(graph))
+    graph.remove_edges_from(links)
+    try:
+        component_of = {node: i for i, component in enumerate(nx.connected_components(graph))
+                        for node in component}
+        pieces = len(set(component_of.values())) - len(before)
+        isolated = 0
+        for component in before:
+            groups = {}
+            for node in component:
+                if graph.nodes[node]['type'] == 'PC':
+                    groups[component_of[node]] = groups.get(component_of[node], 0) + 1
+            isolated += sum(groups.values()) - max(groups.values(), default=0)
+    finally:
+        graph.add_edges_from(links)
+    return pieces, isolated
+
+
+@pytest.mark.parametrize('seed', range(30))
+def test_model_scores_match_graph_copies(seed):
+    """Every single and dual failure scores as removing the links from the graph does."""
+    graph = random_network(random.Random(seed))
+    model = LinkFailureModel(graph, seed=seed)
+    for link_id, link in enumerate(model.links):
+        assert model.single(link_id) == brute_force_score(graph, [link])
+    for first, second in itertools.combinations(range(len(model.links)), 2):
+        expected = brute_force_score(graph, [model.links[first], model.links[second]])
+        assert model.dual(first, second) == expected, (model.links[first], model.links[second])
+
+
+def test_pair_from_index_matches_combinations():
+    for n in range(2, 60):
+        assert [pair_from_index(k, n) for k in range(n * (n - 1) // 2)] == list(itertools.combinations(range(n), 2))
+
+
+@pytest.mark.parametrize('seed', range(5))
+def test_campaign_lists_every_partitioning_pair(seed):
+    """Exhaustive and fully sampled campaigns both list exactly the partitioning link pairs."""
+    graph = random_network(random.Random(seed))
+    campaign = FailureCampaign(graph, seed=seed)
+    links = campaign.model.links
+    expected = {frozenset(pair) for pair in itertools.combinations(links, 2)
+                if brute_force_score(graph, list(pair))[0]}
+    for dual, max_pairs in (('exhaustive', 1), ('sample', max(1, len(links) ** 2))):
+        report = campaign.run(dual=dual, max_pairs=max_pairs, workers=1)
+        assert {frozenset(partition['links']) for partition in report['dual']['partitions']} == expected
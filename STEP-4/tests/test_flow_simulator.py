@@ -0,0 +1,121 @@
+# tests/test_flow_simulator.py
+
+import random
+import networkx as nx
+import pytest
+from traffic_engine import ospf_cost
+from flow_simulator import FlowSimulator, numpy_available, DELIVER, NO_ROUTE
+
+pytestmark = pytest.mark.skipif(not numpy_available(), reason="FlowSimulator needs NumPy and SciPy")
+
+BANDWIDTHS = (64, 1544, 10000, 100000, 'N/A')
+
+
+def random_network(rng, connected=True):
+    """
+    Routers joined by random links and PCs behind them. Some PCs get a
+    configured address in a /24 shared with PCs behind other routers, so
+    the plan has split subnets with /32 routes; the rest are synthetic.
+    """
+    graph = nx.Graph()
+    router_count = rng.randint(2, 12)
+    for r in range(router_count):
+        graph.add_node(f"R{r}", type='Router')
+    for r in range(1, router_count):
+        if connected or rng.random() < 0.8:
+            graph.add_edge(f"R{rng.randrange(r)}", f"R{r}", bandwidth=rng.choice(BANDWIDTHS))
+    for _ in range(rng.randint(0, router_count)):
+        u, v = rng.sample(range(router_count), 2)
+        graph.add_edge(f"R{u}", f"R{v}", bandwidth=rng.choice(BANDWIDTHS))
+    network_data = {}
+    for pc in range(rng.randint(2, 20)):
+        graph.add_node(f"PC{pc}", type='PC')
+        graph.add_edge(f"PC{pc}", f"R{rng.randrange(router_count)}", bandwidth=rng.choice(BANDWIDTHS))
+        if rng.random() < 0.5:
+            network_data[f"PC{pc}"] = {'interfaces': {'Fa0': {
+                'ip_address': f"192.168.{rng.randrange(3)}.{pc + 10}", 'subnet_mask': '255.255.255.0'}}}
+    return graph, network_data
+
+
+def expected_route_cost(simulator, distances, router, prefix_id):
+    """Cost from router to the prefix's gateway, or to a covering prefix's when it has no route of its own."""
+    while prefix_id >= 0:
+        owner = simulator.nodes[simulator.prefix_owner[prefix_id]]
+        if owner in distances[router]:
+            return distances[router][owner]
+        prefix_id = simulator.prefix_parent[prefix_id]
+    return None
+
+
+@pytest.mark.parametrize('seed', range(20))
+def test_fib_paths_are_shortest(seed):
+    """Following the FIB from every router reaches the prefix's gateway at the Dijkstra distance."""
+    rng = random.Random(seed)
+    graph, network_data = random_network(rng, connected=seed % 2 == 0)
+    simulator = FlowSimulator(graph, network_data, seed=seed)
+    router_links = [(u, v) for u, v in graph.edges() if u.startswith('R') and v.startswith('R')]
+    for u, v in rng.sample(router_links, min(2, len(router_links))):
+        simulator.set_link_status(u, v, 'down')
+    simulator._build_fib()
+
+    transit = nx.Graph()
+    transit.add_nodes_from(simulator.nodes[:simulator.transit_count])
+    for u, v, attrs in graph.edges(data=True):
+        key = (u, v) if u <= v else (v, u)
+        if u in transit and v in transit and key not in simulator.down_links:
+            bandwidth = attrs['bandwidth'] if isinstance(attrs['bandwidth'], int) else None
+            transit.add_edge(u, v, weight=ospf_cost(bandwidth))
+    distances = dict(nx.all_pairs_dijkstra_path_length(transit))
+
+    fib, arcs, _ = simulator._fib
+    prefix_count = len(simulator.prefixes)
+    for router_index, router in enumerate(simulator.nodes[:simulator.transit_count]):
+        for prefix_id in range(prefix_count):
+            slot, cost = router_index * prefix_count + prefix_id, 0
+            while fib[slot] >= 0:
+                cost += simulator.arc_cost[arcs[slot]]
+                slot = int(fib[slot]) * prefix_count + prefix_id
+            expected = expected_route_cost(simulator, distances, router, prefix_id)
+            assert (fib[slot] == DELIVER) == (expected is not None)
+            if expected is not None:
+                assert cost == expected
+            else:
+                assert fib[slot] == NO_ROUTE
+
+
+@pytest.mark.parametrize('seed', range(20))
+def test_lookup_is_longest_prefix_match(seed):
+    rng = random.Random(seed)
+    simulator = FlowSimulator(*random_network(rng), seed=seed)
+    low, high = simulator.address_range
+    addresses = [int(a) for a in simulator.address] + [rng.randrange(low - 512, high + 512) for _ in range(500)]
+    for address, prefix_id in zip(addresses, simulator.lookup(addresses)):
+        matches = [(prefix_len, i) for i, (network, prefix_len) in enumerate(simulator.prefixes)
+                   if address >> (32 - prefix_len) == network >> (32 - prefix_len)]
+        assert prefix_id == (max(matches)[1] if matches else NO_ROUTE)
+
+
+@pytest.mark.parametrize('seed', range(10))
+def test_connected_network_delivers_every_flow(seed):
+    simulator = FlowSimulator(*random_network(random.Random(seed)), flows_per_second=2000, seed=seed)
+    report = simulator.step(1.0)
+    assert report['flows'] > 0
+    assert report['delivered'] == report['flows']
+
+
+@pytest.mark.parametrize('seed', range(10))
+def test_path_bottleneck_is_lowest_ratio_on_path(seed):
+    import numpy as np
+    rng = random.Random(seed)
+    simulator = FlowSimulator(*random_network(rng), seed=seed)
+    simulator._build_fib()
+    ratio = np.random.default_rng(seed).random(len(simulator.arc_tail))
+    bottleneck = simulator._path_bottleneck(ratio)
+    fib, arcs, _ = simulator._fib
+    prefix_count = len(simulator.prefixes)
+    for start in range(len(fib)):
+        slot, lowest = start, 1.0
+        while fib[slot] >= 0:
+            lowest = min(lowest, ratio[arcs[slot]])
+            slot = int(fib[slot]) * prefix_count + slot % prefix_count
+        assert bottleneck[start] == lowest
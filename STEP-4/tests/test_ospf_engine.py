@@ -0,0 +1,93 @@
+# tests/test_ospf_engine.py
+
+import copy
+import random
+import pytest
+from network_model import int_to_ip
+from ospf_engine import OspfDomain, full_spf, remove_arc, add_arc
+
+
+def random_out(rng, node_count, extra_links):
+    """Symmetric random arcs; a few costs, so equal-cost paths are common."""
+    out = [{} for _ in range(node_count)]
+    links = set()
+    for node in range(1, node_count):
+        links.add((rng.randrange(node), node))
+    for _ in range(extra_links):
+        u, v = rng.sample(range(node_count), 2)
+        links.add((min(u, v), max(u, v)))
+    for u, v in links:
+        out[u][v] = out[v][u] = rng.choice((1, 2, 5, 10))
+    return out
+
+
+def assert_trees_match(out, trees):
+    for source, (dist, parents) in enumerate(trees):
+        expected_dist, expected_parents = full_spf(out, source)
+        assert dist == expected_dist
+        assert [set(p) for p in parents] == [set(p) for p in expected_parents]
+
+
+@pytest.mark.parametrize('seed', range(20))
+def test_incremental_repair_matches_full_spf(seed):
+    """Random link failures and restorations, repaired arc by arc, against full SPF."""
+    rng = random.Random(seed)
+    node_count = rng.randint(2, 25)
+    out = random_out(rng, node_count, rng.randint(0, 2 * node_count))
+    trees = [full_spf(out, source) for source in range(node_count)]
+    down = {}
+    for _ in range(30):
+        if down and (rng.random() < 0.4 or not any(out)):
+            (u, v), cost = down.popitem()
+            out[u][v] = out[v][u] = cost
+            for tree in trees:
+                add_arc(out, tree, u, v)
+                add_arc(out, tree, v, u)
+        elif any(out):
+            u = rng.choice([node for node in range(node_count) if out[node]])
+            v = rng.choice(sorted(out[u]))
+            down[(u, v)] = out[u].pop(v)
+            out[v].pop(u)
+            for tree in trees:
+                remove_arc(out, tree, u, v)
+                remove_arc(out, tree, v, u)
+        assert_trees_match(out, trees)
+
+
+def random_ospf_network(rng, router_count, areas):
+    """network_data for routers with loopbacks and /30 links; cross-area links go in area 0."""
+    network_data = {}
+    for r in range(router_count):
+        loopback = f"10.255.0.{r + 1}"
+        network_data[f"R{r}"] = {
+            'hostname': f"R{r}",
+            'interfaces': {'Loopback0': {'ip_address': loopback, 'subnet_mask': '255.255.255.255'}},
+            'ospf': {'networks': [{'network': loopback, 'wildcard': '0.0.0.0', 'area': r % areas}]},
+        }
+    for subnet in range(2 * router_count):
+        r, peer = rng.sample(range(router_count), 2)
+        area = r % areas if r % areas == peer % areas else 0
+        for end, name in enumerate((f"R{r}", f"R{peer}")):
+            address = int_to_ip((10 << 24) + subnet * 4 + end + 1)
+            data = network_data[name]
+            data['interfaces'][f"Gi0/{len(data['interfaces'])}"] = {
+                'ip_address': address, 'subnet_mask': '255.255.255.252', 'ospf_cost': rng.choice((1, 10))}
+            data['ospf']['networks'].append({'network': address, 'wildcard': '0.0.0.0', 'area': area})
+    return network_data
+
+
+@pytest.mark.parametrize('seed', range(10))
+def test_domain_routing_tables_match_full_spf(seed):
+    """After random link flips, every routing table matches one built from full SPF."""
+    rng = random.Random(seed)
+    domain = OspfDomain.from_network_data(random_ospf_network(rng, rng.randint(3, 15), rng.randint(1, 3)))
+    links = sorted({tuple(sorted((graph.routers[i], graph.routers[j])))
+                    for graph in domain.lsdb.areas.values() for i, neighbors in enumerate(graph.out)
+                    for j in neighbors})
+    for _ in range(10):
+        u, v = rng.choice(links)
+        domain.set_link_status(u, v, rng.choice(('down', 'up')))
+        rebuilt = copy.deepcopy(domain)
+        rebuilt.run_full_spf()
+        for router in domain.routers:
+            assert domain.routing_table(router) == rebuilt.routing_table(router)
@@ -7,6 +7,9 @@ from validator import NetworkValidator
 from simulation_engine import SimulationEngine
 from reporter import ReportGenerator
 
+# Most recent simulation events written to the JSON report (all per-kind counts are kept)
+REPORT_EVENT_LIMIT = 1000
+
 def print_results(results):
     """Helper function to print validation results in a readable format."""
     print("\n--- Validation Results ---")
@@ -53,17 +56,21 @@ def main():
     validation_results = validator.run_all_checks()
     print_results(validation_results)
 
-    # --- Step 4: Multithreaded Simulation ---
-    print("\nStep 4: Initializing multithreaded simulation engine...")
-    sim_engine = SimulationEngine(graph)
+    # --- Step 4: Discrete-Event Simulation ---
+    print("\nStep 4: Initializing discrete-event simulation engine...")
+    sim_engine = SimulationEngine(graph, network_data=network_data)
     sim_engine.start_simulation()
+    sim_engine.start_traffic(flows_per_second=500)
     sim_engine.run_day1_scenario()
     sim_engine.run_day2_fault_injection()
+    sim_engine.report_traffic()
+    sim_engine.run_failure_campaign()
     sim_engine.pause_and_resume()
     sim_engine.stop_simulation()
     
     # --- Step 5: Reporting ---
-    reporter = ReportGenerator(network_data, validation_results)
+    reporter = ReportGenerator(network_data, validation_results,
+                               simulation_events=sim_engine.recorder.to_report(limit=REPORT_EVENT_LIMIT))
     reporter.generate_json_report()
 
     print("\n--- COMPREHENSIVE ANALYSIS COMPLETE! ---")
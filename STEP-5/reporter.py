@@ -8,10 +8,11 @@ class ReportGenerator:
     """
     Generates a comprehensive JSON report from the analysis and simulation data.
     """
-    def __init__(self, parsed_data, validation_results, output_dir='reports'):
+    def __init__(self, parsed_data, validation_results, output_dir='reports', simulation_events=None):
         self.parsed_data = parsed_data
         self.validation_results = validation_results
         self.output_dir = output_dir
+        self.simulation_events = simulation_events  # EventRecorder.to_report() of the simulation run
 
     def generate_json_report(self):
         """
@@ -31,6 +32,8 @@ class ReportGenerator:
             "parsed_configurations": self.parsed_data,
             "validation_summary": self._format_validation_summary()
         }
+        if self.simulation_events is not None:
+            report["simulation_events"] = self.simulation_events
         
         timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
         filename = os.path.join(self.output_dir, f'comprehensive_analysis_{timestamp}.json')